@@ -6,12 +6,14 @@ Import from submodules:
     from refget.digests import sha512t24u_digest, md5_digest, ga4gh_digest
     from refget.utils import compare_seqcols, validate_seqcol, seqcol_digest
     from refget.clients import SequenceCollectionClient, FastaDrsClient
+    from refget.async_clients import AsyncSequenceCollectionClient
     from refget.router import create_refget_router
     from refget.seqcolapi import create_seqcol_app, prepare_store
     from refget.agents import RefgetDBAgent
 
 `refget.seqcolapi` (the API service) and `refget.router` require the optional
-`fastapi` dependency; `refget.agents` and `refget.models` require `sqlmodel`.
+`fastapi` dependency; `refget.agents` and `refget.models` require `sqlmodel`;
+`refget.async_clients` requires `httpx`.
 None of them are imported here, and nothing on this base-install path imports
 them, so `pip install refget` never pays for them. Install the service with
 `pip install 'refget[seqcolapi]'`.
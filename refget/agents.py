@@ -11,9 +11,17 @@ Requires ``pip install 'refget[db]'``.
 
 from __future__ import annotations
 
+import csv
+import io
 import json
 import os
-from typing import TYPE_CHECKING, List, Optional
+import threading
+import time
+import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
 
 import requests
 
@@ -27,15 +35,35 @@ from ._deps import require
 # builds is a driverless ``postgresql://``.
 require("refget.agents (the PostgreSQL-backed agent)", "db", "sqlmodel", "sqlalchemy")
 
-from sqlalchemy import URL  # noqa: E402
+from sqlalchemy import (  # noqa: E402
+    URL,
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    and_,
+    case,
+    cast,
+    inspect,
+    union,
+)
 from sqlalchemy.engine import Engine as SqlalchemyDatabaseEngine  # noqa: E402
-from sqlalchemy.orm import selectinload  # noqa: E402
-from sqlmodel import Session, SQLModel, create_engine, delete, func, select  # noqa: E402
-
-from .const import _LOGGER, DEFAULT_INHERENT_ATTRS, SEQCOL_SCHEMA_PATH  # noqa: E402
+from sqlalchemy.orm import joinedload, selectinload  # noqa: E402
+from sqlalchemy.schema import CreateIndex  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, delete, func, select, text  # noqa: E402
+
+from .const import (  # noqa: E402
+    _LOGGER,
+    DEFAULT_INHERENT_ATTRS,
+    SEQCOL_SCHEMA_PATH,
+    SEQUENCE_CHUNK_SIZE,
+)
 from .models import (  # noqa: E402
     AccessMethod,
     AccessURL,
+    CollectionMember,
     CollectionNamesAttr,
     FastaDrsObject,
     HumanReadableNames,
@@ -44,15 +72,19 @@ from .models import (  # noqa: E402
     NamesAttr,
     Pangenome,
     Sequence,
+    SequenceChunk,
     SequenceCollection,
     SequencesAttr,
     SortedSequencesAttr,
 )
+from .query_metrics import QUERY_METRICS, instrumented  # noqa: E402
+from .replicas import ROUND_ROBIN, ReplicaRouted, ReplicaSet, read_only  # noqa: E402
 from .response_models import PaginationResult, ResultsSequenceCollections  # noqa: E402
 from .utils import (  # noqa: E402
     build_pangenome_model,
     calc_jaccard_similarities,
     compare_seqcols,
+    digest_fasta_file,
     fasta_to_seqcol_dict,
 )
 
@@ -67,6 +99,475 @@ ATTR_TYPE_MAP = {
     "sorted_sequences": SortedSequencesAttr,
 }
 
+# Level 1 of a collection, in level1() order, straight from its digest columns
+LEVEL1_COLUMNS = {
+    name: getattr(SequenceCollection, f"{name}_digest")
+    for name in [
+        "lengths",
+        "names",
+        "sequences",
+        "sorted_sequences",
+        "name_length_pairs",
+        "sorted_name_length_pairs",
+    ]
+}
+
+# The attribute relationships are many-to-one, so joining them all cannot
+# multiply rows: a level 2 (or itemwise) collection is a single query.
+LEVEL2_LOAD = [
+    joinedload(getattr(SequenceCollection, name), innerjoin=True) for name in ATTR_TYPE_MAP
+]
+ITEMWISE_LOAD = [
+    joinedload(getattr(SequenceCollection, name), innerjoin=True)
+    for name in ["names", "lengths", "sequences"]
+]
+
+
+def member_rows(digest: str, names: list, lengths: list, sequences: list) -> List[dict]:
+    """The CollectionMember rows of a collection, in collection order"""
+    return [
+        {
+            "collection_digest": digest,
+            "position": position,
+            "sequence_digest": sequence,
+            "name": name,
+            "length": length,
+        }
+        for position, (name, length, sequence) in enumerate(zip(names, lengths, sequences))
+    ]
+
+
+# The CollectionMember columns compared for each attribute in similarities.
+# sorted_sequences holds the same digests as sequences, so it scores the same.
+SIMILARITY_COLUMNS = {
+    "lengths": ["length"],
+    "name_length_pairs": ["name", "length"],
+    "names": ["name"],
+    "sequences": ["sequence_digest"],
+    "sorted_sequences": ["sequence_digest"],
+}
+
+# A POSTed query collection, joined against CollectionMember while it is scored
+_QUERY_MEMBERS = Table(
+    "seqcol_query_members",
+    MetaData(),
+    Column("sequence_digest", String),
+    Column("name", String),
+    Column("length", Integer),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _similarity_statements(query, n_query: int, attributes: List[str], greatest, targets=None):
+    """
+    Rank stored collections by Jaccard similarity to the rows of ``query``
+
+    Jaccard similarity is computed as :func:`refget.utils.calc_jaccard_similarities`
+    does: per attribute, the overlap is the smaller of the number of query
+    elements found in the target and the number of target elements found in
+    the query, and the union is both sizes minus the overlap. Only collections
+    that share at least one element with the query are ranked.
+
+    Returns:
+        (ranked, candidates): the ranked select -- digest, score, then one
+        Jaccard column per attribute -- and the select of candidate digests
+    """
+    m = CollectionMember.__table__
+    overlaps = {}
+    for columns in {tuple(SIMILARITY_COLUMNS[attr]) for attr in attributes}:
+        label = "_".join(columns)
+        q = (
+            select(*[query.c[c] for c in columns], func.count().label("qcount"))
+            .group_by(*[query.c[c] for c in columns])
+            .subquery(f"query_{label}")
+        )
+        # One row per target and shared element: its count on either side
+        hits = select(m.c.collection_digest, q.c.qcount, func.count().label("tcount")).join(
+            q, and_(*[m.c[c] == q.c[c] for c in columns])
+        )
+        if targets is not None:
+            hits = hits.where(m.c.collection_digest.in_(targets))
+        hits = hits.group_by(m.c.collection_digest, *[m.c[c] for c in columns], q.c.qcount)
+        hits = hits.subquery(f"hits_{label}")
+        overlaps[columns] = (
+            select(
+                hits.c.collection_digest,
+                func.sum(hits.c.qcount).label("in_target"),
+                func.sum(hits.c.tcount).label("in_query"),
+            )
+            .group_by(hits.c.collection_digest)
+            .subquery(f"overlap_{label}")
+        )
+
+    candidates = union(*[select(o.c.collection_digest) for o in overlaps.values()]).subquery(
+        "candidates"
+    )
+    sizes = (
+        select(m.c.collection_digest, func.count().label("n"))
+        .where(m.c.collection_digest.in_(select(candidates.c.collection_digest)))
+        .group_by(m.c.collection_digest)
+        .subquery("sizes")
+    )
+    jaccards = []
+    for attr in attributes:
+        overlap = overlaps[tuple(SIMILARITY_COLUMNS[attr])]
+        in_target = func.coalesce(overlap.c.in_target, 0)
+        in_query = func.coalesce(overlap.c.in_query, 0)
+        shared = case((in_target < in_query, in_target), else_=in_query)
+        union_size = n_query + sizes.c.n - shared
+        jaccards.append(
+            case((union_size > 0, cast(shared, Float) / union_size), else_=0.0).label(attr)
+        )
+    score = greatest(*jaccards) if len(jaccards) > 1 else jaccards[0]
+    ranked = select(sizes.c.collection_digest, score.label("score"), *jaccards).select_from(sizes)
+    for overlap in overlaps.values():
+        ranked = ranked.outerjoin(
+            overlap, overlap.c.collection_digest == sizes.c.collection_digest
+        )
+    ranked = ranked.order_by(score.desc(), sizes.c.collection_digest)
+    return ranked, select(candidates.c.collection_digest)
+
+
+def collection_similarities(
+    session: Session,
+    seqcol: Optional[dict] = None,
+    digest: Optional[str] = None,
+    target_digests: Optional[List[str]] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> dict:
+    """
+    SequenceCollectionAgent.similarities in an open session
+
+    Takes a session rather than an engine so the asyncio agent can run the
+    same statements through ``AsyncSession.run_sync``.
+    """
+    attributes = sorted(
+        a for a in SIMILARITY_COLUMNS if seqcol is None or isinstance(seqcol.get(a), list)
+    )
+    if not attributes:
+        raise ValueError("Query collection has no attributes to compare")
+    if target_digests is not None:
+        target_digests = list(dict.fromkeys(target_digests))
+    greatest = func.max if session.get_bind().dialect.name == "sqlite" else func.greatest
+
+    m = CollectionMember.__table__
+    query = None
+    if digest is not None:
+        n_query = session.exec(select(func.count()).where(m.c.collection_digest == digest)).one()
+        if n_query or seqcol is None:
+            query = select(m).where(m.c.collection_digest == digest).subquery("query")
+    if query is None:
+        if seqcol is None:
+            raise ValueError(f"SequenceCollection with digest '{digest}' not found")
+        rows = [
+            {"sequence_digest": sequence, "name": name, "length": length}
+            for name, length, sequence in zip(
+                seqcol["names"], seqcol["lengths"], seqcol["sequences"]
+            )
+        ]
+        n_query = len(rows)
+        query = _QUERY_MEMBERS
+    try:
+        if query is _QUERY_MEMBERS:
+            _QUERY_MEMBERS.create(session.connection(), checkfirst=True)
+            if rows:
+                session.exec(_QUERY_MEMBERS.insert(), params=rows)
+        ranked, candidates = _similarity_statements(
+            query, n_query, attributes, greatest, target_digests
+        )
+        n_ranked = session.exec(select(func.count()).select_from(candidates.subquery())).one()
+        page = [
+            (row[0], dict(zip(attributes, row[2:])))
+            for row in session.exec(ranked.offset(offset).limit(limit))
+        ]
+        # Then the collections that share nothing with the query
+        stored = select(SequenceCollection.digest).where(
+            SequenceCollection.digest.not_in(candidates)
+        )
+        if target_digests is not None:
+            stored = stored.where(SequenceCollection.digest.in_(target_digests))
+        n_unranked = session.exec(select(func.count()).select_from(stored.subquery())).one()
+        if len(page) < limit and offset + limit > n_ranked:
+            start = max(offset - n_ranked, 0)
+            count = limit - len(page)
+            if target_digests is None:
+                unranked = session.exec(
+                    stored.order_by(SequenceCollection.digest).offset(start).limit(count)
+                ).all()
+            else:
+                found = set(session.exec(stored).all())
+                unranked = [d for d in target_digests if d in found][start : start + count]
+            page += [(d, dict.fromkeys(attributes, 0.0)) for d in unranked]
+        names = _human_readable_names(session, [d for d, _ in page])
+    except BaseException:
+        # A failed statement aborts a PostgreSQL transaction, and any DROP
+        # issued in it would raise over the real error. Rolling back undoes
+        # the CREATE (and the rows, where DDL is not transactional).
+        if query is _QUERY_MEMBERS:
+            session.rollback()
+        raise
+    if query is _QUERY_MEMBERS:
+        _QUERY_MEMBERS.drop(session.connection(), checkfirst=True)
+        session.commit()
+
+    return {
+        "similarities": [
+            {"digest": d, "human_readable_names": names.get(d, []), "similarities": sims}
+            for d, sims in page
+        ],
+        "pagination": {
+            "page": offset // limit,
+            "page_size": limit,
+            "total": n_ranked + n_unranked,
+        },
+        "reference_digest": None,
+    }
+
+
+def _human_readable_names(session: Session, digests: List[str]) -> dict:
+    names = {}
+    for name in session.exec(
+        select(HumanReadableNames)
+        .where(HumanReadableNames.digest.in_(digests))
+        .order_by(HumanReadableNames.id)
+    ):
+        names.setdefault(name.digest, []).append(name.human_readable_name)
+    return names
+
+
+# Collections per transaction in SequenceCollectionAgent.add_many
+ADD_MANY_BATCH_SIZE = 500
+
+
+def _insert_ignore_for(engine: SqlalchemyDatabaseEngine):
+    """
+    An ``insert(model)`` factory whose statements skip rows that already exist,
+    or None if the engine's dialect has no ``ON CONFLICT DO NOTHING``.
+    """
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return lambda model: insert(model).on_conflict_do_nothing()
+
+
+# Collections per COPY round (and transaction) in SequenceCollectionAgent.bulk_load
+BULK_LOAD_BATCH_SIZE = 10_000
+
+
+def _copy_rows(connection, table: Table, rows: List[dict]) -> int:
+    """
+    Merge rows into a PostgreSQL table through a staging table
+
+    The rows are written to a CSV buffer and loaded with ``COPY`` into a
+    temporary table shaped like ``table`` (dropped on commit), then merged
+    with ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``.
+
+    Returns:
+        The number of rows the merge inserted
+    """
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow(
+            [json.dumps(v) if isinstance(v, (list, dict)) else v for v in row.values()]
+        )
+    staging = f"staging_{table.name}"
+    column_list = ", ".join(columns)
+    connection.exec_driver_sql(
+        f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+    )
+    copy_sql = f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+    result = connection.exec_driver_sql(
+        f"INSERT INTO {table.name} ({column_list}) "
+        f"SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+    )
+    return result.rowcount
+
+
+def _bounded_map(executor: Executor, fn, items: list, window: int) -> Iterator:
+    """
+    ``executor.map(fn, items)`` with at most ``window`` calls submitted ahead
+
+    ``Executor.map`` submits every item at once, so results pile up when the
+    consumer is slower; here the next item is submitted only as one is taken.
+    """
+    items = iter(items)
+    futures = deque(executor.submit(fn, item) for item in islice(items, window))
+    while futures:
+        result = futures.popleft().result()
+        futures.extend(executor.submit(fn, item) for item in islice(items, 1))
+        yield result
+
+
+def _digest_fasta(task: tuple) -> tuple:
+    """
+    Digest one FASTA file for add_from_fasta_files. Runs in a worker process.
+
+    Returns ``(seqcol_dict, drs_obj_or_None, seconds)``.
+    """
+    fasta_file_path, create_fasta_drs = task
+    started = time.perf_counter()
+    if create_fasta_drs:
+        # One read of the file yields the seqcol and the DRS checksums.
+        fasta_digests = digest_fasta_file(fasta_file_path)
+        seqcol_dict = fasta_digests["seqcol_dict"]
+        drs_obj = FastaDrsObject.from_fasta_file(fasta_file_path, fasta_digests=fasta_digests)
+    else:
+        seqcol_dict, drs_obj = fasta_to_seqcol_dict(fasta_file_path), None
+    return seqcol_dict, drs_obj, time.perf_counter() - started
+
+
+def _log_ingest_progress(stats: dict, total: int, elapsed: float) -> None:
+    mb = stats["bytes"] / 1e6
+    digest_rate = mb / stats["digest_seconds"] if stats["digest_seconds"] else 0.0
+    write_rate = stats["files"] / stats["write_seconds"] if stats["write_seconds"] else 0.0
+    _LOGGER.info(
+        f"Ingested {stats['files']}/{total} FASTA files ({mb:.1f} MB) in {elapsed:.1f}s; "
+        f"digest {digest_rate:.1f} MB/s per worker, write {write_rate:.1f} collections/s"
+    )
+
+
+def postgres_url_from_env(drivername: str = "postgresql") -> URL:
+    """
+    Build a database URL from the POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB,
+    POSTGRES_USER and POSTGRES_PASSWORD environment variables.
+
+    Args:
+        drivername (str): SQLAlchemy dialect and driver, e.g. "postgresql+asyncpg"
+    """
+    port = os.getenv("POSTGRES_PORT")
+    return URL.create(
+        drivername,
+        username=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host=os.getenv("POSTGRES_HOST"),
+        port=int(port) if port else None,
+        database=os.getenv("POSTGRES_DB"),
+    )
+
+
+# Seconds a collection total is reused before it is counted again
+COUNT_CACHE_TTL = 60
+
+# Filter combinations whose totals are kept; the least recently used go first
+COUNT_CACHE_SIZE = 1024
+
+# Above this many rows (by the planner's estimate), an unfiltered PostgreSQL
+# total is reported from the table statistics instead of counted
+ESTIMATED_COUNT_THRESHOLD = 1_000_000
+
+
+class TotalsCache:
+    """
+    Collection totals, reused for ``ttl`` seconds
+
+    Totals of large tables are the expensive part of a paginated list: the
+    page itself is an index range scan, the count visits every matching row.
+    Keys are the filter tuples of :func:`collection_search_statements`; writes
+    through the agents clear the cache, and the TTL bounds how stale a total
+    can be after writes from other processes. The filters come from query
+    parameters, so at most ``max_entries`` totals are kept, least recently
+    used dropped first, and an expired total is dropped when it is next read.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_SIZE) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._totals: OrderedDict = OrderedDict()  # key -> (expires, total)
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            cached = self._totals.get(key)
+            if cached is None:
+                return None
+            if cached[0] < time.monotonic():
+                del self._totals[key]
+                return None
+            self._totals.move_to_end(key)
+            return cached[1]
+
+    def set(self, key: tuple, total: int) -> int:
+        with self._lock:
+            self._totals[key] = (time.monotonic() + self.ttl, total)
+            self._totals.move_to_end(key)
+            while len(self._totals) > self.max_entries:
+                self._totals.popitem(last=False)
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+
+# The planner's row estimate; -1 (or 0) until the table is first analyzed
+ESTIMATED_ROWS = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"
+)
+
+
+def collection_search_statements(
+    filters: Optional[dict] = None, after: Optional[str] = None, entity=SequenceCollection
+):
+    """
+    Build the list and count statements of a collection search
+
+    Results are ordered by digest, so pages are stable. With ``after``, the
+    page starts after that digest (keyset pagination): the database seeks to it
+    in the index instead of reading and discarding every row before an offset.
+
+    Args:
+        filters (dict): {attribute_name: digest} pairs, combined with AND
+        after (str): Return only collections whose digest sorts after this one
+        entity: What to select, e.g. ``SequenceCollection.digest`` for digests only
+
+    Returns:
+        (list_stmt, cnt_stmt, key): the digest-ordered select, the count of all
+        matches (ignoring ``after``), and a hashable key of the filters
+    """
+    list_stmt = select(entity).order_by(SequenceCollection.digest)
+    cnt_stmt = select(func.count(SequenceCollection.digest))
+    for attr_name, attr_digest in (filters or {}).items():
+        # Validate attribute exists to prevent SQL injection
+        if attr_name not in ATTR_TYPE_MAP:
+            raise ValueError(f"Unknown attribute: {attr_name}")
+        digest_column = getattr(SequenceCollection, f"{attr_name}_digest")
+        list_stmt = list_stmt.where(digest_column == attr_digest)
+        cnt_stmt = cnt_stmt.where(digest_column == attr_digest)
+    if after is not None:
+        list_stmt = list_stmt.where(SequenceCollection.digest > after)
+    return list_stmt, cnt_stmt, tuple(sorted((filters or {}).items()))
+
+
+def paginated_collections(
+    results: list, total: int, limit: int, offset: int = 0, after: Optional[str] = None
+) -> dict:
+    """The ``{"pagination", "results"}`` body of a collection search"""
+    pagination = {"page": 0 if after else offset // limit, "page_size": limit, "total": total}
+    if results and len(results) == limit:
+        last = results[-1]
+        pagination["next_after"] = getattr(last, "digest", last)
+    return {"pagination": pagination, "results": results}
+
 
 def read_yaml_url(url: str) -> dict:
     """
@@ -114,59 +615,142 @@ def load_json(source: str) -> dict:
             raise e
 
 
-class SequenceAgent(object):
+@instrumented
+class SequenceAgent(ReplicaRouted):
     """
     Agent for interacting with database of sequences
+
+    Sequences are stored as fixed-size SequenceChunk blocks, so a range read
+    fetches only the blocks it overlaps instead of detoasting a whole
+    chromosome. Rows written before chunking keep the full text in
+    Sequence.sequence; they are still served, and chunk_legacy() converts them.
     """
 
+    # Blocks fetched per query while streaming a whole sequence
+    STREAM_BATCH_BLOCKS = 16
+
     def __init__(self, engine: SqlalchemyDatabaseEngine) -> None:
         self.engine = engine
 
     def _get_entire_seq(self, digest: str) -> str:
+        return "".join(self.stream(digest))
+
+    @read_only
+    def stream(self, digest: str) -> Iterator[str]:
+        """Yield an entire sequence block by block.
+
+        Raises ValueError if not found -- eagerly, before the first block.
+        """
         with Session(self.engine) as session:
-            statement = select(Sequence).where(Sequence.digest == digest)
-            results = session.exec(statement)
-            response = results.first()
-            # raise ValueError if not found
-            if not response or not response.sequence:
+            statement = select(Sequence.digest, Sequence.length).where(Sequence.digest == digest)
+            if not session.exec(statement).first():
                 raise ValueError(f"Sequence with digest '{digest}' not found")
-            return response.sequence
-
+            if not self._is_chunked(session, digest):
+                legacy = session.exec(
+                    select(Sequence.sequence).where(Sequence.digest == digest)
+                ).first()
+                return iter([legacy])
+        # Read from the same database (replica or primary) as the checks above.
+        return self._iter_blocks(digest, self.engine)
+
+    def _iter_blocks(self, digest: str, engine: SqlalchemyDatabaseEngine) -> Iterator[str]:
+        next_block = 0
+        while True:
+            with Session(engine) as session:
+                statement = (
+                    select(SequenceChunk.block, SequenceChunk.data)
+                    .where(SequenceChunk.digest == digest, SequenceChunk.block >= next_block)
+                    .order_by(SequenceChunk.block)
+                    .limit(self.STREAM_BATCH_BLOCKS)
+                )
+                rows = session.exec(statement).all()
+            if not rows:
+                return
+            for _block, data in rows:
+                yield data
+            next_block = rows[-1][0] + 1
+
+    @staticmethod
+    def _is_chunked(session: Session, digest: str) -> bool:
+        statement = select(SequenceChunk.block).where(SequenceChunk.digest == digest).limit(1)
+        return session.exec(statement).first() is not None
+
+    @read_only
     def get(self, digest: str, start: int | None = None, end: int | None = None) -> str:
+        """Get a sequence, or its ``[start, end)`` range (0-based, end exclusive)."""
+        if start is None and end is None:
+            return self._get_entire_seq(digest)
+        elif start is None or end is None:
+            raise ValueError("Both start and end must be provided if either is provided.")
+        if end <= start:
+            return ""
         with Session(self.engine) as session:
-            # Use the SQL SUBSTRING function to extract the desired part of the sequence
-            if start is None and end is None:
-                return self._get_entire_seq(digest)
-            elif start is None or end is None:
-                raise ValueError("Both start and end must be provided if either is provided.")
+            first, last = start // SEQUENCE_CHUNK_SIZE, (end - 1) // SEQUENCE_CHUNK_SIZE
+            statement = (
+                select(SequenceChunk.data)
+                .where(
+                    SequenceChunk.digest == digest,
+                    SequenceChunk.block >= first,
+                    SequenceChunk.block <= last,
+                )
+                .order_by(SequenceChunk.block)
+            )
+            blocks = session.exec(statement).all()
+            if blocks:
+                offset = first * SEQUENCE_CHUNK_SIZE
+                return "".join(blocks)[start - offset : end - offset]
+
+            # Unchunked (legacy) row, or a range past the end of a chunked one.
+            # SQL SUBSTRING is 1-based.
             statement = select(
-                func.substring(Sequence.sequence, start, end - start + 1).label("subsequence")
+                func.substring(Sequence.sequence, start + 1, end - start).label("subsequence")
             ).where(Sequence.digest == digest)
-
-            results = session.exec(statement)
-            response = results.first()
-
-            # Raise ValueError if not found or if the subsequence is empty
-            if not response:
+            response = session.exec(statement).first()
+            if response is None:
                 raise ValueError(f"Subsequence with digest '{digest}' not found")
-
             return response
 
     def add(self, sequence: Sequence) -> Sequence:
+        """Add a sequence, splitting it into SEQUENCE_CHUNK_SIZE blocks."""
         with Session(self.engine, expire_on_commit=False) as session:
             with session.no_autoflush:
                 seq = session.get(Sequence, sequence.digest)
                 if seq:  # already exists
                     return seq
-                # seq_obj = Sequence(
-                #     digest=sequence.digest,
-                #     sequence=sequence.sequence,
-                #     length=sequence.length
-                # )
-                session.add(sequence)
+                session.add(Sequence(digest=sequence.digest, sequence="", length=sequence.length))
+                # The parent row must exist before its blocks reference it.
+                session.flush()
+                session.add_all(self._chunks(sequence.digest, sequence.sequence))
                 session.commit()
                 return sequence
 
+    def chunk_legacy(self, batch_size: int = 100) -> int:
+        """Split sequences stored as one text value into blocks.
+
+        Returns the number of sequences converted.
+        """
+        converted = 0
+        while True:
+            with Session(self.engine) as session:
+                statement = select(Sequence).where(Sequence.sequence != "").limit(batch_size)
+                rows = session.exec(statement).all()
+                if not rows:
+                    return converted
+                for row in rows:
+                    session.add_all(self._chunks(row.digest, row.sequence))
+                    row.sequence = ""
+                    session.add(row)
+                session.commit()
+                converted += len(rows)
+
+    def _chunks(self, digest: str, text: str) -> list[SequenceChunk]:
+        size = SEQUENCE_CHUNK_SIZE
+        return [
+            SequenceChunk(digest=digest, block=i, data=text[offset : offset + size])
+            for i, offset in enumerate(range(0, len(text), size))
+        ]
+
+    @read_only
     def list(self, offset: int = 0, limit: int = 50) -> dict:
         with Session(self.engine) as session:
             list_stmt = select(Sequence).offset(offset).limit(limit)
@@ -181,7 +765,8 @@ class SequenceAgent(object):
             }
 
 
-class SequenceCollectionAgent(object):
+@instrumented
+class SequenceCollectionAgent(ReplicaRouted):
     """
     Agent for interacting with database of sequence collection
     """
@@ -195,7 +780,9 @@ class SequenceCollectionAgent(object):
         self.engine = engine
         self.inherent_attrs = inherent_attrs
         self.parent = parent
+        self.totals = TotalsCache()
 
+    @read_only
     def get(
         self,
         digest: str,
@@ -215,23 +802,51 @@ class SequenceCollectionAgent(object):
         Returns:
             (SequenceCollection): The sequence collection (in requested format)
         """
+        not_found = ValueError(f"SequenceCollection with digest '{digest}' not found")
         with Session(self.engine) as session:
+            if attribute:
+                # Only the attribute row, joined on the collection's digest column
+                if attribute not in ATTR_TYPE_MAP:
+                    raise ValueError(f"Unknown attribute '{attribute}'")
+                Attribute = ATTR_TYPE_MAP[attribute]
+                statement = (
+                    select(Attribute.value)
+                    .join(
+                        SequenceCollection,
+                        getattr(SequenceCollection, f"{attribute}_digest") == Attribute.digest,
+                    )
+                    .where(SequenceCollection.digest == digest)
+                )
+                value = session.exec(statement).one_or_none()
+                if value is None:
+                    raise not_found
+                return value
+            if return_format == "level1":
+                # The attribute digests are columns of the collection row itself.
+                statement = select(*LEVEL1_COLUMNS.values()).where(
+                    SequenceCollection.digest == digest
+                )
+                row = session.exec(statement).one_or_none()
+                if row is None:
+                    raise not_found
+                return dict(zip(LEVEL1_COLUMNS, row))
+
             statement = select(SequenceCollection).where(SequenceCollection.digest == digest)
-            results = session.exec(statement)
-            seqcol = results.one_or_none()
+            if return_format == "level2":
+                statement = statement.options(*LEVEL2_LOAD)
+            elif return_format == "itemwise":
+                statement = statement.options(*ITEMWISE_LOAD)
+            seqcol = session.exec(statement).one_or_none()
             if not seqcol:
-                raise ValueError(f"SequenceCollection with digest '{digest}' not found")
-            if attribute:
-                return getattr(seqcol, attribute).value
-            elif return_format == "level2":
+                raise not_found
+            if return_format == "level2":
                 return seqcol.level2()
-            elif return_format == "level1":
-                return seqcol.level1()
             elif return_format == "itemwise":
                 return seqcol.itemwise(itemwise_limit)
             else:
                 return seqcol
 
+    @read_only
     def get_many_level2_offset(
         self, limit: int = 50, offset: int = 0, target_digests: Optional[List[str]] = None
     ) -> ResultsSequenceCollections:
@@ -345,6 +960,12 @@ class SequenceCollectionAgent(object):
                         seqcol.sorted_name_length_pairs_digest
                     )
 
+                    session.exec(
+                        delete(CollectionMember).where(
+                            CollectionMember.collection_digest == existing.digest
+                        )
+                    )
+                    self._insert_members(session, [seqcol])
                     session.commit()
                     return existing
                 else:
@@ -360,9 +981,307 @@ class SequenceCollectionAgent(object):
                         getattr(attr, "collection", []).append(new_collection)
 
                     session.add(new_collection)
+                    # The member rows reference the collection row.
+                    session.flush()
+                    self._insert_members(session, [seqcol])
                     session.commit()
+                    self.totals.clear()
                     return new_collection
 
+    def add_many(
+        self, seqcols: Iterable[SequenceCollection], batch_size: int = ADD_MANY_BATCH_SIZE
+    ) -> List[str]:
+        """
+        Insert many sequence collections with a few statements per batch
+
+        Unlike :meth:`add`, this never reads before writing. Attribute rows are
+        deduplicated in memory (collections in a genome set share most of
+        them), then each batch issues one ``INSERT ... ON CONFLICT DO NOTHING``
+        per attribute table, one for the collections and one for their
+        human-readable names, and commits. Rows already in the database are
+        left untouched, so this is insert-only: use ``add(..., update=True)``
+        to update a collection.
+
+        Args:
+            seqcols: The sequence collections to add
+            batch_size: Collections written per transaction
+
+        Returns:
+            The digests of the collections, in input order
+        """
+        insert = _insert_ignore_for(self.engine)
+        if insert is None:
+            _LOGGER.info(f"No bulk insert for {self.engine.dialect.name}; adding one by one")
+            return [self.add(seqcol).digest for seqcol in seqcols]
+
+        digests = []
+        # Digests already written, per attribute table and for the collections
+        seen = {attr_name: set() for attr_name in ATTR_TYPE_MAP}
+        seen["collections"] = set()
+        batch = []
+        for seqcol in seqcols:
+            digests.append(seqcol.digest)
+            batch.append(seqcol)
+            if len(batch) >= batch_size:
+                self._insert_batch(insert, batch, seen)
+                batch = []
+        if batch:
+            self._insert_batch(insert, batch, seen)
+        return digests
+
+    def _insert_batch(self, insert, batch: List[SequenceCollection], seen: dict) -> None:
+        attr_rows, collection_rows, name_rows = self._batch_rows(batch, seen)
+
+        # Attributes first: the collection rows reference them.
+        with Session(self.engine) as session:
+            for attr_name, rows in attr_rows.items():
+                if rows:
+                    session.exec(insert(ATTR_TYPE_MAP[attr_name]), params=rows)
+            if collection_rows:
+                session.exec(insert(SequenceCollection), params=collection_rows)
+                new = {row["digest"] for row in collection_rows}
+                self._insert_members(
+                    session, [s for s in batch if s.digest in new], insert(CollectionMember)
+                )
+            if name_rows:
+                session.exec(insert(HumanReadableNames), params=name_rows)
+            session.commit()
+        self.totals.clear()
+
+    @staticmethod
+    def _batch_rows(batch: List[SequenceCollection], seen: dict) -> tuple:
+        """
+        The attribute, collection and human-readable name rows of a batch
+
+        Rows whose digest is in ``seen`` are left out, and ``seen`` is updated,
+        so rows shared across batches are only produced once.
+
+        Returns:
+            ``(attr_rows, collection_rows, name_rows)``; attr_rows by attribute name
+        """
+        attr_rows = {attr_name: [] for attr_name in ATTR_TYPE_MAP}
+        collection_rows = []
+        name_rows = []
+        for seqcol in batch:
+            # A repeated collection can still bring new human-readable names.
+            for name_model in seqcol.human_readable_names:
+                name_rows.append(
+                    {
+                        "human_readable_name": name_model.human_readable_name,
+                        "digest": seqcol.digest,
+                    }
+                )
+            if seqcol.digest in seen["collections"]:
+                continue
+            seen["collections"].add(seqcol.digest)
+            row = {
+                "digest": seqcol.digest,
+                "sorted_name_length_pairs_digest": seqcol.sorted_name_length_pairs_digest,
+            }
+            for attr_name in ATTR_TYPE_MAP:
+                attr = getattr(seqcol, attr_name)
+                row[f"{attr_name}_digest"] = attr.digest
+                if attr.digest not in seen[attr_name]:
+                    seen[attr_name].add(attr.digest)
+                    attr_rows[attr_name].append({"digest": attr.digest, "value": attr.value})
+            collection_rows.append(row)
+        return attr_rows, collection_rows, name_rows
+
+    def bulk_load(
+        self, seqcols: Iterable[SequenceCollection], batch_size: int = BULK_LOAD_BATCH_SIZE
+    ) -> List[str]:
+        """
+        Populate the database from many sequence collections with ``COPY``
+
+        The rows are built and deduplicated in Python as in :meth:`add_many`,
+        but each table's rows for a batch are loaded with ``COPY`` into a
+        staging table and merged from there, which skips per-row statement
+        overhead entirely: this is the loader for filling a fresh database.
+        Rows already in the database are left untouched. Tables are analyzed
+        at the end, so the planner sees the new sizes.
+
+        ``COPY`` is PostgreSQL-only; other databases fall back to add_many.
+
+        Args:
+            seqcols: The sequence collections to load
+            batch_size: Collections loaded per transaction
+
+        Returns:
+            The digests of the collections, in input order
+        """
+        if self.engine.dialect.name != "postgresql":
+            _LOGGER.info(f"No COPY for {self.engine.dialect.name}; using add_many")
+            return self.add_many(seqcols)
+
+        digests = []
+        seen = {attr_name: set() for attr_name in ATTR_TYPE_MAP}
+        seen["collections"] = set()
+        batch = []
+        for seqcol in seqcols:
+            digests.append(seqcol.digest)
+            batch.append(seqcol)
+            if len(batch) >= batch_size:
+                self._copy_batch(batch, seen)
+                batch = []
+        if batch:
+            self._copy_batch(batch, seen)
+
+        with self.engine.begin() as connection:
+            for model in [
+                *ATTR_TYPE_MAP.values(),
+                SequenceCollection,
+                CollectionMember,
+                HumanReadableNames,
+            ]:
+                connection.exec_driver_sql(f"ANALYZE {model.__tablename__}")
+        return digests
+
+    def _copy_batch(self, batch: List[SequenceCollection], seen: dict) -> None:
+        started = time.perf_counter()
+        attr_rows, collection_rows, name_rows = self._batch_rows(batch, seen)
+        new = {row["digest"] for row in collection_rows}
+        members = []
+        for seqcol in batch:
+            if seqcol.digest in new:
+                new.discard(seqcol.digest)
+                members += member_rows(
+                    seqcol.digest, seqcol.names.value, seqcol.lengths.value, seqcol.sequences.value
+                )
+
+        # Attributes first: the collection rows reference them.
+        tables = [(ATTR_TYPE_MAP[name], rows) for name, rows in attr_rows.items()]
+        tables += [
+            (SequenceCollection, collection_rows),
+            (CollectionMember, members),
+            (HumanReadableNames, name_rows),
+        ]
+        inserted = 0
+        with self.engine.begin() as connection:
+            for model, rows in tables:
+                if rows:
+                    inserted += _copy_rows(connection, model.__table__, rows)
+        self.totals.clear()
+        _LOGGER.info(
+            f"Bulk loaded {len(batch)} collections ({inserted} new rows) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    @staticmethod
+    def _insert_members(session: Session, seqcols: Iterable, statement=None) -> None:
+        """Insert the CollectionMember rows of collections that have none"""
+        rows, done = [], set()
+        for seqcol in seqcols:
+            if seqcol.digest in done:
+                continue
+            done.add(seqcol.digest)
+            rows += member_rows(
+                seqcol.digest, seqcol.names.value, seqcol.lengths.value, seqcol.sequences.value
+            )
+        if rows:
+            if statement is None:
+                statement = CollectionMember.__table__.insert()
+            session.exec(statement, params=rows)
+
+    def backfill_members(self, batch_size: int = 100) -> int:
+        """
+        Fill in the CollectionMember rows of collections loaded before the table existed
+
+        Collections are visited in digest order, ``batch_size`` per
+        transaction, and those that already have member rows are skipped, so
+        this is safe to re-run and to interrupt.
+
+        Returns:
+            The number of collections backfilled
+        """
+        backfilled, after = 0, ""
+        has_members = (
+            select(CollectionMember.collection_digest)
+            .where(CollectionMember.collection_digest == SequenceCollection.digest)
+            .exists()
+        )
+        while True:
+            with Session(self.engine) as session:
+                page = session.exec(
+                    select(SequenceCollection.digest)
+                    .where(SequenceCollection.digest > after)
+                    .order_by(SequenceCollection.digest)
+                    .limit(batch_size)
+                ).all()
+                if not page:
+                    return backfilled
+                after = page[-1]
+                seqcols = session.exec(
+                    select(SequenceCollection)
+                    .where(SequenceCollection.digest.in_(page), ~has_members)
+                    .options(*ITEMWISE_LOAD)
+                ).all()
+                self._insert_members(session, seqcols)
+                session.commit()
+                backfilled += len(seqcols)
+                _LOGGER.info(f"Backfilled members of {backfilled} collections (through {after})")
+
+    @read_only
+    def collections_with_sequence(self, sequence_digest: str) -> List[str]:
+        """Digests of the collections that contain a sequence, in digest order"""
+        with Session(self.engine) as session:
+            return session.exec(
+                select(CollectionMember.collection_digest)
+                .where(CollectionMember.sequence_digest == sequence_digest)
+                .distinct()
+                .order_by(CollectionMember.collection_digest)
+            ).all()
+
+    @read_only
+    def collections_containing(self, sequence_digests: List[str]) -> List[str]:
+        """Digests of the collections that contain every one of some sequences"""
+        wanted = set(sequence_digests)
+        if not wanted:
+            return []
+        with Session(self.engine) as session:
+            return session.exec(
+                select(CollectionMember.collection_digest)
+                .where(CollectionMember.sequence_digest.in_(wanted))
+                .group_by(CollectionMember.collection_digest)
+                .having(func.count(func.distinct(CollectionMember.sequence_digest)) == len(wanted))
+                .order_by(CollectionMember.collection_digest)
+            ).all()
+
+    def similarities(
+        self,
+        seqcol: Optional[dict] = None,
+        digest: Optional[str] = None,
+        target_digests: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """
+        Jaccard similarities of stored collections to a query collection, best first
+
+        Scored in the database from the CollectionMember table: targets are
+        found through the element indexes, so only collections that share an
+        element with the query are read at all. A stored query is named by
+        ``digest``; otherwise ``seqcol`` -- with ``names``, ``lengths`` and
+        ``sequences`` -- is loaded into a temporary table for the query.
+        Collections that share nothing score 0 and follow the ranked ones, in
+        the order of ``target_digests`` (or of digest).
+
+        Args:
+            seqcol: The query collection (level 2); its array attributes choose
+                the similarities reported
+            digest: Digest of a stored query collection
+            target_digests: Only score these collections (default: all)
+            limit: Entries per page
+            offset: Entries to skip
+
+        Returns:
+            ``{"similarities", "pagination", "reference_digest"}``, as
+            RefgetStoreBackend.compute_similarities
+        """
+        with Session(self.engine) as session:
+            return collection_similarities(
+                session, seqcol, digest, target_digests, limit=limit, offset=offset
+            )
+
     def add_from_dict(self, seqcol_dict: dict, update: bool = False) -> SequenceCollection:
         """
         Add a sequence collection from a seqcol dictionary
@@ -398,13 +1317,21 @@ class SequenceCollectionAgent(object):
         Returns:
            (SequenceCollection): The added or updated sequence collection
         """
-        CSC = fasta_to_seqcol_dict(fasta_file_path)
+        create_fasta_drs = create_fasta_drs and self.parent and self.parent.fasta_drs
+        if create_fasta_drs:
+            # One read of the file yields the seqcol and the DRS checksums.
+            fasta_digests = digest_fasta_file(fasta_file_path)
+            CSC = dict(fasta_digests["seqcol_dict"])
+        else:
+            CSC = fasta_to_seqcol_dict(fasta_file_path)
         if human_readable_name:
             CSC["human_readable_names"] = human_readable_name
         seqcol = self.add_from_dict(CSC, update)
 
-        if create_fasta_drs and self.parent and self.parent.fasta_drs:
-            drs_obj = FastaDrsObject.from_fasta_file(fasta_file_path, digest=seqcol.digest)
+        if create_fasta_drs:
+            drs_obj = FastaDrsObject.from_fasta_file(
+                fasta_file_path, digest=seqcol.digest, fasta_digests=fasta_digests
+            )
             if self.parent.fasta_drs.url_prefix:
                 url = self.parent.fasta_drs.url_prefix + os.path.basename(fasta_file_path)
                 drs_obj.access_methods = [
@@ -433,105 +1360,180 @@ class SequenceCollectionAgent(object):
             human_readable_name=human_readable_name,
         )
 
+    def add_from_fasta_files(
+        self,
+        fasta_file_paths: List[str],
+        human_readable_names: Optional[List[Optional[str]]] = None,
+        create_fasta_drs: bool = True,
+        jobs: int = 1,
+        batch_size: int = ADD_MANY_BATCH_SIZE,
+    ) -> List[str]:
+        """
+        Load many FASTA files into the refget database as a pipeline.
+
+        Digesting (``fasta_to_seqcol_dict`` plus the DRS checksums) runs in a
+        pool of ``jobs`` processes, while this process is the single writer:
+        it takes results in input order and writes them ``batch_size`` at a
+        time with :meth:`add_many`. At most ``2 * jobs`` files are digested
+        ahead of the writer. Throughput of both stages is logged after every
+        batch.
+
+        Args:
+            fasta_file_paths (list): Paths to the FASTA files
+            human_readable_names (list): A name (or None) per file, optional
+            create_fasta_drs (bool): If True, create a FastaDrsObject per file
+            jobs (int): Digesting processes; 1 digests in this process
+            batch_size (int): Collections written per transaction
+
+        Returns:
+            (list): The seqcol digest of each file, in input order
+        """
+        names = human_readable_names or [None] * len(fasta_file_paths)
+        fasta_drs = self.parent.fasta_drs if self.parent and create_fasta_drs else None
+        tasks = [(path, fasta_drs is not None) for path in fasta_file_paths]
+
+        digests = []
+        pending = []
+        stats = {"files": 0, "bytes": 0, "digest_seconds": 0.0, "write_seconds": 0.0}
+        started = time.perf_counter()
+
+        def flush():
+            write_started = time.perf_counter()
+            self.add_many([seqcol for seqcol, _ in pending], batch_size=batch_size)
+            if fasta_drs is not None:
+                fasta_drs.add_many([drs_obj for _, drs_obj in pending])
+            stats["write_seconds"] += time.perf_counter() - write_started
+            pending.clear()
+            _log_ingest_progress(stats, len(tasks), time.perf_counter() - started)
+
+        executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            if executor:
+                results = _bounded_map(executor, _digest_fasta, tasks, 2 * jobs)
+            else:
+                results = map(_digest_fasta, tasks)
+            for (path, _), name, result in zip(tasks, names, results):
+                seqcol_dict, drs_obj, seconds = result
+                if name:
+                    seqcol_dict["human_readable_names"] = name
+                seqcol = SequenceCollection.from_dict(seqcol_dict, self.inherent_attrs)
+                if drs_obj is not None:
+                    drs_obj.id = seqcol.digest
+                    if fasta_drs.url_prefix:
+                        url = fasta_drs.url_prefix + os.path.basename(path)
+                        drs_obj.access_methods = [
+                            AccessMethod(type="https", access_url=AccessURL(url=url))
+                        ]
+                digests.append(seqcol.digest)
+                pending.append((seqcol, drs_obj))
+                stats["files"] += 1
+                stats["bytes"] += os.path.getsize(path)
+                stats["digest_seconds"] += seconds
+                if len(pending) >= batch_size:
+                    flush()
+            if pending:
+                flush()
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        return digests
+
     def add_from_fasta_pep(
         self,
         pep: "peppy.Project",
         fa_root: str,
         update: bool = False,
         create_fasta_drs: bool = True,
+        jobs: int = 1,
     ) -> dict:
         """
         Given a PEP project and a root directory containing the fasta files,
         load the fasta files into the refget database.
 
+        Files are digested by ``jobs`` processes and written in batches; see
+        :meth:`add_from_fasta_files`.
+
         Args:
             pep (peppy.Project): PEP project object containing sample metadata
             fa_root (str): Root directory containing the fasta files
-            update (bool): If True, update existing sequence collections
+            update (bool): Deprecated and ignored. Collections are content-addressed,
+                so an existing one only ever gains new human-readable names
             create_fasta_drs (bool): If True, create FastaDrsObjects for the FASTA files
+            jobs (int): Number of processes digesting FASTA files
 
         Returns:
             (dict): A dictionary of the digests of the added sequence collections
         """
+        if update:
+            warnings.warn(
+                "add_from_fasta_pep(update=...) is ignored: collections are "
+                "content-addressed, so an existing one is never rewritten",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        samples = list(pep.samples)
+        digests = self.add_from_fasta_files(
+            [os.path.join(fa_root, s.fasta) for s in samples],
+            [getattr(s, "sample_name", None) for s in samples],
+            create_fasta_drs=create_fasta_drs,
+            jobs=jobs,
+        )
+        return {s.fasta: digest for s, digest in zip(samples, digests)}
 
-        total_files = len(pep.samples)
-        results = {}
-        import time
-
-        for i, s in enumerate(pep.samples, 1):
-            fa_path = os.path.join(fa_root, s.fasta)
-            _LOGGER.info(f"Loading {fa_path} ({i} of {total_files})")
-
-            start_time = time.time()  # Record start time
-            if s.sample_name:
-                results[s.fasta] = self.add_from_fasta_file_with_name(
-                    fa_path, s.sample_name, update, create_fasta_drs
-                ).digest
-            else:
-                results[s.fasta] = self.add_from_fasta_file(
-                    fa_path, update, create_fasta_drs
-                ).digest
-            elapsed_time = time.time() - start_time  # Calculate elapsed time
-
-            _LOGGER.info(f"Loaded in {elapsed_time:.2f} seconds")
-
-        return results
-
-    def list_by_offset(self, limit: int = 50, offset: int = 0) -> dict:
-        with Session(self.engine) as session:
-            list_stmt = select(SequenceCollection).offset(offset).limit(limit)
-            cnt_stmt = select(func.count(SequenceCollection.digest))
-            cnt_res = session.exec(cnt_stmt)
-            list_res = session.exec(list_stmt)
-            count = cnt_res.one()
-            seqcols = list_res.all()
-            return {
-                "pagination": {"page": int(offset / limit), "page_size": limit, "total": count},
-                "results": seqcols,
-            }
+    @read_only
+    def list_by_offset(
+        self, limit: int = 50, offset: int = 0, after: Optional[str] = None
+    ) -> dict:
+        return self.search_by_attributes({}, offset=offset, limit=limit, after=after)
 
-    def search_by_attributes(self, filters: dict, offset: int = 0, limit: int = 50) -> dict:
+    @read_only
+    def search_by_attributes(
+        self, filters: dict, offset: int = 0, limit: int = 50, after: Optional[str] = None
+    ) -> dict:
         """
         Search sequence collections by multiple attribute filters (AND logic).
 
+        Results are ordered by digest. Pass the ``next_after`` digest of one
+        page as ``after`` to get the next (keyset pagination); ``offset`` is
+        then ignored. The total is cached, see :meth:`total`.
+
         Args:
             filters: Dict of {attribute_name: digest} pairs
             offset: Pagination offset
             limit: Max results to return
+            after: Return collections whose digest sorts after this one
 
         Returns:
             Dict with pagination info and results
         """
+        list_stmt, cnt_stmt, key = collection_search_statements(filters, after)
+        if after is None:
+            list_stmt = list_stmt.offset(offset)
         with Session(self.engine) as session:
-            # Start with base query
-            list_stmt = select(SequenceCollection)
-            cnt_stmt = select(func.count(SequenceCollection.digest))
-
-            # Chain .where() for each filter (creates AND logic)
-            for attr_name, attr_digest in filters.items():
-                # Validate attribute exists to prevent SQL injection
-                if attr_name not in ATTR_TYPE_MAP:
-                    raise ValueError(f"Unknown attribute: {attr_name}")
-
-                # Build WHERE condition dynamically
-                digest_column = getattr(SequenceCollection, f"{attr_name}_digest")
-                list_stmt = list_stmt.where(digest_column == attr_digest)
-                cnt_stmt = cnt_stmt.where(digest_column == attr_digest)
-
-            # Add pagination
-            list_stmt = list_stmt.offset(offset).limit(limit)
+            total = self.total(session, cnt_stmt, key)
+            seqcols = session.exec(list_stmt.limit(limit)).all()
+        return paginated_collections(seqcols, total, limit, offset, after)
 
-            # Execute queries
-            cnt_res = session.exec(cnt_stmt)
-            list_res = session.exec(list_stmt)
-            count = cnt_res.one()
-            seqcols = list_res.all()
-
-            return {
-                "pagination": {"page": offset // limit, "page_size": limit, "total": count},
-                "results": seqcols,
-            }
+    def total(self, session: Session, cnt_stmt, key: tuple) -> int:
+        """
+        The number of collections ``cnt_stmt`` counts, cached for COUNT_CACHE_TTL
 
+        An unfiltered total on a PostgreSQL table of more than
+        ESTIMATED_COUNT_THRESHOLD rows is the planner's estimate, which is
+        refreshed by autovacuum (or ANALYZE), rather than an exact count.
+        """
+        total = self.totals.get(key)
+        if total is not None:
+            return total
+        if not key and self.engine.dialect.name == "postgresql":
+            estimate = session.exec(
+                ESTIMATED_ROWS, params={"table_name": SequenceCollection.__tablename__}
+            ).scalar()
+            if estimate and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return self.totals.set(key, int(estimate))
+        return self.totals.set(key, session.exec(cnt_stmt).one())
+
+    @read_only
     def list(self, page_size: int = 100, cursor: Optional[str] = None) -> dict:
         with Session(self.engine) as session:
             if cursor:
@@ -558,7 +1560,8 @@ class SequenceCollectionAgent(object):
             }
 
 
-class PangenomeAgent(object):
+@instrumented
+class PangenomeAgent(ReplicaRouted):
     """
     Agent for interacting with database of pangenomes
     """
@@ -567,9 +1570,28 @@ class PangenomeAgent(object):
         self.engine = parent.engine
         self.parent = parent
 
+    # Collections loaded per query when building level 4
+    LEVEL4_BATCH_SIZE = 100
+
+    @read_only
     def get(self, digest: str, return_format: str = "level2") -> Pangenome | dict:
+        """
+        Get a pangenome by digest
+
+        Each level is assembled with a fixed number of queries: the collections
+        of a pangenome are loaded in one ``IN`` query rather than one lazy
+        load each, level 3 reads their digest columns, and level 4 loads their
+        attributes in batches (see :meth:`iter_level4`).
+        """
+        if return_format == "level4":
+            names, collections = self.iter_level4(digest)
+            return {"names": names, "collections": list(collections)}
         with Session(self.engine) as session:
             statement = select(Pangenome).where(Pangenome.digest == digest)
+            if return_format in ("level2", "level3", "itemwise"):
+                statement = statement.options(
+                    selectinload(Pangenome.names), selectinload(Pangenome.collections)
+                )
             result = session.exec(statement)
             pangenome = result.one_or_none()
             if not pangenome:
@@ -579,9 +1601,13 @@ class PangenomeAgent(object):
             elif return_format == "level1":
                 return pangenome.level1()
             elif return_format == "level3":
-                return pangenome.level3()
-            elif return_format == "level4":
-                return pangenome.level4()
+                return {
+                    "names": pangenome.names.value.split(","),
+                    "collections": [
+                        {name: getattr(c, column.key) for name, column in LEVEL1_COLUMNS.items()}
+                        for c in pangenome.collections
+                    ],
+                }
             elif return_format == "itemwise":
                 l2 = pangenome.level2()
                 list_of_dicts = []
@@ -596,6 +1622,42 @@ class PangenomeAgent(object):
             else:
                 return pangenome
 
+    @read_only
+    def iter_level4(
+        self, digest: str, batch_size: Optional[int] = None
+    ) -> tuple[list, Iterator[dict]]:
+        """
+        Level 4 of a pangenome, with its collections produced as they are loaded
+
+        The names and the collection digests are read at once, so a missing
+        pangenome raises here. The level 2 collections are then loaded
+        ``batch_size`` at a time, each batch in one query and its own session,
+        so a streamed response neither waits for nor holds the whole pangenome.
+
+        Returns:
+            ``(names, collections)``: the names, and an iterator of the level 2
+            collections in pangenome order
+        """
+        batch_size = batch_size or self.LEVEL4_BATCH_SIZE
+        pangenome = self.get(digest, return_format="level2")
+        digests = pangenome["collections"]
+        engine = self.engine
+
+        def collections():
+            for start in range(0, len(digests), batch_size):
+                batch = digests[start : start + batch_size]
+                with Session(engine) as session:
+                    loaded = session.exec(
+                        select(SequenceCollection)
+                        .where(SequenceCollection.digest.in_(batch))
+                        .options(*LEVEL2_LOAD)
+                    ).all()
+                    by_digest = {seqcol.digest: seqcol.level2() for seqcol in loaded}
+                for collection_digest in batch:
+                    yield by_digest[collection_digest]
+
+        return pangenome["names"], collections()
+
     def add(self, pangenome: Pangenome) -> Pangenome:
         with Session(self.engine) as session:
             with session.no_autoflush:
@@ -633,6 +1695,7 @@ class PangenomeAgent(object):
         p = build_pangenome_model(pangenome_obj)
         return self.add(p)
 
+    @read_only
     def list_by_offset(self, limit: int = 50, offset: int = 0) -> dict:
         with Session(self.engine) as session:
             list_stmt = select(Pangenome).offset(offset).limit(limit)
@@ -647,10 +1710,12 @@ class PangenomeAgent(object):
             }
 
 
-class AttributeAgent(object):
+@instrumented
+class AttributeAgent(ReplicaRouted):
     def __init__(self, engine: SqlalchemyDatabaseEngine) -> None:
         self.engine = engine
 
+    @read_only
     def get(self, attribute_type: str, digest: str) -> list:
         Attribute = ATTR_TYPE_MAP[attribute_type]
         with Session(self.engine) as session:
@@ -663,6 +1728,7 @@ class AttributeAgent(object):
 
             return response.value
 
+    @read_only
     def list(self, attribute_type: str, offset: int = 0, limit: int = 50) -> dict:
         Attribute = ATTR_TYPE_MAP[attribute_type]
         with Session(self.engine) as session:
@@ -677,6 +1743,7 @@ class AttributeAgent(object):
                 "results": seqcols,
             }
 
+    @read_only
     def search(self, attribute_type: str, digest: str, offset: int = 0, limit: int = 50) -> dict:
         with Session(self.engine) as session:
             list_stmt = (
@@ -698,7 +1765,8 @@ class AttributeAgent(object):
             }
 
 
-class FastaDrsAgent:
+@instrumented
+class FastaDrsAgent(ReplicaRouted):
     """
     Agent for interacting with database of FASTA DRS objects
     """
@@ -707,6 +1775,7 @@ class FastaDrsAgent:
         self.engine = engine
         self.url_prefix = url_prefix
 
+    @read_only
     def get(self, digest: str) -> FastaDrsObject:
         """Get a FastaDrsObject by its digest (object_id)"""
         with Session(self.engine) as session:
@@ -728,6 +1797,21 @@ class FastaDrsAgent:
                 session.commit()
                 return fasta_drs
 
+    def add_many(self, fasta_drs_objects: List[FastaDrsObject]) -> None:
+        """Add FastaDrsObjects in one transaction, skipping ids already present"""
+        by_id = {obj.id: obj for obj in fasta_drs_objects}
+        if not by_id:
+            return
+        with Session(self.engine) as session:
+            existing = session.exec(
+                select(FastaDrsObject.id).where(FastaDrsObject.id.in_(by_id))
+            ).all()
+            for obj_id in existing:
+                del by_id[obj_id]
+            session.add_all(by_id.values())
+            session.commit()
+
+    @read_only
     def list_by_offset(self, limit: int = 50, offset: int = 0) -> dict:
         """List FastaDrsObjects with pagination"""
         with Session(self.engine) as session:
@@ -766,7 +1850,7 @@ class FastaDrsAgent:
             return drs_obj
 
 
-class RefgetDBAgent(object):
+class RefgetDBAgent(ReplicaRouted):
     """
     Primary aggregator agent, interface to all other agents
 
@@ -775,6 +1859,15 @@ class RefgetDBAgent(object):
     - POSTGRES_DB
     - POSTGRES_USER
     - POSTGRES_PASSWORD
+    - POSTGRES_REPLICA_URLS: comma-separated read replica URLs (see ``replica_urls``)
+
+    Read-only methods are routed to the read replicas, if any, and fall back
+    to the primary when none is healthy; see :mod:`refget.replicas`.
+
+    Args:
+        replica_urls: Database URLs of read replicas of the primary
+        replica_strategy: ``"round_robin"`` or ``"least_latency"``
+        max_replica_lag: Skip replicas more than this many seconds behind the primary
     """
 
     def __init__(
@@ -784,25 +1877,16 @@ class RefgetDBAgent(object):
         schema=SEQCOL_SCHEMA_PATH,
         inherent_attrs: List[str] = DEFAULT_INHERENT_ATTRS,
         fasta_drs_url_prefix: Optional[str] = None,
+        replica_urls: Optional[List[str]] = None,
+        replica_strategy: str = ROUND_ROBIN,
+        max_replica_lag: Optional[float] = None,
     ):  # = "sqlite:///foo.db"
         if engine is not None:
             self.engine = engine
         else:
             if not postgres_str:
                 # Configure via environment variables
-                POSTGRES_HOST = os.getenv("POSTGRES_HOST")
-                POSTGRES_PORT = os.getenv("POSTGRES_PORT")
-                POSTGRES_DB = os.getenv("POSTGRES_DB")
-                POSTGRES_USER = os.getenv("POSTGRES_USER")
-                POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-                postgres_str = URL.create(
-                    "postgresql",
-                    username=POSTGRES_USER,
-                    password=POSTGRES_PASSWORD,
-                    host=POSTGRES_HOST,
-                    port=int(POSTGRES_PORT) if POSTGRES_PORT else None,
-                    database=POSTGRES_DB,
-                )
+                postgres_str = postgres_url_from_env()
 
             try:
                 self.engine = create_engine(postgres_str, echo=False)
@@ -843,44 +1927,96 @@ class RefgetDBAgent(object):
         self.__attribute = AttributeAgent(self.engine)
         self.__fasta_drs = FastaDrsAgent(self.engine, fasta_drs_url_prefix)
 
+        if replica_urls is None and os.getenv("POSTGRES_REPLICA_URLS"):
+            replica_urls = os.getenv("POSTGRES_REPLICA_URLS").split(",")
+        QUERY_METRICS.attach(self.engine)
+        if replica_urls:
+            self.replicas = ReplicaSet(
+                self.engine, replica_urls, strategy=replica_strategy, max_lag=max_replica_lag
+            )
+            for replica in self.replicas.replicas:
+                QUERY_METRICS.attach(replica.engine)
+            for agent in (self.seq, self.seqcol, self.pangenome, self.attribute, self.fasta_drs):
+                agent.replicas = self.replicas
+
     # =========================================================================
     # SeqColBackend protocol methods
     # =========================================================================
 
+    @read_only
     def get_collection(self, digest: str, level: int = 2) -> dict:
         format_map = {1: "level1", 2: "level2"}
         return self.seqcol.get(digest, return_format=format_map.get(level, "level2"))
 
+    @read_only
     def get_collection_attribute(self, digest: str, attribute: str) -> list:
         return self.seqcol.get(digest, attribute=attribute)
 
+    @read_only
     def get_collection_itemwise(self, digest: str, limit: int | None = None) -> list[dict]:
         return self.seqcol.get(digest, return_format="itemwise", itemwise_limit=limit)
 
+    @read_only
+    def iter_collection_itemwise(
+        self, digest: str, offset: int = 0, limit: int | None = None
+    ) -> Iterator[dict]:
+        # Load the arrays inside the session; the items are built as they are read.
+        level2 = self.seqcol.get(digest, return_format="level2")
+        names, lengths, sequences = level2["names"], level2["lengths"], level2["sequences"]
+        stop = len(sequences) if limit is None else min(len(sequences), offset + limit)
+        return (
+            {"name": names[i], "length": lengths[i], "sequence": sequences[i]}
+            for i in range(offset, stop)
+        )
+
+    @read_only
     def get_attribute(self, attribute_name: str, attribute_digest: str) -> list:
         return self.attribute.get(attribute_name, attribute_digest)
 
+    @read_only
     def compare_digests(self, digestA: str, digestB: str) -> dict:
         A = self.seqcol.get(digestA, return_format="level2")
         B = self.seqcol.get(digestB, return_format="level2")
         return compare_seqcols(A, B)
 
+    @read_only
     def compare_digest_with_level2(self, digest: str, level2_b: dict) -> dict:
         return self.compare_1_digest(digest, level2_b)
 
+    @read_only
     def list_collections(
-        self, page: int = 0, page_size: int = 100, filters: dict | None = None
+        self,
+        page: int = 0,
+        page_size: int = 100,
+        filters: dict | None = None,
+        after: str | None = None,
     ) -> dict:
-        if filters:
-            return self.seqcol.search_by_attributes(
-                filters, limit=page_size, offset=page * page_size
-            )
-        return self.seqcol.list_by_offset(limit=page_size, offset=page * page_size)
+        return self.seqcol.search_by_attributes(
+            filters or {}, limit=page_size, offset=page * page_size, after=after
+        )
+
+    def compute_similarities(
+        self,
+        seqcol: dict,
+        page: int = 0,
+        page_size: int = 50,
+        target_digests: list[str] | None = None,
+        query_digest: str | None = None,
+    ) -> dict:
+        return self.seqcol.similarities(
+            seqcol,
+            digest=query_digest,
+            target_digests=target_digests,
+            limit=page_size,
+            offset=page * page_size,
+        )
 
+    @read_only
     def collection_count(self) -> int:
         result = self.seqcol.list_by_offset(limit=1, offset=0)
         return result["pagination"]["total"]
 
+    @read_only
     def list_attributes(self, attribute: str, page: int = 0, page_size: int = 100) -> dict:
         res = self.attribute.list(attribute, limit=page_size, offset=page * page_size)
         res["results"] = [x.digest for x in res["results"]]
@@ -917,6 +2053,7 @@ class RefgetDBAgent(object):
     def list_fhr(self) -> list:
         return []
 
+    @read_only
     def calc_similarities(self, digestA: str, digestB: str) -> dict:
         """
         Calculates the Jaccard similarity between two sequence collections.
@@ -959,11 +2096,13 @@ class RefgetDBAgent(object):
 
         return calc_jaccard_similarities(seqcolA, seqcolB)
 
+    @read_only
     def compare_1_digest(self, digestA: str, seqcolB: dict) -> dict:
         A = self.seqcol.get(digestA, return_format="level2")
         B = SequenceCollection.from_dict(seqcolB, self.inherent_attrs).level2()
         return compare_seqcols(A, B)
 
+    @read_only
     def retrieve_level2_digest(self, seqcoldigest: str) -> dict:
         A = self.seqcol.get(seqcoldigest, return_format="level2")
         return A
@@ -991,10 +2130,51 @@ class RefgetDBAgent(object):
     def __str__(self) -> str:
         return f"RefgetDBAgent. Connection to database: '{self.engine}'"
 
+    def migrate(self, dry_run: bool = False) -> List[str]:
+        """
+        Create the declared indexes that an existing database is missing
+
+        ``SQLModel.metadata.create_all`` creates the indexes of the tables it
+        creates, but never adds an index to a table that already exists. This
+        compares every table's declared indexes with the database and creates
+        the missing ones -- on PostgreSQL with ``CREATE INDEX CONCURRENTLY``,
+        so reads and writes continue while an index builds -- then refreshes
+        the planner statistics of the tables it changed. Safe to re-run.
+
+        Args:
+            dry_run (bool): Only report what would be created
+
+        Returns:
+            Names of the indexes created (or, with dry_run, missing)
+        """
+        inspector = inspect(self.engine)
+        missing = []
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            missing += [ix for ix in table.indexes if ix.name not in existing]
+        if dry_run or not missing:
+            return [ix.name for ix in missing]
+
+        postgres = self.engine.dialect.name == "postgresql"
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for index in missing:
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+                if postgres:
+                    ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                _LOGGER.info(f"Creating index {index.name}")
+                conn.exec_driver_sql(ddl)
+            for table_name in sorted({index.table.name for index in missing}):
+                conn.exec_driver_sql(f"ANALYZE {table_name}")
+        return [ix.name for ix in missing]
+
     def truncate(self) -> int:
         """Delete all records from the database"""
 
         with Session(self.engine) as session:
+            session.exec(delete(CollectionMember))
             statement = delete(SequenceCollection)
             result1 = session.exec(statement)
             session.exec(delete(Pangenome))
@@ -1005,4 +2185,5 @@ class RefgetDBAgent(object):
             session.exec(delete(SortedSequencesAttr))
 
             session.commit()
+            self.seqcol.totals.clear()
             return result1.rowcount
@@ -0,0 +1,301 @@
+"""asyncio PostgreSQL-backed refget agent.
+
+:class:`AsyncRefgetDBAgent` serves the :class:`refget.backend.SeqColBackend`
+protocol from the same tables as :class:`refget.agents.RefgetDBAgent`, but on
+SQLAlchemy's asyncio engine: its protocol methods are coroutines, which the
+router awaits (see :func:`refget.backend.maybe_await`), so a slow query yields
+the event loop instead of blocking every other request on the worker.
+
+Like :mod:`refget.agents`, the module boundary is the gate. SQLAlchemy's
+asyncio layer also needs greenlet, and a database URL needs an asyncio driver
+-- asyncpg for PostgreSQL (``postgresql+asyncpg://``), aiosqlite for SQLite.
+Requires ``pip install 'refget[db-async]'``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Iterator, List, Optional
+
+from ._deps import require
+
+require(
+    "refget.async_agents (the asyncio PostgreSQL-backed agent)",
+    "db-async",
+    "sqlmodel",
+    "sqlalchemy",
+    "greenlet",
+)
+
+from sqlalchemy import URL  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel, func, select  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from .agents import (  # noqa: E402
+    ATTR_TYPE_MAP,
+    ESTIMATED_COUNT_THRESHOLD,
+    ESTIMATED_ROWS,
+    ITEMWISE_LOAD,
+    LEVEL1_COLUMNS,
+    LEVEL2_LOAD,
+    TotalsCache,
+    collection_search_statements,
+    collection_similarities,
+    load_json,
+    paginated_collections,
+    postgres_url_from_env,
+)
+from .const import DEFAULT_INHERENT_ATTRS, SEQCOL_SCHEMA_PATH  # noqa: E402
+from .models import SequenceCollection  # noqa: E402
+from .query_metrics import QUERY_METRICS  # noqa: E402
+from .utils import compare_seqcols  # noqa: E402
+
+
+class AsyncRefgetDBAgent:
+    """
+    SeqColBackend on an asyncio database engine
+
+    Parameterized like RefgetDBAgent: pass an AsyncEngine, a URL, or nothing
+    to connect to ``postgresql+asyncpg`` with the POSTGRES_* environment
+    variables. When the agent builds the engine, it sizes the connection pool
+    explicitly, checks connections before use (``pool_pre_ping``) and caches
+    compiled statements -- and, with asyncpg, prepared statements -- per
+    connection. Call :meth:`create_tables` once before serving an empty database.
+
+    Args:
+        engine: An existing AsyncEngine; the pool arguments are then ignored
+        url: Database URL with an asyncio driver
+        pool_size: Connections kept open
+        max_overflow: Extra connections allowed under load
+        pool_timeout: Seconds to wait for a free connection
+        pool_recycle: Seconds after which a connection is replaced
+        statement_cache_size: Compiled (and prepared) statements cached
+        schema: Path of the seqcol schema, which names the inherent attributes
+        inherent_attrs: Inherent attributes if the schema does not name them
+    """
+
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        url: Optional[str | URL] = None,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_timeout: float = 30,
+        pool_recycle: int = 1800,
+        statement_cache_size: int = 500,
+        schema=SEQCOL_SCHEMA_PATH,
+        inherent_attrs: List[str] = DEFAULT_INHERENT_ATTRS,
+    ):
+        if engine is None:
+            url = url or postgres_url_from_env("postgresql+asyncpg")
+            connect_args = {}
+            if "asyncpg" in str(url).split("://", 1)[0]:
+                connect_args["prepared_statement_cache_size"] = statement_cache_size
+            engine = create_async_engine(
+                url,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_recycle=pool_recycle,
+                pool_pre_ping=True,
+                query_cache_size=statement_cache_size,
+                connect_args=connect_args,
+            )
+        self.engine = engine
+        self.totals = TotalsCache()
+        QUERY_METRICS.attach(engine)
+
+        self.inherent_attrs = inherent_attrs
+        if schema:
+            self.schema_dict = load_json(schema)
+            self.inherent_attrs = self.schema_dict.get("ga4gh", {}).get("inherent", inherent_attrs)
+        else:
+            self.schema_dict = None
+
+    async def create_tables(self) -> None:
+        """Create any missing tables"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def dispose(self) -> None:
+        """Close every pooled connection"""
+        await self.engine.dispose()
+
+    def _session(self) -> AsyncSession:
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    async def _one_or_none(self, statement, digest: str):
+        async with self._session() as session:
+            result = (await session.exec(statement)).one_or_none()
+        if result is None:
+            raise ValueError(f"SequenceCollection with digest '{digest}' not found")
+        return result
+
+    async def _get(self, digest: str, *options) -> SequenceCollection:
+        statement = select(SequenceCollection).where(SequenceCollection.digest == digest)
+        return await self._one_or_none(statement.options(*options), digest)
+
+    async def _level2(self, digest: str) -> dict:
+        return (await self._get(digest, *LEVEL2_LOAD)).level2()
+
+    # =========================================================================
+    # SeqColBackend protocol methods
+    # =========================================================================
+
+    async def get_collection(self, digest: str, level: int = 2) -> dict:
+        if level == 1:
+            # The attribute digests are columns of the collection row itself.
+            statement = select(*LEVEL1_COLUMNS.values()).where(SequenceCollection.digest == digest)
+            row = await self._one_or_none(statement, digest)
+            return dict(zip(LEVEL1_COLUMNS, row))
+        return await self._level2(digest)
+
+    async def get_collection_attribute(self, digest: str, attribute: str) -> list:
+        if attribute not in ATTR_TYPE_MAP:
+            raise ValueError(f"Unknown attribute '{attribute}'")
+        Attribute = ATTR_TYPE_MAP[attribute]
+        statement = (
+            select(Attribute.value)
+            .join(
+                SequenceCollection,
+                getattr(SequenceCollection, f"{attribute}_digest") == Attribute.digest,
+            )
+            .where(SequenceCollection.digest == digest)
+        )
+        return await self._one_or_none(statement, digest)
+
+    async def get_collection_itemwise(self, digest: str, limit: int | None = None) -> list[dict]:
+        return (await self._get(digest, *ITEMWISE_LOAD)).itemwise(limit)
+
+    async def iter_collection_itemwise(
+        self, digest: str, offset: int = 0, limit: int | None = None
+    ) -> Iterator[dict]:
+        level2 = await self._level2(digest)
+        names, lengths, sequences = level2["names"], level2["lengths"], level2["sequences"]
+        stop = len(sequences) if limit is None else min(len(sequences), offset + limit)
+        return (
+            {"name": names[i], "length": lengths[i], "sequence": sequences[i]}
+            for i in range(offset, stop)
+        )
+
+    async def get_attribute(self, attribute_name: str, attribute_digest: str) -> list:
+        Attribute = ATTR_TYPE_MAP[attribute_name]
+        async with self._session() as session:
+            result = await session.exec(
+                select(Attribute.value).where(Attribute.digest == attribute_digest)
+            )
+            value = result.first()
+        if value is None:
+            raise KeyError(f"{attribute_name} attribute '{attribute_digest}' not found")
+        return value
+
+    async def compare_digests(self, digest_a: str, digest_b: str) -> dict:
+        A, B = await asyncio.gather(self._level2(digest_a), self._level2(digest_b))
+        return compare_seqcols(A, B)
+
+    async def compare_digest_with_level2(self, digest: str, level2_b: dict) -> dict:
+        A = await self._level2(digest)
+        B = SequenceCollection.from_dict(level2_b, self.inherent_attrs).level2()
+        return compare_seqcols(A, B)
+
+    async def list_collections(
+        self,
+        page: int = 0,
+        page_size: int = 100,
+        filters: dict | None = None,
+        after: str | None = None,
+    ) -> dict:
+        list_stmt, cnt_stmt, key = collection_search_statements(
+            filters, after, entity=SequenceCollection.digest
+        )
+        if after is None:
+            list_stmt = list_stmt.offset(page * page_size)
+        async with self._session() as session:
+            total = await self._total(session, cnt_stmt, key)
+            digests = (await session.exec(list_stmt.limit(page_size))).all()
+        return paginated_collections(list(digests), total, page_size, page * page_size, after)
+
+    async def _total(self, session: AsyncSession, cnt_stmt, key: tuple) -> int:
+        # As SequenceCollectionAgent.total
+        total = self.totals.get(key)
+        if total is not None:
+            return total
+        if not key and self.engine.dialect.name == "postgresql":
+            result = await session.exec(
+                ESTIMATED_ROWS, params={"table_name": SequenceCollection.__tablename__}
+            )
+            estimate = result.scalar()
+            if estimate and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return self.totals.set(key, int(estimate))
+        return self.totals.set(key, (await session.exec(cnt_stmt)).one())
+
+    async def collection_count(self) -> int:
+        return (await self.list_collections(page_size=1))["pagination"]["total"]
+
+    async def list_attributes(self, attribute: str, page: int = 0, page_size: int = 100) -> dict:
+        Attribute = ATTR_TYPE_MAP[attribute]
+        async with self._session() as session:
+            count = (await session.exec(select(func.count(Attribute.digest)))).one()
+            digests = (
+                await session.exec(
+                    select(Attribute.digest).offset(page * page_size).limit(page_size)
+                )
+            ).all()
+        return {
+            "pagination": {"page": page, "page_size": page_size, "total": count},
+            "results": list(digests),
+        }
+
+    async def compute_similarities(
+        self,
+        seqcol: dict,
+        page: int = 0,
+        page_size: int = 50,
+        target_digests: list[str] | None = None,
+        query_digest: str | None = None,
+    ) -> dict:
+        # The statements of RefgetDBAgent.compute_similarities, run on this
+        # session's connection through greenlet.
+        async with self._session() as session:
+            return await session.run_sync(
+                collection_similarities,
+                seqcol,
+                query_digest,
+                target_digests,
+                limit=page_size,
+                offset=page * page_size,
+            )
+
+    async def capabilities(self) -> dict:
+        return {
+            "backend_type": "database",
+            "n_collections": await self.collection_count(),
+            "has_sequence_data": True,  # database always has sequences
+            "collection_alias_namespaces": [],
+            "sequence_alias_namespaces": [],
+            "fhr_metadata_collections": [],
+        }
+
+    # Alias + FHR parity stubs, as on RefgetDBAgent. They touch no database,
+    # so they stay plain methods.
+    def resolve_alias(self, kind: str, namespace: str, alias: str):
+        return None
+
+    def list_alias_namespaces(self, kind: str) -> list:
+        return []
+
+    def list_aliases(self, kind: str, namespace: str) -> list:
+        return []
+
+    def aliases_for(self, kind: str, digest: str) -> list:
+        return []
+
+    def get_fhr(self, digest: str):
+        return None
+
+    def list_fhr(self) -> list:
+        return []
+
+    def __str__(self) -> str:
+        return f"AsyncRefgetDBAgent. Connection to database: '{self.engine}'"
@@ -0,0 +1,485 @@
+"""asyncio client for a refget sequence collections API.
+
+:class:`AsyncSequenceCollectionClient` offers the HTTP methods of
+:class:`refget.clients.SequenceCollectionClient` as coroutines, on httpx. It
+tries its URLs in turn and retries idempotent requests the way the synchronous
+client's session does, but requests for different digests run concurrently,
+bounded by a semaphore, so resolving thousands of digests is not serialised
+on one connection.
+
+The bulk helpers (:meth:`~AsyncSequenceCollectionClient.get_collections` and
+friends) return one entry per input, in input order: the response, or the
+exception that request ended with, as ``asyncio.gather(...,
+return_exceptions=True)`` would. One missing digest does not fail the batch.
+
+httpx is not a dependency of the base install, so the module boundary is the
+gate: requires ``pip install 'refget[client-async]'``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import re
+import time
+from typing import Iterable, List, Optional
+
+from ._deps import require
+
+require("refget.async_clients (the asyncio API client)", "client-async", "httpx")
+
+import httpx  # noqa: E402
+
+from ._version import __version__  # noqa: E402
+from .clients import (  # noqa: E402
+    _LOGGER,
+    BACKOFF_FACTOR,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    RETRY_STATUSES,
+)
+
+# Requests in flight at once, per client
+DEFAULT_CONCURRENCY = 20
+
+# Methods safe to send again after a failure, as urllib3's Retry defaults
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"})
+
+# Statuses whose Retry-After header is honoured, as in urllib3
+RETRY_AFTER_STATUSES = frozenset({413, 429, 503})
+
+
+def _backoff(retry: int) -> float:
+    """Seconds before the ``retry``-th retry; the first is immediate, as in urllib3"""
+    if retry <= 1:
+        return 0.0
+    delay = BACKOFF_FACTOR * 2 ** (retry - 1) + random.uniform(0, BACKOFF_JITTER)
+    return min(BACKOFF_MAX, delay)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds a response's Retry-After header asks to wait, if it has one"""
+    value = response.headers.get("Retry-After")
+    if response.status_code not in RETRY_AFTER_STATUSES or not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    when = email.utils.parsedate_tz(value)
+    if when is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(when) - time.time())
+
+
+def _httpx_timeout(timeout: float | tuple[float, float] | None) -> httpx.Timeout:
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _wrap_response(response: httpx.Response) -> dict | str:
+    """As refget.clients._wrap_response: JSON or text, raising on an error status"""
+    response.raise_for_status()
+    content_type = response.headers.get("content-type", "")
+    if re.search(r"application/(.*\+)?json", content_type):
+        return response.json()
+    return response.text
+
+
+class AsyncSequenceCollectionClient:
+    """
+    An asyncio client for a refget sequence collections API.
+
+    Use it as an async context manager, or call :meth:`aclose` when done::
+
+        async with AsyncSequenceCollectionClient() as client:
+            collections = await client.get_collections(digests)
+    """
+
+    def __init__(
+        self,
+        urls: list[str] = ["https://seqcolapi.databio.org"],
+        raise_errors: Optional[bool] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        """
+        Initializes the asyncio sequence collection client.
+
+        Args:
+            urls (list, optional): A list of base URLs of the sequence collection API. Defaults to ["https://seqcolapi.databio.org"].
+            raise_errors (bool, optional): Whether the alias, FHR and region lookups raise
+                errors or log them. Defaults to None, which will guess.
+            client (httpx.AsyncClient, optional): Client to send requests through; the
+                caller closes it. Defaults to a new one pooling ``concurrency`` connections.
+            timeout (float | tuple, optional): Connect and read timeouts in seconds.
+            retries (int, optional): Retries of an idempotent request to one URL.
+            concurrency (int, optional): Requests in flight at once.
+
+        Attributes:
+            urls (list): The list of base URLs of the sequence collection API.
+        """
+        self.urls = [url.rstrip("/") for url in urls]
+        if raise_errors is None:
+            raise_errors = __name__ == "__main__"
+        self.raise_errors = raise_errors
+        self.retries = retries
+        self.timeout = _httpx_timeout(timeout)
+        self._owns_client = client is None
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=concurrency, max_keepalive_connections=concurrency
+                ),
+                headers={"User-Agent": f"refget/{__version__}"},
+            )
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> "AsyncSequenceCollectionClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections, unless the httpx client was passed in"""
+        if self._owns_client:
+            await self.client.aclose()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}>\n  API URLs:    {', '.join(self.urls)}\n"
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """One URL: send, retrying idempotent requests on errors and RETRY_STATUSES"""
+        retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        for retry in range(1, retries + 2):
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(
+                        method, url, timeout=self.timeout, **kwargs
+                    )
+            except httpx.TransportError:
+                if retry > retries:
+                    raise
+                delay = _backoff(retry)
+            else:
+                if response.status_code not in RETRY_STATUSES or retry > retries:
+                    return response
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = _backoff(retry)
+            # Sleep outside the semaphore, so a backing-off request holds no slot.
+            await asyncio.sleep(delay)
+
+    async def _try_urls(
+        self,
+        endpoint: str,
+        method: str = "GET",
+        params: Optional[dict] = None,
+        json: Optional[dict | list] = None,
+        raise_errors: bool = True,
+    ) -> Optional[dict | str]:
+        """As refget.clients._try_urls: each URL in turn until one succeeds"""
+        errors = []
+        kwargs = {"json": json} if method == "POST" else {"params": params}
+        for base_url in self.urls:
+            try:
+                response = await self._send(method, f"{base_url}{endpoint}", **kwargs)
+                result = _wrap_response(response)
+                _LOGGER.debug(f"Response received from {base_url}")
+                return result
+            except httpx.HTTPError as e:
+                _LOGGER.debug(f"Error from {base_url}: {e}")
+                errors.append(f"Error from {base_url}: {e}")
+        error_message = "All URLs failed:\n" + "\n".join(errors)
+        if raise_errors:
+            raise ConnectionError(error_message)
+        _LOGGER.error(error_message)
+        return None
+
+    @staticmethod
+    async def gather(*requests) -> list:
+        """
+        Await ``requests`` concurrently; each result, or the exception it raised, in order
+
+        Args:
+            *requests: Coroutines, e.g. ``client.get_collection(digest)``.
+
+        Returns:
+            (list): One entry per request, in the order given.
+        """
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    # Single requests, as on SequenceCollectionClient
+
+    async def get_collection(self, digest: str, level: int = 2) -> Optional[dict]:
+        """
+        Retrieves a sequence collection for a given digest and detail level.
+
+        Args:
+            digest (str): The digest of the sequence collection.
+            level (int, optional): The level of detail for the sequence collection. Defaults to 2.
+
+        Returns:
+            (dict): The JSON response containing the sequence collection.
+        """
+        return await self._try_urls(f"/collection/{digest}?level={level}")
+
+    async def get_attribute(self, attribute: str, digest: str) -> Optional[dict]:
+        """
+        Retrieves a specific attribute value by its digest.
+
+        Args:
+            attribute (str): The attribute name (e.g., "names", "lengths", "sequences").
+            digest (str): The level 1 digest of the attribute.
+
+        Returns:
+            (dict): The JSON response containing the attribute value.
+        """
+        return await self._try_urls(f"/attribute/collection/{attribute}/{digest}")
+
+    async def compare(self, digest1: str, digest2: str) -> Optional[dict]:
+        """
+        Compares two sequence collections hosted on the server.
+
+        Args:
+            digest1 (str): The digest of the first sequence collection.
+            digest2 (str): The digest of the second sequence collection.
+
+        Returns:
+            (dict): The JSON response containing the comparison of the two sequence collections.
+        """
+        return await self._try_urls(f"/comparison/{digest1}/{digest2}")
+
+    async def compare_local(self, digest: str, local_collection: dict) -> Optional[dict]:
+        """
+        Compares a server-hosted sequence collection with a local collection.
+
+        Args:
+            digest (str): The digest of the server-hosted sequence collection.
+            local_collection (dict): A level 2 sequence collection representation.
+
+        Returns:
+            (dict): The JSON response containing the comparison.
+        """
+        return await self._try_urls(f"/comparison/{digest}", method="POST", json=local_collection)
+
+    async def get_regions(self, digest: str, regions: list) -> Optional[list]:
+        """
+        Extract region substrings from a server-hosted sequence collection.
+
+        Args:
+            digest (str): The collection digest to extract regions from.
+            regions (list): A list of {"chrom", "start", "end"} dicts.
+
+        Returns:
+            (list): A list of {"chrom_name", "start", "end", "sequence"} dicts.
+        """
+        return await self._try_urls(
+            f"/collection/{digest}/regions",
+            method="POST",
+            json=regions,
+            raise_errors=self.raise_errors,
+        )
+
+    async def list_collections(
+        self,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+        **filters,
+    ) -> Optional[dict]:
+        """
+        Lists all available sequence collections with optional paging and attribute filtering support.
+
+        Args:
+            page (int, optional): The page number to retrieve. Defaults to None.
+            page_size (int, optional): The number of items per page. Defaults to None.
+            **filters (Any): Optional attribute filters (e.g., names="abc123", lengths="def456").
+                      Values should be level 1 digests of the attributes.
+
+        Returns:
+            (dict): The JSON response containing the list of available sequence collections.
+        """
+        params = {}
+        if page is not None:
+            params["page"] = page
+        if page_size is not None:
+            params["page_size"] = page_size
+        params.update(filters)
+        return await self._try_urls("/list/collection", params=params)
+
+    async def list_attributes(
+        self, attribute: str, page: Optional[int] = None, page_size: Optional[int] = None
+    ) -> Optional[dict]:
+        """
+        Lists all available values for a given attribute with optional paging support.
+
+        Args:
+            attribute (str): The attribute to list values for.
+            page (int, optional): The page number to retrieve. Defaults to None.
+            page_size (int, optional): The number of items per page. Defaults to None.
+
+        Returns:
+            (dict): The JSON response containing the list of available values for the attribute.
+        """
+        params = {}
+        if page is not None:
+            params["page"] = page
+        if page_size is not None:
+            params["page_size"] = page_size
+        return await self._try_urls(f"/list/attributes/{attribute}", params=params)
+
+    async def service_info(self) -> Optional[dict]:
+        """
+        Retrieves information about the service.
+
+        Returns:
+            (dict): The service information.
+        """
+        return await self._try_urls("/service-info")
+
+    async def resolve_alias(
+        self, namespace: str, alias: str, kind: str = "collection"
+    ) -> Optional[dict]:
+        """
+        Resolve a namespace:alias to a digest.
+
+        Args:
+            namespace (str): The alias namespace.
+            alias (str): The alias name.
+            kind (str): "collection" (default) or "sequence".
+
+        Returns:
+            (dict): {"namespace": ..., "alias": ..., "digest": ...} or None.
+        """
+        endpoint = f"/alias/{kind}/{namespace}/{alias}"
+        return await self._try_urls(endpoint, raise_errors=self.raise_errors)
+
+    async def list_alias_namespaces(self, kind: str = "collection") -> Optional[dict]:
+        """
+        List alias namespaces for the given kind.
+
+        Args:
+            kind (str): "collection" (default) or "sequence".
+
+        Returns:
+            (dict): {"namespaces": [...]}.
+        """
+        return await self._try_urls(f"/list/alias/{kind}", raise_errors=self.raise_errors)
+
+    async def list_aliases(self, namespace: str, kind: str = "collection") -> Optional[dict]:
+        """
+        List aliases within a namespace.
+
+        Args:
+            namespace (str): The alias namespace.
+            kind (str): "collection" (default) or "sequence".
+
+        Returns:
+            (dict): {"namespace": ..., "aliases": [...]}.
+        """
+        endpoint = f"/list/alias/{kind}/{namespace}"
+        return await self._try_urls(endpoint, raise_errors=self.raise_errors)
+
+    async def aliases_for(self, digest: str, kind: str = "collection") -> Optional[dict]:
+        """
+        Reverse lookup: list all (namespace, alias) pairs for a digest.
+
+        Args:
+            digest (str): The digest to look up.
+            kind (str): "collection" (default) or "sequence".
+
+        Returns:
+            (dict): {"digest": ..., "aliases": [[namespace, alias], ...]}.
+        """
+        return await self._try_urls(f"/aliases/{kind}/{digest}", raise_errors=self.raise_errors)
+
+    async def get_fhr(self, digest: str) -> Optional[dict]:
+        """
+        Get FHR metadata for a collection.
+
+        Args:
+            digest (str): The collection digest.
+
+        Returns:
+            (dict): FHR metadata, or None if not found.
+        """
+        return await self._try_urls(f"/collection/{digest}/fhr", raise_errors=self.raise_errors)
+
+    async def list_fhr(self) -> Optional[dict]:
+        """
+        List collections that have FHR metadata.
+
+        Returns:
+            (dict): {"collections": [...]}.
+        """
+        return await self._try_urls("/list/fhr", raise_errors=self.raise_errors)
+
+    # Bulk helpers: one entry per input, in order -- the response or the exception.
+    # Lookups in them always raise, so that a failure is reported on its item
+    # rather than logged and returned as None.
+
+    async def get_collections(self, digests: Iterable[str], level: int = 2) -> List:
+        """
+        Retrieve many sequence collections concurrently.
+
+        Args:
+            digests (Iterable[str]): Digests of the sequence collections.
+            level (int, optional): The level of detail. Defaults to 2.
+
+        Returns:
+            (list): Per digest, in order, the collection or the exception raised for it.
+        """
+        return await self.gather(*(self.get_collection(d, level) for d in digests))
+
+    async def get_attributes(self, attribute: str, digests: Iterable[str]) -> List:
+        """
+        Retrieve many values of one attribute concurrently.
+
+        Args:
+            attribute (str): The attribute name (e.g., "names", "lengths", "sequences").
+            digests (Iterable[str]): Level 1 digests of the attribute.
+
+        Returns:
+            (list): Per digest, in order, the value or the exception raised for it.
+        """
+        return await self.gather(*(self.get_attribute(attribute, d) for d in digests))
+
+    async def compare_many(self, pairs: Iterable[tuple[str, str]]) -> List:
+        """
+        Compare many pairs of server-hosted sequence collections concurrently.
+
+        Args:
+            pairs (Iterable[tuple]): (digest1, digest2) pairs.
+
+        Returns:
+            (list): Per pair, in order, the comparison or the exception raised for it.
+        """
+        return await self.gather(*(self.compare(a, b) for a, b in pairs))
+
+    async def resolve_aliases(
+        self, namespace: str, aliases: Iterable[str], kind: str = "collection"
+    ) -> List:
+        """
+        Resolve many aliases in one namespace concurrently.
+
+        Args:
+            namespace (str): The alias namespace.
+            aliases (Iterable[str]): The alias names.
+            kind (str): "collection" (default) or "sequence".
+
+        Returns:
+            (list): Per alias, in order, the resolution or the exception raised for it.
+        """
+        return await self.gather(
+            *(
+                self._try_urls(f"/alias/{kind}/{namespace}/{alias}", raise_errors=True)
+                for alias in aliases
+            )
+        )
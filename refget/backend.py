@@ -2,9 +2,14 @@
 SeqColBackend protocol and RefgetStoreBackend implementation.
 
 The SeqColBackend protocol defines the interface for serving seqcol API endpoints.
-Two implementations:
+Implementations:
 - RefgetDBAgent (PostgreSQL) — full features including similarities, pangenomes, DRS
+- AsyncRefgetDBAgent (PostgreSQL, asyncio) — the protocol methods as coroutines
 - RefgetStoreBackend (RefgetStore) — core seqcol operations, no database required
+- HybridBackend — RefgetDBAgent for metadata, a RefgetStore for sequence bytes
+
+A backend's protocol methods may be coroutine functions; callers pass their
+results through :func:`maybe_await`.
 
 For concurrent serving, RefgetStoreBackend is intended to wrap a fully loaded
 ReadonlyRefgetStore (obtained via RefgetStore.into_readonly()), whose methods all
@@ -13,10 +18,94 @@ borrow immutably and are therefore safe to share across request threads.
 
 from __future__ import annotations
 
-from typing import Protocol, runtime_checkable
+import heapq
+import inspect
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Iterator, Protocol, runtime_checkable
 
 from .const import DEFAULT_TRANSIENT_ATTRS
-from .utils import calc_jaccard_similarities, compare_seqcols
+from .utils import calc_jaccard_similarities, compare_seqcols, seqcol_digest
+
+# How long a similarity query's partial ranking is kept for follow-up pages,
+# and how many ranked targets may be cached at once across every backend in
+# the process (a ranking costs one unit per target it covers).
+SIMILARITY_CACHE_TTL = 300
+SIMILARITY_CACHE_BUDGET = 500_000
+
+
+class SharedCache:
+    """A thread-safe LRU cache whose budget is shared by every backend in the process.
+
+    Each entry carries a cost, and the least recently used entries are evicted
+    until the total cost fits ``max_cost``. Several apps mounted in one host
+    process each get their own backend, but they draw on one budget rather than
+    multiplying it by the number of mounts. Callers namespace their keys (see
+    ``RefgetStoreBackend``) so entries never leak between backends.
+    """
+
+    def __init__(self, max_cost: int, ttl: float | None = None):
+        self.max_cost = max_cost
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, cost, created)
+        self._cost = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, cost: int = 1) -> None:
+        """Insert ``value``, evicting least recently used entries to stay in budget."""
+        if cost > self.max_cost:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, cost, time.monotonic())
+            self._cost += cost
+            while self._cost > self.max_cost:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._cost = 0
+
+    def discard_namespace(self, namespace) -> None:
+        """Drop every entry whose key is a tuple starting with ``namespace``."""
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[0] is namespace]:
+                self._discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "cost": self._cost, "max_cost": self.max_cost}
+
+    def _discard(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._cost -= entry[1]
+
+
+SIMILARITY_CACHE = SharedCache(SIMILARITY_CACHE_BUDGET, ttl=SIMILARITY_CACHE_TTL)
+
+# Enriched level 2 collections, costed by array elements (sequences x attributes).
+LEVEL2_CACHE_BUDGET = 20_000_000
+LEVEL2_CACHE = SharedCache(LEVEL2_CACHE_BUDGET)
+
+
+async def maybe_await(result):
+    """Await a backend method's result if the backend is asynchronous."""
+    return await result if inspect.isawaitable(result) else result
 
 
 @runtime_checkable
@@ -35,6 +124,15 @@ class SeqColBackend(Protocol):
         """Get collection in itemwise format. Raises ValueError if not found."""
         ...
 
+    def iter_collection_itemwise(
+        self, digest: str, offset: int = 0, limit: int | None = None
+    ) -> Iterator[dict]:
+        """Lazily yield the collection's items, starting at ``offset``.
+
+        Raises ValueError if not found -- eagerly, before the first item, so the
+        router can still answer 404 before it starts streaming."""
+        ...
+
     def get_attribute(self, attribute_name: str, attribute_digest: str) -> list:
         """Get an attribute by its own digest. Raises KeyError if not found."""
         ...
@@ -51,7 +149,10 @@ class SeqColBackend(Protocol):
         self, page: int = 0, page_size: int = 100, filters: dict | None = None
     ) -> dict:
         """List collections with pagination and optional attribute filters.
-        Returns {"results": [...], "pagination": {...}}"""
+        Returns {"results": [...], "pagination": {...}}
+
+        Database backends also take ``after``, a digest to page from (keyset
+        pagination), and add the ``next_after`` digest to full pages."""
         ...
 
     def list_attributes(self, attribute: str, page: int = 0, page_size: int = 100) -> dict:
@@ -75,6 +176,98 @@ class SeqColBackend(Protocol):
         ...
 
 
+def _jaccard_upper_bound(query_sizes: list[int], n_sequences: int | None) -> float:
+    """Best Jaccard similarity any attribute of a target could reach.
+
+    Every level 2 array of a stored collection has ``n_sequences`` elements, and
+    an intersection can be no larger than the smaller array, so an attribute
+    scores at most ``min(a, b) / max(a, b)``. Returns 1.0 (no pruning) when the
+    target's size is unknown.
+    """
+    if n_sequences is None or not query_sizes:
+        return 1.0
+    return max(
+        (min(a, n_sequences) / max(a, n_sequences)) if max(a, n_sequences) else 0.0
+        for a in query_sizes
+    )
+
+
+class _SimilarityRun:
+    """Resumable top-K ranking of one similarity query over a list of targets.
+
+    Targets are visited in descending order of their Jaccard upper bound, so the
+    scan stops as soon as the next bound falls below the current K-th best
+    score: nothing after it can enter the top K. The scored prefix and the scan
+    position are kept, so asking for a deeper page later resumes the scan.
+    Ranking matches a stable descending sort on max similarity: ties keep the
+    caller's target order. Targets that cannot be scored are dropped from the
+    ranking but still count toward ``total``, which is fixed up front so it does
+    not depend on how far the scan has gone.
+    """
+
+    def __init__(self, candidates: list[tuple[float, int, str]], score):
+        """
+        Args:
+            candidates: ``(upper_bound, position, digest)`` per target, where
+                ``position`` is the target's index in the caller's list.
+            score: Callable taking a digest and returning a similarity entry,
+                or None if the target cannot be scored.
+        """
+        self._candidates = sorted(candidates, key=lambda c: (-c[0], c[1]))
+        self._score = score
+        self._cursor = 0
+        self._scored: list[tuple[float, int, dict]] = []
+        self.total = len(candidates)
+        self.lock = threading.Lock()
+
+    def top(self, k: int) -> list[dict]:
+        """Return the best ``k`` entries, best first, scoring only what is needed."""
+        if k <= 0:
+            return []
+        # Min-heap of (score, -position, entry); heap[0] is the current K-th best.
+        heap: list[tuple[float, int, dict]] = []
+        for item in self._scored:
+            _push_bounded(heap, item, k)
+        while self._cursor < len(self._candidates):
+            bound, position, digest = self._candidates[self._cursor]
+            if len(heap) >= k and bound < heap[0][0]:
+                break
+            self._cursor += 1
+            entry = self._score(digest)
+            if entry is None:
+                continue
+            sims = entry["similarities"]
+            item = (max(sims.values()) if sims else 0, -position, entry)
+            self._scored.append(item)
+            _push_bounded(heap, item, k)
+        heap.sort(key=lambda item: item[:2], reverse=True)
+        return [entry for _, _, entry in heap]
+
+
+def _push_bounded(heap: list, item: tuple, k: int) -> None:
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, item)
+
+
+def _iter_transposed(level2: dict, offset: int = 0, limit: int | None = None) -> Iterator[dict]:
+    """Transpose collated arrays into items, one at a time.
+
+    {"names": [a,b], "lengths": [1,2]} -> {"names": a, "lengths": 1}, ...
+    Only the item being yielded is materialized, never the whole list.
+    """
+    keys = list(level2.keys())
+    if not keys:
+        return
+    columns = [level2[k] for k in keys]
+    stop = len(columns[0])
+    if limit is not None:
+        stop = min(stop, offset + limit)
+    for i in range(offset, stop):
+        yield {k: column[i] for k, column in zip(keys, columns)}
+
+
 class RefgetStoreBackend:
     """SeqColBackend backed by a RefgetStore (no database)."""
 
@@ -89,6 +282,10 @@ class RefgetStoreBackend:
                 (lazy-loading relies on a mutable borrow).
         """
         self._store = store
+        # Namespaces this backend's entries in the process-wide caches.
+        self._cache_token = object()
+        # Requests per collection digest, for the hot-key manifest.
+        self._hits: Counter = Counter()
 
     def get_collection(self, digest: str, level: int = 2) -> dict:
         try:
@@ -100,8 +297,43 @@ class RefgetStoreBackend:
             raise ValueError(f"Collection '{digest}' not found")
         if result is None:
             raise ValueError(f"Collection '{digest}' not found")
+        self._hits[digest] += 1
         return result
 
+    def discard_cached(self) -> None:
+        """Drop this backend's entries from the process-wide caches.
+
+        Cached similarity rankings hold a reference to the backend, and so to
+        its store; the freshness middleware calls this as soon as the backend
+        is replaced, so they do not keep it resident.
+        """
+        SIMILARITY_CACHE.discard_namespace(self._cache_token)
+        LEVEL2_CACHE.discard_namespace(self._cache_token)
+
+    def close(self) -> None:
+        """Release the store and this backend's cache entries.
+
+        Called by the freshness middleware once a replaced backend has no
+        requests left in flight; the backend must not be used afterwards.
+        """
+        self.discard_cached()
+        self._store = None
+
+    def hot_digests(self, n: int) -> list[str]:
+        """The ``n`` most requested collection digests, most requested first."""
+        return [digest for digest, _ in self._hits.most_common(n)]
+
+    def prewarm(self, digest: str) -> bool:
+        """Load a collection's comparison and similarity inputs into the cache.
+
+        Returns False if the collection is not in the store.
+        """
+        try:
+            self._level2_entry(digest)
+        except ValueError:
+            return False
+        return True
+
     def get_collection_attribute(self, digest: str, attribute: str) -> list:
         level2 = self.get_collection(digest, level=2)
         if attribute not in level2:
@@ -109,13 +341,13 @@ class RefgetStoreBackend:
         return level2[attribute]
 
     def get_collection_itemwise(self, digest: str, limit: int | None = None) -> list[dict]:
+        return list(self.iter_collection_itemwise(digest, limit=limit or None))
+
+    def iter_collection_itemwise(
+        self, digest: str, offset: int = 0, limit: int | None = None
+    ) -> Iterator[dict]:
         level2 = self.get_collection(digest, level=2)
-        # Transpose: {"names": [a,b], "lengths": [1,2]} -> [{"names": a, "lengths": 1}, ...]
-        keys = list(level2.keys())
-        n = len(level2[keys[0]])
-        if limit:
-            n = min(n, limit)
-        return [{k: level2[k][i] for k in keys} for i in range(n)]
+        return _iter_transposed(level2, offset, limit)
 
     def get_attribute(self, attribute_name: str, attribute_digest: str) -> list:
         if attribute_name in DEFAULT_TRANSIENT_ATTRS:
@@ -134,30 +366,47 @@ class RefgetStoreBackend:
         sequences). For comparison, we need the derived attributes too. We get them
         from level 1 digests and resolve each via get_attribute.
         """
+        level2, derived = self._level2_entry(digest)
+        return {**level2, **derived}
+
+    def _level2_entry(self, digest: str) -> tuple[dict, dict]:
+        """Return ``(core level 2, derived attributes)``, cached in LEVEL2_CACHE.
+
+        Callers get the cached dicts themselves and must copy before mutating.
+        """
+        key = (self._cache_token, digest)
+        entry = LEVEL2_CACHE.get(key)
+        if entry is not None:
+            return entry
         try:
             level2 = self._store.get_collection_level2(digest)
         except (OSError, IOError):
             raise ValueError(f"Collection '{digest}' not found")
         if level2 is None:
             raise ValueError(f"Collection '{digest}' not found")
+        derived = {}
         try:
             level1 = self._store.get_collection_level1(digest)
         except (OSError, IOError):
-            return level2
+            level1 = {}
         # Add derived attributes that exist in level 1 but not level 2
         for attr in ["name_length_pairs", "sorted_sequences"]:
             if attr in level1 and attr not in level2:
                 try:
                     resolved = self._store.get_attribute(attr, level1[attr])
                     if resolved is not None:
-                        level2[attr] = resolved
+                        derived[attr] = resolved
                 except Exception:
                     pass
-        return level2
+        entry = (level2, derived)
+        n_items = len(level2.get("sequences") or [])
+        LEVEL2_CACHE.put(key, entry, cost=n_items * (len(level2) + len(derived)) + 1)
+        return entry
 
     def compare_digests(self, digest_a: str, digest_b: str) -> dict:
         level2_a = self._get_enriched_level2(digest_a)
         level2_b = self._get_enriched_level2(digest_b)
+        self._hits.update((digest_a, digest_b))
         return compare_seqcols(level2_a, level2_b)
 
     def compare_digest_with_level2(self, digest: str, level2_b: dict) -> dict:
@@ -167,6 +416,7 @@ class RefgetStoreBackend:
         enriched level2 for the stored collection and use the Python compare utility.
         """
         level2_a = self._get_enriched_level2(digest)
+        self._hits[digest] += 1
         return compare_seqcols(level2_a, level2_b)
 
     def list_collections(
@@ -199,12 +449,23 @@ class RefgetStoreBackend:
         page: int = 0,
         page_size: int = 50,
         target_digests: list[str] | None = None,
+        query_digest: str | None = None,
     ) -> dict:
         """Compute Jaccard similarities between a seqcol and collections in the store.
 
+        Only the top ``(page + 1) * page_size`` targets are ranked, and targets
+        whose size already caps their Jaccard below the current K-th score are
+        never scored. The partial ranking is cached per query for
+        ``SIMILARITY_CACHE_TTL`` seconds, so a request for the next page resumes
+        it rather than starting over. The reported total counts every target;
+        one that cannot be scored (e.g. a digest not in the store) is left out
+        of the ranking, so the last page may come up short.
+
         Args:
             target_digests: If provided, only compare against these digests.
                 If None, compares against all collections.
+            query_digest: Digest identifying ``seqcol``, used as the cache key.
+                Computed from ``seqcol`` when not given.
         """
         if target_digests:
             all_digests = list(dict.fromkeys(target_digests))  # deduplicate, preserve order
@@ -212,49 +473,74 @@ class RefgetStoreBackend:
             all_cols = self._store.list_collections(page=0, page_size=10000)
             all_digests = [c.digest if hasattr(c, "digest") else c for c in all_cols["results"]]
 
-        similarities = []
-        for digest in all_digests:
+        run = self._similarity_run(seqcol, all_digests, query_digest)
+        start = page * page_size
+        with run.lock:
+            ranked = run.top(start + page_size)
+
+        return {
+            "similarities": ranked[start : start + page_size],
+            "pagination": {"page": page, "page_size": page_size, "total": run.total},
+            "reference_digest": None,
+        }
+
+    def _similarity_run(
+        self, seqcol: dict, digests: list[str], query_digest: str | None
+    ) -> _SimilarityRun:
+        """Return the cached ranking for this query and target list, or start one."""
+        if query_digest is None:
             try:
-                level2 = self._store.get_collection_level2(digest)
-                if level2 is None:
-                    continue
-                jaccard = calc_jaccard_similarities(seqcol, level2)
-
-                # Reverse lookup: gtars returns list[tuple[str, str]] of
-                # (namespace, alias) pairs pointing to this collection digest.
-                # We surface bare alias names; the namespace is available if a
-                # richer (namespace-qualified) display is ever wanted.
-                # A collection with no aliases is normal and yields [].
-                try:
-                    alias_pairs = self._store.get_aliases_for_collection(digest)
-                    human_readable_names = [alias for (_namespace, alias) in alias_pairs]
-                except Exception:
-                    human_readable_names = []
-
-                similarities.append(
-                    {
-                        "digest": digest,
-                        "human_readable_names": human_readable_names,
-                        "similarities": jaccard,
-                    }
+                # Digest every attribute, not just the inherent ones: two POSTed
+                # dicts that differ only in, say, lengths must not share a ranking.
+                query_digest = seqcol_digest(
+                    {k: v for k, v in seqcol.items() if k != "human_readable_names"},
+                    inherent_attrs=None,
                 )
             except Exception:
-                continue
+                query_digest = None
+        key = (self._cache_token, query_digest, tuple(digests)) if query_digest else None
+        if key is not None:
+            run = SIMILARITY_CACHE.get(key)
+            if run is not None:
+                return run
+
+        query_sizes = [len(v) for v in seqcol.values() if isinstance(v, list)]
+        candidates = []
+        for position, digest in enumerate(digests):
+            try:
+                n_sequences = self._store.get_collection_metadata(digest).n_sequences
+            except Exception:
+                n_sequences = None
+            candidates.append((_jaccard_upper_bound(query_sizes, n_sequences), position, digest))
+        run = _SimilarityRun(candidates, lambda digest: self._similarity_entry(seqcol, digest))
 
-        # Sort by max similarity descending
-        similarities.sort(
-            key=lambda s: max(s["similarities"].values()) if s["similarities"] else 0,
-            reverse=True,
-        )
+        if key is not None:
+            SIMILARITY_CACHE.put(key, run, cost=len(candidates) + 1)
+        return run
 
-        total = len(similarities)
-        start = page * page_size
-        paged = similarities[start : start + page_size]
+    def _similarity_entry(self, seqcol: dict, digest: str) -> dict | None:
+        """Score one target. Returns None if it cannot be scored."""
+        try:
+            level2, _derived = self._level2_entry(digest)
+            jaccard = calc_jaccard_similarities(seqcol, dict(level2))
+        except Exception:
+            return None
+
+        # Reverse lookup: gtars returns list[tuple[str, str]] of
+        # (namespace, alias) pairs pointing to this collection digest.
+        # We surface bare alias names; the namespace is available if a
+        # richer (namespace-qualified) display is ever wanted.
+        # A collection with no aliases is normal and yields [].
+        try:
+            alias_pairs = self._store.get_aliases_for_collection(digest)
+            human_readable_names = [alias for (_namespace, alias) in alias_pairs]
+        except Exception:
+            human_readable_names = []
 
         return {
-            "similarities": paged,
-            "pagination": {"page": page, "page_size": page_size, "total": total},
-            "reference_digest": None,
+            "digest": digest,
+            "human_readable_names": human_readable_names,
+            "similarities": jaccard,
         }
 
     def collection_count(self) -> int:
@@ -338,3 +624,106 @@ class RefgetStoreBackend:
             "sequence_alias_namespaces": self._store.list_sequence_alias_namespaces(),
             "fhr_metadata_collections": self._store.list_fhr_metadata(),
         }
+
+
+class StoreSequenceAgent:
+    """Sequence reads from a RefgetStore, with the interface of ``RefgetDBAgent.seq``.
+
+    Ranges follow the database agent: 0-based and end-exclusive, with a range
+    past the end of the sequence cut short rather than rejected.
+    """
+
+    # Bases extracted per store call while streaming
+    STREAM_CHUNK_SIZE = 1 << 20
+
+    def __init__(self, store):
+        self._store = store
+
+    def _length(self, digest: str) -> int:
+        try:
+            metadata = self._store.get_sequence_metadata(digest)
+        except (KeyError, OSError, IOError):
+            metadata = None
+        if metadata is None:
+            raise ValueError(f"Sequence with digest '{digest}' not found")
+        return metadata.length
+
+    def stream(
+        self, digest: str, start: int | None = None, end: int | None = None
+    ) -> Iterator[str]:
+        """Yield a sequence, or a range of it, ``STREAM_CHUNK_SIZE`` bases at a time.
+
+        Raises ValueError if not found -- eagerly, before the first chunk.
+        """
+        length = self._length(digest)
+        start = 0 if start is None else start
+        end = length if end is None else min(end, length)
+        # Plain substring calls rather than the store's own sequence stream,
+        # which must be consumed on the thread that created it: a streaming
+        # response iterates on whichever worker thread is free.
+        return (
+            self._store.get_substring(digest, offset, min(offset + self.STREAM_CHUNK_SIZE, end))
+            for offset in range(start, end, self.STREAM_CHUNK_SIZE)
+        )
+
+    def get(self, digest: str, start: int | None = None, end: int | None = None) -> str:
+        """Get a sequence, or its ``[start, end)`` range (0-based, end exclusive)."""
+        if (start is None) != (end is None):
+            raise ValueError("Both start and end must be provided if either is provided.")
+        return "".join(self.stream(digest, start, end))
+
+
+class HybridBackend:
+    """SeqColBackend with metadata in a database and sequence bytes in a RefgetStore.
+
+    Collections, attributes, comparisons, similarities, pangenomes, DRS objects
+    and human-readable names are served by a ``RefgetDBAgent``; sequences,
+    substrings and regions by the store, from its encoded sequence files. The
+    database then needs no sequence rows at all, which keeps it small and fast
+    to back up. Anything not defined here is the database agent's, so the
+    hybrid also stands in for it on the database-only endpoints.
+    """
+
+    def __init__(self, dbagent, store):
+        """
+        Args:
+            dbagent: A RefgetDBAgent (or another database backend) for metadata
+            store: A ReadonlyRefgetStore holding the sequences; see RefgetStoreBackend
+        """
+        self.dbagent = dbagent
+        self.store_backend = RefgetStoreBackend(store)
+        self.seq = StoreSequenceAgent(store)
+
+    def __getattr__(self, name):
+        # Only reached for names not found on the hybrid itself.
+        if name in ("dbagent", "store_backend", "seq"):
+            raise AttributeError(name)
+        return getattr(self.dbagent, name)
+
+    def substrings_from_regions(self, digest: str, regions: list[dict]) -> list[dict]:
+        # Names are resolved in the database, so this also works on a
+        # ReadonlyRefgetStore, which has no region extraction of its own.
+        level2 = self.dbagent.get_collection(digest)
+        sequences = dict(zip(level2["names"], level2["sequences"]))
+        results = []
+        for r in regions:
+            if r["chrom"] not in sequences:
+                raise ValueError(f"No sequence named '{r['chrom']}' in collection '{digest}'")
+            results.append(
+                {
+                    "chrom_name": r["chrom"],
+                    "start": r["start"],
+                    "end": r["end"],
+                    "sequence": self.seq.get(sequences[r["chrom"]], r["start"], r["end"]),
+                }
+            )
+        return results
+
+    def capabilities(self) -> dict:
+        store = self.store_backend.capabilities()
+        return {
+            **self.dbagent.capabilities(),
+            "backend_type": "hybrid",
+            "n_sequences": store["n_sequences"],
+            "has_sequence_data": store["has_sequence_data"],
+        }
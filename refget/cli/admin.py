@@ -8,6 +8,8 @@ Commands:
     load     - Load seqcol metadata to database
     register - Upload FASTA to cloud and create DRS record
     ingest   - Load metadata + register FASTA (combined)
+    bulk-load - Populate a fresh database from a store or seqcol JSON files
+    chunk-sequences - Split legacy whole-text sequences into blocks
     status   - Show admin/db connection status
     info     - Show system info (version, etc.)
 """
@@ -211,10 +213,15 @@ def _add_fasta_pep_to_db(
     storage: Optional[List[Dict[str, Any]]] = None,
     skip_upload: bool = False,
     force_upload: bool = False,
+    jobs: int = 1,
 ) -> Dict[str, str]:
     """
     Add FASTA files from a PEP to the database.
 
+    The FASTA files are digested by ``jobs`` processes and written in batches
+    (see ``SequenceCollectionAgent.add_from_fasta_files``); uploads and
+    registration then follow, one file at a time, in PEP order.
+
     Args:
         pep: peppy.Project object
         fa_root: Root directory containing the FASTA files
@@ -222,17 +229,23 @@ def _add_fasta_pep_to_db(
         storage: Optional list of storage locations for upload/registration
         skip_upload: If True, don't upload files - just register URLs
         force_upload: If True, re-upload files even if they already exist
+        jobs: Number of processes digesting FASTA files
 
     Returns:
         dict: Mapping of FASTA filenames to seqcol digests
     """
     results = {}
-    total = len(pep.samples)
-    for i, s in enumerate(pep.samples, 1):
+    samples = list(pep.samples)
+    total = len(samples)
+    print(f"Adding {total} FASTA files ({jobs} digest job{'s' if jobs != 1 else ''})...")
+    digests = dbagent.seqcol.add_from_fasta_files(
+        [os.path.join(fa_root, s.fasta) for s in samples],
+        [getattr(s, "sample_name", None) for s in samples],
+        jobs=jobs,
+    )
+    for i, (s, digest) in enumerate(zip(samples, digests), 1):
         fa_path = os.path.join(fa_root, s.fasta)
-        name = getattr(s, "sample_name", None)
-        print(f"[{i}/{total}] Adding {s.fasta}...")
-        digest = _add_fasta_to_db(fa_path, dbagent, name=name)
+        print(f"[{i}/{total}] {s.fasta}")
 
         if storage:
             filename = os.path.basename(fa_path)
@@ -325,6 +338,13 @@ def load(
         "-n",
         help="Human-readable name for the FASTA",
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Processes digesting FASTA files in parallel (used with --pep/--pephub)",
+    ),
 ) -> None:
     """
     Load seqcol metadata from FASTA or JSON into PostgreSQL.
@@ -343,6 +363,7 @@ def load(
         refget admin load genome.fa --name "Human GRCh38"
         refget admin load genome.seqcol.json
         refget admin load --pep genomes.yaml --fa-root /data/fasta
+        refget admin load --pep genomes.yaml --fa-root /data/fasta --jobs 8
         refget admin load --pephub nsheff/human_fasta_ref --fa-root /data/fasta
     """
     # Validate arguments
@@ -399,7 +420,7 @@ def load(
                 print_error("Failed to load PEP project", EXIT_FAILURE)
                 return
 
-            results = _add_fasta_pep_to_db(project, str(fa_root), dbagent)
+            results = _add_fasta_pep_to_db(project, str(fa_root), dbagent, jobs=jobs)
             print_success(f"Loaded {len(results)} sequence collections")
             print_json(results)
         except ImportError as e:
@@ -555,6 +576,13 @@ def ingest(
         "-n",
         help="Human-readable name for the FASTA",
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Processes digesting FASTA files in parallel (used with --pep/--pephub)",
+    ),
 ) -> None:
     """
     Load seqcol metadata and register FASTA with cloud storage.
@@ -649,6 +677,7 @@ def ingest(
                 str(fa_root),
                 dbagent,
                 storage=storage,
+                jobs=jobs,
             )
             print_success(f"Ingested {len(results)} sequence collections")
             print_json(results)
@@ -661,6 +690,157 @@ def ingest(
             print_error(f"Failed to ingest from PEP: {e}", EXIT_FAILURE)
 
 
+def _iter_bulk_seqcol_dicts(source: Path):
+    """
+    Yield the level 2 seqcol dicts of a RefgetStore or of .seqcol.json files.
+
+    Args:
+        source: A RefgetStore directory, a directory searched recursively for
+            ``*.seqcol.json`` files, or one such file
+    """
+    if source.is_file():
+        paths = [source]
+    else:
+        from refget.store import RefgetStore
+
+        if RefgetStore.store_exists(str(source)):
+            store = RefgetStore.open_local(str(source))
+            store.set_quiet(True)
+            page = 0
+            while True:
+                result = store.list_collections(page=page, page_size=1000)
+                for metadata in result["results"]:
+                    yield store.get_collection_level2(metadata.digest)
+                if (page + 1) * 1000 >= result["pagination"]["total"]:
+                    return
+                page += 1
+        paths = sorted(source.rglob("*.seqcol.json"))
+    for path in paths:
+        with open(path, "r") as f:
+            yield json.load(f)
+
+
+@app.command("bulk-load")
+def bulk_load(
+    source: Path = typer.Argument(
+        ...,
+        help="RefgetStore directory, or directory of .seqcol.json files",
+    ),
+    batch_size: int = typer.Option(
+        10_000, "--batch-size", min=1, help="Collections loaded per transaction"
+    ),
+) -> None:
+    """
+    Populate a fresh database from a RefgetStore or .seqcol.json files.
+
+    Digests are computed exactly as `load` computes them, but rows are
+    deduplicated in memory and loaded with PostgreSQL COPY through staging
+    tables, which is much faster than loading collections one by one.
+    Collections already in the database are left as they are.
+
+    Examples:
+        refget admin bulk-load /data/refget_store
+        refget admin bulk-load /data/seqcols --batch-size 50000
+    """
+    if not source.exists():
+        print_error(f"Not found: {source}", EXIT_FILE_NOT_FOUND)
+        return
+
+    dbagent = _get_dbagent()
+    if dbagent is None:
+        return
+
+    from refget.models import SequenceCollection
+
+    seqcols = (
+        SequenceCollection.from_dict(seqcol_dict, dbagent.inherent_attrs)
+        for seqcol_dict in _iter_bulk_seqcol_dicts(source)
+    )
+    try:
+        digests = dbagent.seqcol.bulk_load(seqcols, batch_size=batch_size)
+    except Exception as e:
+        print_error(f"Bulk load failed: {e}", EXIT_FAILURE)
+        return
+    print_success(f"Loaded {len(set(digests))} sequence collections")
+
+
+@app.command("chunk-sequences")
+def chunk_sequences(
+    batch_size: int = typer.Option(
+        100, "--batch-size", help="Sequences converted per transaction"
+    ),
+) -> None:
+    """
+    Split sequences stored as one text value into fixed-size blocks.
+
+    Sequences loaded before chunked storage keep their full text in one
+    column, so every range read detoasts the whole sequence. This rewrites
+    them as blocks; it is safe to re-run and to interrupt.
+
+    Example:
+        refget admin chunk-sequences
+    """
+    dbagent = _get_dbagent()
+    if not dbagent:
+        return
+    converted = dbagent.seq.chunk_legacy(batch_size=batch_size)
+    print_success(f"Chunked {converted} sequences")
+
+
+@app.command("backfill-members")
+def backfill_members(
+    batch_size: int = typer.Option(
+        100, "--batch-size", help="Collections backfilled per transaction"
+    ),
+) -> None:
+    """
+    Fill the collection-membership table for collections loaded before it.
+
+    Collections added now get their membership rows (one per sequence) on
+    ingest; those loaded earlier have none, and so are invisible to the
+    containment and similarity queries. Safe to re-run and to interrupt.
+
+    Example:
+        refget admin backfill-members
+    """
+    dbagent = _get_dbagent()
+    if not dbagent:
+        return
+    backfilled = dbagent.seqcol.backfill_members(batch_size=batch_size)
+    print_success(f"Backfilled {backfilled} collections")
+
+
+@app.command()
+def migrate(
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="List the missing indexes without creating them"
+    ),
+) -> None:
+    """
+    Bring an existing database's indexes up to date.
+
+    New tables are created on connect, but indexes declared on tables that
+    already exist are not. This creates the missing ones (concurrently on
+    PostgreSQL, so the server keeps serving) and is safe to re-run.
+
+    Example:
+        refget admin migrate --dry-run
+    """
+    dbagent = _get_dbagent()
+    if not dbagent:
+        return
+    indexes = dbagent.migrate(dry_run=dry_run)
+    if not indexes:
+        print_success("Database indexes are up to date")
+        return
+    for name in indexes:
+        print(f"  {name}")
+    if dry_run:
+        print_info(f"{len(indexes)} indexes missing")
+    else:
+        print_success(f"Created {len(indexes)} indexes")
+
+
 @app.command()
 def status() -> None:
     """
@@ -32,6 +32,13 @@ DEFAULTS = {
         {"url": "https://seqcolapi.databio.org", "name": "databio"},
     ],
     "sequence_servers": [],
+    # No "path": unset, the cache follows $XDG_CACHE_HOME (see default_cache_dir).
+    "cache": {
+        "enabled": True,
+        "max_size_mb": 512,
+        "ttl_seconds": 300,
+        "offline": False,
+    },
     "admin": {
         "postgres_host": "localhost",
         "postgres_port": "5432",
@@ -48,6 +55,8 @@ ENV_VAR_MAPPINGS = {
     "REFGET_STORE_URL": "remote_stores",  # Single URL override
     "REFGET_SEQCOL_URL": "seqcol_servers",  # Single URL override
     "REFGET_SEQUENCE_URL": "sequence_servers",  # Single URL override
+    "REFGET_CACHE_DIR": ("cache", "path"),
+    "REFGET_OFFLINE": ("cache", "offline"),
     "POSTGRES_HOST": ("admin", "postgres_host"),
     "POSTGRES_PORT": ("admin", "postgres_port"),
     "POSTGRES_DB": ("admin", "postgres_db"),
@@ -232,6 +241,36 @@ def get_sequence_servers(config: Optional[Dict[str, Any]] = None) -> List[Dict[s
     return config.get("sequence_servers", DEFAULTS["sequence_servers"])
 
 
+def get_client_cache(config: Optional[Dict[str, Any]] = None):
+    """
+    Get the on-disk API response cache the seqcol commands use.
+
+    Args:
+        config: Optional config dict; if None, loads from file.
+
+    Returns:
+        A ClientCache, or None if caching is disabled and not offline.
+    """
+    from refget.client_cache import ClientCache
+
+    if config is None:
+        config = load_config()
+    settings = {**DEFAULTS["cache"], **config.get("cache", {})}
+    # Values set from the environment arrive as strings.
+    settings = {
+        key: _coerce_value(value) if isinstance(value, str) and key != "path" else value
+        for key, value in settings.items()
+    }
+    if not settings["enabled"] and not settings["offline"]:
+        return None
+    return ClientCache(
+        settings.get("path"),
+        max_bytes=int(settings["max_size_mb"]) * 1024 * 1024,
+        ttl=settings["ttl_seconds"],
+        offline=bool(settings["offline"]),
+    )
+
+
 def get_admin_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
     """
     Get the admin/database configuration.
@@ -19,7 +19,12 @@ from typing import Optional
 
 import typer
 
-from refget.cli.config_manager import get_seqcol_servers, get_store_path
+from refget.cli.config_manager import (
+    get_client_cache,
+    get_seqcol_servers,
+    get_store_path,
+    load_config,
+)
 from refget.cli.output import (
     EXIT_FAILURE,
     EXIT_NETWORK_ERROR,
@@ -39,6 +44,9 @@ def _get_client(server_override: Optional[str] = None):
     """
     Get a SequenceCollectionClient configured with the appropriate server URL.
 
+    Responses are cached on disk (see the ``cache`` config section); with
+    REFGET_OFFLINE=1 the client answers from the cache only.
+
     Args:
         server_override: Optional server URL to use instead of config
 
@@ -47,12 +55,13 @@ def _get_client(server_override: Optional[str] = None):
     """
     from refget.clients import SequenceCollectionClient
 
+    config = load_config()
     if server_override:
         urls = [server_override]
     else:
-        servers = get_seqcol_servers()
+        servers = get_seqcol_servers(config)
         urls = [s["url"] for s in servers]
-    return SequenceCollectionClient(urls=urls, raise_errors=False)
+    return SequenceCollectionClient(urls=urls, raise_errors=False, cache=get_client_cache(config))
 
 
 def _collection_to_seqcol_dict(store, digest: str, level: int = 2) -> Optional[dict]:
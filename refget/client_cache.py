@@ -0,0 +1,213 @@
+"""On-disk cache of sequence collection API responses.
+
+Collections, attributes and comparisons of server-hosted collections are
+named by digest, so a response for one never changes; :class:`ClientCache`
+keeps them with no expiry, and shares them across servers -- the digest, not
+the mirror, identifies the content. Everything else a client reads (service
+info, lists, aliases, FHR metadata) can change, so it is kept per server for
+``ttl`` seconds.
+
+Entries are small JSON files under ``~/.cache/refget`` (or
+``$REFGET_CACHE_DIR``, or ``$XDG_CACHE_HOME/refget``), named by a hash of the
+request. Each is written to a temporary file and renamed into place, so
+concurrent processes sharing the directory never read a partial entry. A read
+bumps the file's mtime, and when the directory outgrows ``max_bytes`` the
+least recently used entries are deleted. In ``offline`` mode the cache
+answers from whatever it holds, expired or not, and never touches the network.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Size cap of the cache directory
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds a response that can change (service-info, lists, ...) stays fresh
+DEFAULT_TTL = 300
+
+# Eviction deletes down to this fraction of max_bytes, so it does not run
+# again on the very next write.
+EVICT_TO = 0.8
+
+# GET endpoints whose response is fixed by the digests in the path
+IMMUTABLE_ENDPOINT = re.compile(
+    r"^/(collection/[^/?]+(\?level=\d+)?"
+    r"|attribute/collection/[^/?]+/[^/?]+"
+    r"|comparison/[^/?]+/[^/?]+)$"
+)
+
+
+def default_cache_dir() -> Path:
+    """$REFGET_CACHE_DIR, else $XDG_CACHE_HOME/refget, else ~/.cache/refget"""
+    if os.environ.get("REFGET_CACHE_DIR"):
+        return Path(os.environ["REFGET_CACHE_DIR"]).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".cache") / "refget"
+
+
+def is_immutable(endpoint: str) -> bool:
+    return IMMUTABLE_ENDPOINT.match(endpoint) is not None
+
+
+class ClientCache:
+    """
+    A directory of cached API responses, shared by clients and processes
+
+    Args:
+        path: Cache directory (default: :func:`default_cache_dir`)
+        max_bytes: Evict least recently used entries above this size
+        ttl: Seconds responses that can change stay fresh (0: never cache them)
+        offline: Answer only from the cache, including expired entries
+    """
+
+    def __init__(
+        self,
+        path: Optional[str | Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+        offline: bool = False,
+    ) -> None:
+        self.path = Path(path).expanduser() if path else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        # Bytes in the directory, as last counted plus this process's writes
+        self._size: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"ClientCache({str(self.path)!r}, max_bytes={self.max_bytes}, offline={self.offline})"
+        )
+
+    def _entry(self, endpoint: str, params: Optional[dict], urls: List[str]) -> Path:
+        key = endpoint
+        if params:
+            key += "?" + json.dumps(params, sort_keys=True)
+        if not is_immutable(endpoint):
+            # Mutable responses belong to the servers that gave them.
+            key = " ".join(urls) + " " + key
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return self.path / name[:2] / f"{name}.json"
+
+    def get(self, endpoint: str, params: Optional[dict] = None, urls: List[str] = ()) -> Any:
+        """
+        The cached response for a GET request, or None
+
+        Args:
+            endpoint: Path and query string below the base URL
+            params: Query parameters sent separately
+            urls: Base URLs the client tries; part of the key of mutable responses
+        """
+        path = self._entry(endpoint, params, urls)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            _LOGGER.debug(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        expires = entry.get("expires")
+        if expires is not None and expires < time.time() and not self.offline:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another process meanwhile; the entry is still good
+        return entry["value"]
+
+    def put(
+        self, endpoint: str, value: Any, params: Optional[dict] = None, urls: List[str] = ()
+    ) -> None:
+        """Store the response to a GET request"""
+        immutable = is_immutable(endpoint)
+        if value is None or (not immutable and self.ttl <= 0):
+            return
+        entry = {
+            "endpoint": endpoint,
+            "expires": None if immutable else time.time() + self.ttl,
+            "value": value,
+        }
+        path = self._entry(endpoint, params, urls)
+        data = json.dumps(entry).encode()
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temporary name: other processes may be writing the same entry.
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _LOGGER.warning(f"Could not write cache entry {path}: {e}")
+            if tmp_path is not None:
+                self._remove(tmp_path)
+            return
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries = []
+        if not self.path.is_dir():
+            return entries
+        for shard in os.scandir(self.path):
+            if shard.is_dir():
+                entries.extend(e for e in os.scandir(shard) if e.name.endswith(".json"))
+        return entries
+
+    @staticmethod
+    def _remove(path) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def size(self) -> int:
+        """Bytes of cached responses on disk"""
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits well under max_bytes"""
+        stats = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in stats)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in sorted(stats):
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        """Delete every cached response"""
+        for entry in self._entries():
+            self._remove(entry.path)
+        self._size = 0
@@ -1,24 +1,257 @@
 from __future__ import annotations
 
+import hashlib
+import inspect
+import json
 import logging
+import math
+import os
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import TYPE_CHECKING, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ._version import __version__
 
 if TYPE_CHECKING:
+    from .client_cache import ClientCache
     from .store import RefgetStore
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds to wait for a connection, and for each read from a response
+DEFAULT_TIMEOUT = (5, 60)
+
+# Retries of an idempotent request to one URL before moving to the next
+DEFAULT_RETRIES = 3
+
+# Retry delays are BACKOFF_FACTOR * 2 ** (retry - 1) seconds, capped at
+# BACKOFF_MAX, plus up to BACKOFF_JITTER seconds of random jitter so that
+# clients that failed together do not retry in lockstep. A Retry-After header
+# on a 429 or 503 takes precedence.
+BACKOFF_FACTOR = 0.5
+BACKOFF_MAX = 30
+BACKOFF_JITTER = 0.5
+
+# Responses worth retrying: rate limiting and transient server/gateway errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Connections kept alive per host
+POOL_MAXSIZE = 10
+
+# Seconds before a mirror that failed, or has not been tried lately, is
+# tried first again to re-measure it
+MIRROR_REPROBE_INTERVAL = 60
+
+# Weight of the newest sample in a mirror's moving-average latency
+LATENCY_SMOOTHING = 0.3
+
+# Recent latencies kept per mirror, and how many a hedge delay needs
+LATENCY_WINDOW = 50
+HEDGE_MIN_SAMPLES = 5
+
+# A hedged request fires the next mirror once the one in flight has taken
+# longer than this quantile of its recent latencies.
+HEDGE_QUANTILE = 0.95
+
+# Bytes per Range request of a FASTA download, and connections it uses
+DOWNLOAD_PART_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CONNECTIONS = 4
+
+# hashlib names of the DRS checksum types a download verifies
+DOWNLOAD_CHECKSUMS = {"sha-256": "sha256", "sha256": "sha256", "md5": "md5"}
+
+
+def make_session(retries: int = DEFAULT_RETRIES, pool_maxsize: int = POOL_MAXSIZE):
+    """
+    A requests Session with pooled keep-alive connections and retries
+
+    Only idempotent methods (GET, HEAD, PUT, DELETE, OPTIONS, TRACE) are
+    retried, on connection errors and on the statuses in RETRY_STATUSES, with
+    exponential backoff and jitter; ``Retry-After`` is honoured.
+
+    Args:
+        retries: Retries per request (0 disables retrying)
+        pool_maxsize: Connections kept alive per host
+
+    Returns:
+        (requests.Session): The session
+    """
+    retry_args = {
+        "total": retries,
+        "backoff_factor": BACKOFF_FACTOR,
+        "status_forcelist": RETRY_STATUSES,
+        "respect_retry_after_header": True,
+        # Hand back the last response, so it fails over to the next URL.
+        "raise_on_status": False,
+    }
+    # backoff_max and backoff_jitter need urllib3 2; 1.26 caps backoff at 120 s
+    # and has no jitter.
+    parameters = inspect.signature(Retry).parameters
+    if "backoff_max" in parameters:
+        retry_args["backoff_max"] = BACKOFF_MAX
+    if "backoff_jitter" in parameters:
+        retry_args["backoff_jitter"] = BACKOFF_JITTER
+    adapter = HTTPAdapter(
+        pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=Retry(**retry_args)
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = f"refget/{__version__}"
+    return session
+
+
+class Mirror:
+    """One base URL, and how requests to it have gone"""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.healthy = True
+        self.latency: Optional[float] = None
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.tried_at: Optional[float] = None
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """The HEDGE_QUANTILE of recent latencies; None until there are enough"""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(HEDGE_QUANTILE * len(ordered)) - 1)]
+
+    def __repr__(self) -> str:
+        return f"Mirror({self.url!r}, healthy={self.healthy}, latency={self.latency})"
+
+
+class MirrorSet:
+    """
+    The base URLs of a client, ordered by how well they have been answering
+
+    Healthy mirrors are tried fastest first, by moving-average latency, and
+    mirrors whose last request failed are tried last. So that the order
+    follows the servers, one mirror per call is re-probed -- tried first --
+    when it has not been tried for ``reprobe_interval`` seconds: one never
+    measured, one that failed, or a healthy one the faster mirrors have kept
+    idle. Until every mirror is measured, the configured order decides.
+
+    Args:
+        urls: Base URLs, in the order to try them before any are measured
+        reprobe_interval: Seconds before an idle or failed mirror is re-probed
+    """
+
+    def __init__(self, urls: list[str], reprobe_interval: float = MIRROR_REPROBE_INTERVAL):
+        self.mirrors = {url: Mirror(url) for url in urls}
+        self.reprobe_interval = reprobe_interval
+        self._lock = threading.Lock()
+
+    def ordered(self) -> list[Mirror]:
+        """The mirrors, in the order to try them for the next request"""
+        now = time.monotonic()
+        with self._lock:
+            mirrors = list(self.mirrors.values())
+            probe = next(
+                (
+                    m
+                    for m in mirrors
+                    if m.tried_at is None or now - m.tried_at >= self.reprobe_interval
+                ),
+                None,
+            )
+            if probe is not None:
+                # Claimed under the lock, so concurrent calls do not all probe it.
+                probe.tried_at = now
+            rest = sorted(
+                (m for m in mirrors if m is not probe),
+                key=lambda m: (not m.healthy, m.latency or 0.0),
+            )
+        return [probe] + rest if probe is not None else rest
+
+    def record_success(self, url: str, seconds: float) -> None:
+        with self._lock:
+            mirror = self.mirrors[url]
+            mirror.healthy = True
+            mirror.tried_at = time.monotonic()
+            mirror.record_latency(seconds)
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            mirror = self.mirrors[url]
+            if mirror.healthy:
+                _LOGGER.debug(f"Mirror {url} failed; trying it last until re-probed")
+            mirror.healthy = False
+            mirror.tried_at = time.monotonic()
+
 
 # Abstract class
 class RefgetClient(object):
     """
     A generic abstract class, for any features used by any subclass of refget client.
+
+    Every client sends its requests through one ``requests.Session`` (see
+    :func:`make_session`), so connections to a server are reused across calls.
+    A client with a ``cache`` (see :class:`refget.client_cache.ClientCache`)
+    answers GET requests from it when it can.
     """
 
     urls: list[str]
+    session: requests.Session
+    timeout: float | tuple[float, float] | None
+    mirrors: MirrorSet
+    hedge: bool = False
+    cache: Optional["ClientCache"] = None
+
+    def _configure_http(
+        self,
+        session: Optional[requests.Session],
+        timeout: float | tuple[float, float] | None,
+        retries: int,
+        hedge: bool = False,
+    ) -> None:
+        self.session = session if session is not None else make_session(retries)
+        self.timeout = timeout
+        self.mirrors = MirrorSet(self.urls)
+        self.hedge = hedge
+
+    def _http_kwargs(self) -> dict:
+        return {
+            "session": self.session,
+            "timeout": self.timeout,
+            "mirrors": self.mirrors,
+            "hedge": self.hedge,
+        }
+
+    def _try_urls(self, endpoint: str, **kwargs) -> Optional[dict | str]:
+        """_try_urls over this client's URLs, mirror order, session and timeout, via the cache"""
+        cache = self.cache
+        if cache is None or kwargs.get("method", "GET").upper() != "GET":
+            return _try_urls(self.urls, endpoint, **self._http_kwargs(), **kwargs)
+        params = kwargs.get("params")
+        result = cache.get(endpoint, params, self.urls)
+        if result is not None:
+            _LOGGER.debug(f"Cache hit for {endpoint}")
+            return result
+        if cache.offline:
+            error_message = f"Offline, and {endpoint} is not in the cache at {cache.path}"
+            if kwargs.get("raise_errors", True):
+                raise ConnectionError(error_message)
+            _LOGGER.error(error_message)
+            return None
+        result = _try_urls(self.urls, endpoint, **self._http_kwargs(), **kwargs)
+        cache.put(endpoint, result, params, self.urls)
+        return result
 
     def __repr__(self) -> str:
         service_info = self.service_info()
@@ -40,7 +273,7 @@ class RefgetClient(object):
         # Sequences uses /service-info under `/sequences`, which should be changed, but for now...
         if self.__class__.__name__ == "SequenceClient":
             endpoint = "/sequence/service-info"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
 
 class SequenceClient(RefgetClient):
@@ -52,6 +285,10 @@ class SequenceClient(RefgetClient):
         self,
         urls: list[str] = ["https://www.ebi.ac.uk/ena/cram"],
         raise_errors: Optional[bool] = None,
+        session: Optional[requests.Session] = None,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        hedge: bool = False,
     ) -> None:
         """
         Initializes the sequences client.
@@ -59,6 +296,12 @@ class SequenceClient(RefgetClient):
         Args:
             urls (list, optional): A list of base URLs of the sequences API. Defaults to ["https://www.ebi.ac.uk/ena/cram/sequence/"].
             raise_errors (bool, optional): Whether to raise errors or log them. Defaults to None, which will guess.
+            session (requests.Session, optional): Session to send requests through.
+                Defaults to a new one from make_session(retries).
+            timeout (float | tuple, optional): Connect and read timeouts in seconds.
+            retries (int, optional): Retries of an idempotent request to one URL.
+            hedge (bool, optional): Send a GET to the next mirror too when the first is
+                slower than its usual (95th percentile) latency; the first answer wins.
         Attributes:
             urls (list): The list of base URLs of the sequences API.
         """
@@ -68,6 +311,7 @@ class SequenceClient(RefgetClient):
         if raise_errors is None:
             raise_errors = __name__ == "__main__"
         self.raise_errors = raise_errors
+        self._configure_http(session, timeout, retries, hedge)
 
     def get_sequence(
         self, digest: str, start: Optional[int] = None, end: Optional[int] = None
@@ -88,7 +332,7 @@ class SequenceClient(RefgetClient):
             query_params["end"] = end
 
         endpoint = f"/sequence/{digest}"
-        return _try_urls(self.urls, endpoint, params=query_params, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, params=query_params, raise_errors=self.raise_errors)
 
     def get_metadata(self, digest: str) -> Optional[dict]:
         """
@@ -101,7 +345,7 @@ class SequenceClient(RefgetClient):
             (dict): The metadata.
         """
         endpoint = f"/sequence/{digest}/metadata"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
 
 class SequenceCollectionClient(RefgetClient):
@@ -113,12 +357,26 @@ class SequenceCollectionClient(RefgetClient):
         self,
         urls: list[str] = ["https://seqcolapi.databio.org"],
         raise_errors: Optional[bool] = None,
+        session: Optional[requests.Session] = None,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        hedge: bool = False,
+        cache: Optional["ClientCache"] = None,
     ) -> None:
         """
         Initializes the sequence collection client.
 
         Args:
             urls (list, optional): A list of base URLs of the sequence collection API. Defaults to ["https://seqcolapi.databio.org"].
+            raise_errors (bool, optional): Whether to raise errors or log them. Defaults to None, which will guess.
+            session (requests.Session, optional): Session to send requests through.
+                Defaults to a new one from make_session(retries).
+            timeout (float | tuple, optional): Connect and read timeouts in seconds.
+            retries (int, optional): Retries of an idempotent request to one URL.
+            hedge (bool, optional): Send a GET to the next mirror too when the first is
+                slower than its usual (95th percentile) latency; the first answer wins.
+            cache (ClientCache, optional): On-disk cache of responses, e.g.
+                ClientCache() for ~/.cache/refget. Defaults to None, no caching.
 
         Attributes:
             urls (list): The list of base URLs of the sequence collection API.
@@ -129,13 +387,21 @@ class SequenceCollectionClient(RefgetClient):
         if raise_errors is None:
             raise_errors = __name__ == "__main__"
         self.raise_errors = raise_errors
+        self._configure_http(session, timeout, retries, hedge)
+        self.cache = cache
         self._fasta_client = None
 
     def _get_fasta_helper(self) -> "FastaDrsClient":
         """Get or create the internal FASTA DRS helper."""
         if self._fasta_client is None:
             fasta_urls = [f"{url}/fasta" for url in self.urls]
-            self._fasta_client = FastaDrsClient(urls=fasta_urls, raise_errors=self.raise_errors)
+            self._fasta_client = FastaDrsClient(
+                urls=fasta_urls,
+                raise_errors=self.raise_errors,
+                session=self.session,
+                timeout=self.timeout,
+                hedge=self.hedge,
+            )
             self._fasta_client._seqcol_client = self
         return self._fasta_client
 
@@ -301,7 +567,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): The JSON response containing the sequence collection.
         """
         endpoint = f"/collection/{digest}?level={level}"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
     def get_attribute(self, attribute: str, digest: str) -> Optional[dict]:
         """
@@ -315,7 +581,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): The JSON response containing the attribute value.
         """
         endpoint = f"/attribute/collection/{attribute}/{digest}"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
     def compare(self, digest1: str, digest2: str) -> Optional[dict]:
         """
@@ -329,7 +595,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): The JSON response containing the comparison of the two sequence collections.
         """
         endpoint = f"/comparison/{digest1}/{digest2}"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
     def compare_local(self, digest: str, local_collection: dict) -> Optional[dict]:
         """
@@ -343,7 +609,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): The JSON response containing the comparison.
         """
         endpoint = f"/comparison/{digest}"
-        return _try_urls(self.urls, endpoint, method="POST", json=local_collection)
+        return self._try_urls(endpoint, method="POST", json=local_collection)
 
     def get_regions(self, digest: str, regions: list) -> Optional[list]:
         """
@@ -361,8 +627,8 @@ class SequenceCollectionClient(RefgetClient):
             (list): A list of {"chrom_name", "start", "end", "sequence"} dicts.
         """
         endpoint = f"/collection/{digest}/regions"
-        return _try_urls(
-            self.urls, endpoint, method="POST", json=regions, raise_errors=self.raise_errors
+        return self._try_urls(
+            endpoint, method="POST", json=regions, raise_errors=self.raise_errors
         )
 
     def list_collections(
@@ -391,7 +657,7 @@ class SequenceCollectionClient(RefgetClient):
         params.update(filters)
 
         endpoint = "/list/collection"
-        return _try_urls(self.urls, endpoint, params=params)
+        return self._try_urls(endpoint, params=params)
 
     def list_attributes(
         self, attribute: str, page: Optional[int] = None, page_size: Optional[int] = None
@@ -414,7 +680,7 @@ class SequenceCollectionClient(RefgetClient):
             params["page_size"] = page_size
 
         endpoint = f"/list/attributes/{attribute}"
-        return _try_urls(self.urls, endpoint, params=params)
+        return self._try_urls(endpoint, params=params)
 
     def service_info(self) -> Optional[dict]:
         """
@@ -424,7 +690,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): The service information.
         """
         endpoint = "/service-info"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
     def is_fasta_drs_enabled(self) -> bool:
         """
@@ -451,7 +717,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): {"namespace": ..., "alias": ..., "digest": ...} or None.
         """
         endpoint = f"/alias/{kind}/{namespace}/{alias}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def list_alias_namespaces(self, kind: str = "collection") -> Optional[dict]:
         """
@@ -464,7 +730,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): {"namespaces": [...]}.
         """
         endpoint = f"/list/alias/{kind}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def list_aliases(self, namespace: str, kind: str = "collection") -> Optional[dict]:
         """
@@ -478,7 +744,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): {"namespace": ..., "aliases": [...]}.
         """
         endpoint = f"/list/alias/{kind}/{namespace}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def aliases_for(self, digest: str, kind: str = "collection") -> Optional[dict]:
         """
@@ -492,7 +758,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): {"digest": ..., "aliases": [[namespace, alias], ...]}.
         """
         endpoint = f"/aliases/{kind}/{digest}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def get_fhr(self, digest: str) -> Optional[dict]:
         """
@@ -505,7 +771,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): FHR metadata, or None if not found.
         """
         endpoint = f"/collection/{digest}/fhr"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def list_fhr(self) -> Optional[dict]:
         """
@@ -515,7 +781,7 @@ class SequenceCollectionClient(RefgetClient):
             (dict): {"collections": [...]}.
         """
         endpoint = "/list/fhr"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def is_aliases_enabled(self) -> bool:
         """
@@ -589,6 +855,10 @@ class FastaDrsClient(RefgetClient):
         self,
         urls: list[str] = ["https://seqcolapi.databio.org/fasta"],
         raise_errors: Optional[bool] = None,
+        session: Optional[requests.Session] = None,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        hedge: bool = False,
     ) -> None:
         """
         Initializes the FASTA DRS client.
@@ -598,6 +868,12 @@ class FastaDrsClient(RefgetClient):
                 Defaults to ["https://seqcolapi.databio.org/fasta"].
             raise_errors (bool, optional): Whether to raise errors or log them.
                 Defaults to None, which will guess.
+            session (requests.Session, optional): Session to send requests through.
+                Defaults to a new one from make_session(retries).
+            timeout (float | tuple, optional): Connect and read timeouts in seconds.
+            retries (int, optional): Retries of an idempotent request to one URL.
+            hedge (bool, optional): Send a GET to the next mirror too when the first is
+                slower than its usual (95th percentile) latency; the first answer wins.
 
         Attributes:
             urls (list): The list of base URLs of the FASTA DRS API.
@@ -606,6 +882,7 @@ class FastaDrsClient(RefgetClient):
         if raise_errors is None:
             raise_errors = __name__ == "__main__"
         self.raise_errors = raise_errors
+        self._configure_http(session, timeout, retries, hedge)
 
     def get_object(self, digest: str) -> Optional[dict]:
         """
@@ -618,7 +895,7 @@ class FastaDrsClient(RefgetClient):
             (dict): DRS object with id, self_uri, size, checksums, access_methods, etc.
         """
         endpoint = f"/objects/{digest}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def get_index(self, digest: str) -> Optional[dict]:
         """
@@ -631,7 +908,7 @@ class FastaDrsClient(RefgetClient):
             (dict): Dict with line_bases, extra_line_bytes, offsets
         """
         endpoint = f"/objects/{digest}/index"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def get_access_url(self, digest: str, access_id: str) -> Optional[dict]:
         """
@@ -645,7 +922,7 @@ class FastaDrsClient(RefgetClient):
             (dict): Access URL object
         """
         endpoint = f"/objects/{digest}/access/{access_id}"
-        return _try_urls(self.urls, endpoint, raise_errors=self.raise_errors)
+        return self._try_urls(endpoint, raise_errors=self.raise_errors)
 
     def service_info(self) -> Optional[dict]:
         """
@@ -655,22 +932,39 @@ class FastaDrsClient(RefgetClient):
             (dict): The service information.
         """
         endpoint = "/service-info"
-        return _try_urls(self.urls, endpoint)
+        return self._try_urls(endpoint)
 
-    def download(self, digest: str, dest_path: str = None, access_id: str = None) -> str:
+    def download(
+        self,
+        digest: str,
+        dest_path: str = None,
+        access_id: str = None,
+        part_size: int = DOWNLOAD_PART_SIZE,
+        connections: int = DOWNLOAD_CONNECTIONS,
+    ) -> str:
         """
         Download the FASTA file to a local path.
 
+        The file is fetched in ``part_size`` HTTP Range requests over up to
+        ``connections`` connections, into ``<dest_path>.partial``; an interrupted
+        download resumes from the parts that file already holds. The DRS
+        object's sha-256 and md5 checksums are computed as the parts arrive
+        and checked before the file is moved to ``dest_path``. A server that
+        ignores Range gets one streamed request.
+
         Args:
             digest (str): The sequence collection digest
             dest_path (str, optional): Destination file path. If None, uses object name.
             access_id (str, optional): Specific access method to use. If None, tries all.
+            part_size (int, optional): Bytes per Range request.
+            connections (int, optional): Parts downloaded at once.
 
         Returns:
             (str): Path to downloaded file
 
         Raises:
-            ValueError: If no access methods available or specified access_id not found
+            ValueError: If no access methods available, specified access_id not found,
+                or the downloaded file does not match the object's checksums
         """
         drs_obj = self.get_object(digest)
         if not drs_obj or not drs_obj.get("access_methods"):
@@ -697,11 +991,15 @@ class FastaDrsClient(RefgetClient):
                 if dest_path is None:
                     dest_path = drs_obj.get("name", f"{digest}.fa")
 
-                response = requests.get(url, stream=True)
-                response.raise_for_status()
-                with open(dest_path, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                _RangedDownload(
+                    self.session,
+                    url,
+                    dest_path,
+                    drs_obj,
+                    part_size=part_size,
+                    connections=connections,
+                    timeout=self.timeout,
+                ).run()
                 return dest_path
 
         raise ValueError(f"No accessible URLs for {digest}")
@@ -807,7 +1105,9 @@ class FastaDrsClient(RefgetClient):
             else:
                 # Derive seqcol URL from fasta URL (strip /fasta suffix)
                 base_urls = [url.rsplit("/fasta", 1)[0] for url in self.urls]
-                seqcol_client = SequenceCollectionClient(urls=base_urls)
+                seqcol_client = SequenceCollectionClient(
+                    urls=base_urls, session=self.session, timeout=self.timeout
+                )
 
         collection = seqcol_client.get_collection(digest, level=2)
         if not collection:
@@ -847,6 +1147,218 @@ class FastaDrsClient(RefgetClient):
         return dest_path
 
 
+class _RangedDownload:
+    """
+    One FASTA download: parallel Range requests, resumable, checksummed in flight
+
+    Workers write each part at its offset in the preallocated ``.partial``
+    file and hand its bytes to the caller's thread, which feeds the hashes in
+    file order; at most ``2 * connections`` parts wait in memory for their
+    turn. Parts are recorded in ``.partial.json`` as they are hashed, so a
+    later run re-downloads only the rest, hashing the recorded parts from
+    the partial file instead.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        dest_path: str,
+        drs_obj: dict,
+        part_size: int = DOWNLOAD_PART_SIZE,
+        connections: int = DOWNLOAD_CONNECTIONS,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.session = session
+        self.url = url
+        self.dest_path = dest_path
+        self.partial_path = f"{dest_path}.partial"
+        self.state_path = f"{self.partial_path}.json"
+        self.part_size = part_size
+        self.connections = max(1, connections)
+        self.timeout = timeout
+        self.size = drs_obj.get("size")
+        self.expected = {
+            DOWNLOAD_CHECKSUMS[c["type"].lower()]: c["checksum"].lower()
+            for c in drs_obj.get("checksums") or []
+            if c.get("type", "").lower() in DOWNLOAD_CHECKSUMS
+        }
+        self.hashes = {name: hashlib.new(name) for name in self.expected}
+        # What a partial file must have been started for, to be resumed
+        self.identity = {
+            "id": drs_obj.get("id"),
+            "checksums": self.expected,
+            "part_size": part_size,
+        }
+
+    def run(self) -> None:
+        if self.size == 0:
+            # No byte range to ask for; check the empty content's hashes.
+            self._preallocate(0)
+            self._finish()
+            return
+        done = self._resumable_parts()
+        if not done:
+            first = self._get_part(0, allow_whole=True)
+            if first.status_code == 200:
+                _LOGGER.info(f"{self.url} ignores Range requests; downloading in one stream")
+                self._stream(first)
+                return
+            with first:
+                content_range = first.headers.get("Content-Range", "")
+                total = int(content_range.rsplit("/", 1)[1]) if "/" in content_range else None
+                if total is None:
+                    total = self.size
+                if total is None:
+                    raise ValueError(f"Cannot tell the size of {self.url}")
+                data = self._check_part(first, 0, total)
+            self._preallocate(total)
+            self.size = total
+            self._write(0, data)
+            self._hash(data)
+            done = {0}
+            self._save_state(done)
+            self._fetch_remaining(done, start=1)
+        else:
+            self._fetch_remaining(done)
+        self._finish()
+
+    def _n_parts(self) -> int:
+        return max(1, math.ceil(self.size / self.part_size))
+
+    def _bounds(self, index: int, size: Optional[int] = None) -> tuple[int, int]:
+        start = index * self.part_size
+        end = start + self.part_size - 1
+        size = self.size if size is None else size
+        return start, end if size is None else min(end, size - 1)
+
+    def _resumable_parts(self) -> set:
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        size = state.get("size")
+        if (
+            state.get("identity") != self.identity
+            or (self.size is not None and size != self.size)
+            or not os.path.exists(self.partial_path)
+            or os.path.getsize(self.partial_path) != size
+        ):
+            _LOGGER.info(f"Not resuming {self.partial_path}: it is from another download")
+            return set()
+        self.size = size
+        _LOGGER.info(f"Resuming {self.dest_path}: {len(state['done'])} parts already present")
+        return set(state["done"])
+
+    def _get_part(self, index: int, allow_whole: bool = False) -> requests.Response:
+        start, end = self._bounds(index)
+        response = self.session.get(
+            self.url,
+            headers={"Range": f"bytes={start}-{end}"},
+            stream=True,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        if response.status_code != 206 and not (allow_whole and response.status_code == 200):
+            response.close()
+            raise requests.exceptions.HTTPError(
+                f"Expected a partial response for bytes {start}-{end} of {self.url}, "
+                f"got {response.status_code}",
+                response=response,
+            )
+        return response
+
+    def _check_part(self, response: requests.Response, index: int, size: int) -> bytes:
+        start, end = self._bounds(index, size)
+        data = response.content
+        if len(data) != end - start + 1:
+            raise requests.exceptions.ContentDecodingError(
+                f"Got {len(data)} bytes for bytes {start}-{end} of {self.url}"
+            )
+        return data
+
+    def _fetch(self, index: int) -> bytes:
+        with self._get_part(index) as response:
+            data = self._check_part(response, index, self.size)
+        self._write(index, data)
+        return data
+
+    def _preallocate(self, size: int) -> None:
+        with open(self.partial_path, "wb") as f:
+            if size and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, size)
+            else:
+                f.truncate(size)
+
+    def _write(self, index: int, data: bytes) -> None:
+        # One handle per write, so workers never share a file position.
+        with open(self.partial_path, "r+b") as f:
+            f.seek(index * self.part_size)
+            f.write(data)
+
+    def _hash(self, data: bytes) -> None:
+        for h in self.hashes.values():
+            h.update(data)
+
+    def _hash_from_disk(self, index: int) -> None:
+        start, end = self._bounds(index)
+        with open(self.partial_path, "rb") as f:
+            f.seek(start)
+            self._hash(f.read(end - start + 1))
+
+    def _fetch_remaining(self, done: set, start: int = 0) -> None:
+        """Fetch the parts not done, and hash parts ``start`` onwards in order"""
+        missing = iter([i for i in range(start, self._n_parts()) if i not in done])
+        window = 2 * self.connections
+        futures = {}
+        pool = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="refget-dl")
+        try:
+            for index in range(start, self._n_parts()):
+                # Keep the window of parts in flight full.
+                while len(futures) < window and (next_index := next(missing, None)) is not None:
+                    futures[next_index] = pool.submit(self._fetch, next_index)
+                if index in done:
+                    self._hash_from_disk(index)
+                    continue
+                self._hash(futures.pop(index).result())
+                done.add(index)
+                self._save_state(done)
+        finally:
+            # After a failure, drop the queued parts but let those in flight
+            # finish writing, so nothing touches the partial file afterwards.
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _stream(self, response: requests.Response) -> None:
+        with response, open(self.partial_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+                self._hash(chunk)
+        self._finish()
+
+    def _save_state(self, done: set) -> None:
+        state = {"identity": self.identity, "size": self.size, "done": sorted(done)}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _finish(self) -> None:
+        for name, expected in self.expected.items():
+            actual = self.hashes[name].hexdigest()
+            if actual != expected:
+                for path in (self.partial_path, self.state_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise ValueError(
+                    f"Downloaded {self.url} has {name} {actual}, expected {expected}; "
+                    "discarded the download"
+                )
+        os.replace(self.partial_path, self.dest_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+
 # Utilities
 
 
@@ -879,6 +1391,10 @@ def _try_urls(
     params: Optional[dict] = None,
     json: Optional[dict] = None,
     raise_errors: bool = True,
+    session: Optional[requests.Session] = None,
+    timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+    mirrors: Optional[MirrorSet] = None,
+    hedge: bool = False,
 ) -> Optional[dict | str]:
     """
     Tries the list of URLs in succession until a successful response is received.
@@ -890,31 +1406,105 @@ def _try_urls(
         params (dict, optional): Query parameters for GET requests.
         json (dict, optional): JSON body for POST requests.
         raise_errors (bool): Whether to raise errors or log them.
+        session (requests.Session, optional): Session to send the requests
+            through, retrying per its adapters. Defaults to plain requests.
+        timeout (float | tuple, optional): Connect and read timeouts in seconds.
+        mirrors (MirrorSet, optional): Latency and health of the URLs; if given,
+            it orders the attempts and records how each went.
+        hedge (bool): With mirrors, start a GET on the next URL when the one in
+            flight is slower than its usual latency, and take the first success.
 
     Returns:
         (dict): The JSON response or None if all URLs fail.
     """
-    errors = []
-    for base_url in urls:
+    http = session if session is not None else requests
+    if mirrors is not None:
+        urls = [mirror.url for mirror in mirrors.ordered()]
+
+    def attempt(base_url: str) -> dict | str:
         url = f"{base_url}{endpoint}"
+        started = time.perf_counter()
         try:
             if method.upper() == "POST":
-                response = requests.post(url, json=json)
+                response = http.request("POST", url, json=json, timeout=timeout)
             else:
-                response = requests.get(url, params=params)
+                response = http.request("GET", url, params=params, timeout=timeout)
             result = _wrap_response(response)
-            _LOGGER.debug(f"Response received from {base_url}")
+        except requests.exceptions.RequestException as e:
+            if mirrors is not None:
+                if _mirror_failed(e):
+                    mirrors.record_failure(base_url)
+                else:
+                    # A 4xx is an answer about the request, not the mirror.
+                    mirrors.record_success(base_url, time.perf_counter() - started)
+            raise
+        if mirrors is not None:
+            mirrors.record_success(base_url, time.perf_counter() - started)
+        _LOGGER.debug(f"Response received from {base_url}")
+        return result
+
+    if hedge and mirrors is not None and method.upper() == "GET" and len(urls) > 1:
+        result, errors = _hedged(urls, attempt, mirrors)
+        if errors is None:
             return result
-        except (
-            requests.exceptions.ConnectionError,
-            requests.exceptions.Timeout,
-            requests.exceptions.RequestException,
-        ) as e:
-            _LOGGER.debug(f"Error from {base_url}: {e}")
-            errors.append(f"Error from {base_url}: {e}")
+    else:
+        errors = []
+        for base_url in urls:
+            try:
+                return attempt(base_url)
+            except requests.exceptions.RequestException as e:
+                _LOGGER.debug(f"Error from {base_url}: {e}")
+                errors.append(f"Error from {base_url}: {e}")
     error_message = "All URLs failed:\n" + "\n".join(errors)
     if raise_errors:
         raise ConnectionError(error_message)
     else:
         _LOGGER.error(error_message)
         return None
+
+
+def _mirror_failed(error: requests.exceptions.RequestException) -> bool:
+    """Whether an error says the mirror is unwell: no connection, a timeout, or a 5xx"""
+    response = getattr(error, "response", None)
+    if isinstance(error, requests.exceptions.HTTPError) and response is not None:
+        return response.status_code >= 500
+    return True
+
+
+def _hedged(urls: list[str], attempt, mirrors: MirrorSet) -> tuple:
+    """
+    Race ``attempt`` over ``urls``: the next URL starts when the latest one fails,
+    or outlasts its hedge delay. Returns (result, None), or (None, errors).
+    """
+    errors = []
+    queue = list(urls)
+    pending = {}
+    # Not a with-block: leaving it would wait for the requests that lost.
+    pool = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="refget-hedge")
+
+    def launch() -> None:
+        base_url = queue.pop(0)
+        pending[pool.submit(attempt, base_url)] = base_url
+
+    try:
+        launch()
+        while pending:
+            latest = mirrors.mirrors[list(pending.values())[-1]]
+            delay = latest.hedge_delay() if queue else None
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                _LOGGER.debug(f"{latest.url} is slower than {delay:.3f}s; hedging")
+                launch()
+                continue
+            for future in done:
+                base_url = pending.pop(future)
+                try:
+                    return future.result(), None
+                except requests.exceptions.RequestException as e:
+                    _LOGGER.debug(f"Error from {base_url}: {e}")
+                    errors.append(f"Error from {base_url}: {e}")
+                    if queue:
+                        launch()
+        return None, errors
+    finally:
+        pool.shutdown(wait=False)
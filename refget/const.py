@@ -55,6 +55,11 @@ SEQCOL_SCHEMA_PATH = _schema_path(SEQCOL_SCHEMA_FILE)
 # Alias dict to make typehinting clearer
 SeqColDict = dict
 
+# Characters per block when sequences are stored chunked in the database. Range
+# reads locate blocks by this size, so it is fixed by the schema: changing it
+# would misread every sequence already stored.
+SEQUENCE_CHUNK_SIZE = 65536
+
 # Default inherent attributes per seqcol spec v1.0.0
 # These attributes contribute to the top-level digest
 DEFAULT_INHERENT_ATTRS = ["names", "sequences"]
@@ -5,58 +5,319 @@ StoreFreshnessMiddleware periodically checks if the remote store has changed
 (via rgstore.json digest) and reloads the backend when new data is available.
 """
 
+import asyncio
 import json
 import logging
+import os
 import time
+import urllib.error
 import urllib.request
 
-from starlette.middleware.base import BaseHTTPMiddleware
-
 _LOGGER = logging.getLogger(__name__)
 
 
-class StoreFreshnessMiddleware(BaseHTTPMiddleware):
-    """On each request, if >N seconds since last check, fetch rgstore.json
-    and compare collections_digest. If changed, re-open the store and
-    swap the backend. Lazy, request-triggered, no background threads."""
+class StoreFreshnessMiddleware:
+    """Poll rgstore.json in the background and swap in a reloaded backend.
+
+    A pure ASGI middleware: requests pass straight through and never wait on a
+    check or a reload. The poller is an asyncio task started on the first
+    event the app receives (mounted sub-applications get no lifespan events,
+    so it cannot rely on startup). Every ``check_interval`` seconds it fetches
+    rgstore.json with ``If-None-Match``/``If-Modified-Since``, so an unchanged
+    store costs a 304 and no parsing. When rgstore.json differs from the one
+    the current backend was built from -- new collections, but also new
+    aliases, FHR metadata or sequences -- the new readonly store is opened and
+    loaded in a worker thread and then bound to ``app.state.backend`` with a
+    single assignment; requests in flight keep the backend they already
+    resolved.
+
+    Reloads are deltas. The fresh index files are written into the local cache
+    -- ``open_remote`` trusts a cached ``rgstore.json``, ``collections.rgci``
+    and ``sequences.rgsi`` and would otherwise reopen the old store -- and the
+    alias and FHR sidecars are pulled again. The remote collection index is
+    diffed against the collections the current backend serves, and only the
+    new collections are downloaded; unchanged ones load from the cache.
+    ``last_delta`` records what the most recent reload changed.
+
+    Swaps are double-buffered and accounted for:
+
+    * Each request is pinned to the backend current when it arrived and holds
+      a lease on it until its response is sent. A replaced backend drops its
+      entries from the shared caches at once (see
+      ``RefgetStoreBackend.discard_cached``), and is released explicitly with
+      ``close()`` when its leases reach zero. The swap waits up to
+      ``drain_timeout`` for that; requests that outlast it close the backend
+      themselves when the last one finishes.
+    * With a ``memory_budget`` (bytes of resident memory for the process), a
+      reload is refused while the current resident size plus the projected
+      size of the new store would exceed it; the poller retries later. The
+      projection scales the bytes per collection measured at the previous
+      reload, or before any, conservatively assumes the whole process is the
+      current store.
 
-    def __init__(self, app, store_url: str, cache_dir: str, check_interval: int = 300):
-        super().__init__(app)
+    ``stats`` -- also bound to ``app.state.freshness`` for service-info --
+    holds swap timings, projected and peak resident sizes.
+    """
+
+    def __init__(
+        self,
+        app,
+        store_url: str,
+        cache_dir: str,
+        check_interval: int = 300,
+        memory_budget: int | None = None,
+        drain_timeout: float = 60,
+    ):
+        self.app = app
         self.store_url = store_url
         self.cache_dir = cache_dir
         self.check_interval = check_interval
-        self.last_check = time.time()
-        self.last_digest = None
+        self.last_metadata = None  # rgstore.json the current backend was built from
+        self._etag = None
+        self._last_modified = None
+        self._task = None
+        self.last_delta = None
+        self.memory_budget = memory_budget
+        self.drain_timeout = drain_timeout
+        self.stats: dict = {"swaps": 0, "memory_budget": memory_budget}
+        self._bytes_per_collection = None
+        self._leases: dict[int, int] = {}  # id(backend) -> requests in flight
+        self._retired: dict[int, object] = {}  # replaced backends still leased
+
+    async def __call__(self, scope, receive, send):
+        # Restarted if its event loop went away (e.g. a test client's portal).
+        if (self._task is None or self._task.done()) and "app" in scope:
+            self._task = asyncio.create_task(self._poll(scope["app"]))
+        backend = getattr(scope["app"].state, "backend", None) if "app" in scope else None
+        if scope["type"] != "http" or backend is None:
+            await self.app(scope, receive, send)
+            return
+        # The scope keeps `backend` alive, so its id is unique while leased.
+        scope.setdefault("state", {})["backend"] = backend
+        key = id(backend)
+        self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._leases[key] -= 1
+            if not self._leases[key]:
+                del self._leases[key]
+                retired = self._retired.pop(key, None)
+                if retired is not None:
+                    _LOGGER.info("Last request on a replaced backend finished; releasing it")
+                    _close(retired)
 
-    async def dispatch(self, request, call_next):
-        now = time.time()
-        if now - self.last_check > self.check_interval:
-            self.last_check = now
-            self._check_and_reload(request.app)
-        return await call_next(request)
+    async def _poll(self, app):
+        app.state.freshness = self.stats
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self._check_and_reload(app)
 
-    def _check_and_reload(self, app):
+    async def _check_and_reload(self, app):
         try:
-            metadata = self._fetch_metadata()
-            digest = metadata.get("collections_digest")
-            if digest and digest != self.last_digest:
-                self.last_digest = digest
-                self._reload_backend(app)
+            fetched = await asyncio.to_thread(self._fetch_metadata)
+            if fetched is None:
+                return
+            metadata, validators = fetched
+            if metadata != self._served_metadata():
+                loaded = _loaded_digests(getattr(app.state, "backend", None))
+                backend = await asyncio.to_thread(self._build_backend, metadata, loaded)
+                self.last_metadata = metadata
+                await self._swap_backend(app, backend)
+            # Only now, so a failed reload is retried rather than answered by a 304.
+            self._etag, self._last_modified = validators
         except Exception as e:
             _LOGGER.warning(f"Store freshness check failed: {e}")
 
-    def _fetch_metadata(self) -> dict:
-        url = self.store_url.rstrip("/") + "/rgstore.json"
-        with urllib.request.urlopen(url) as resp:
-            return json.loads(resp.read())
+    def _served_metadata(self) -> dict | None:
+        """rgstore.json as last loaded: by a reload, else by start-up into the cache."""
+        if self.last_metadata is None:
+            try:
+                with open(os.path.join(self.cache_dir, "rgstore.json")) as f:
+                    self.last_metadata = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self.last_metadata
+
+    def _fetch_metadata(self) -> tuple[dict, tuple] | None:
+        """Conditionally GET rgstore.json.
 
-    def _reload_backend(self, app):
+        Returns ``(metadata, (etag, last_modified))``, or None if it has not
+        changed since the validators were last committed.
+        """
+        request = urllib.request.Request(self._url("rgstore.json"))
+        if self._etag:
+            request.add_header("If-None-Match", self._etag)
+        if self._last_modified:
+            request.add_header("If-Modified-Since", self._last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as resp:
+                metadata = json.loads(resp.read())
+                return metadata, (resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+    def _build_backend(self, metadata: dict, loaded: set[str] | None):
+        """Reload the store, fetching only the collections that are new. Runs in a worker thread."""
         from refget.backend import RefgetStoreBackend
         from refget.store import RefgetStore
 
-        _LOGGER.info(f"Store changed, reloading from {self.store_url}")
+        started = time.monotonic()
+        index_name = metadata.get("collection_index", "collections.rgci")
+        index = self._fetch_bytes(index_name)
+        remote = _index_digests(index)
+        if loaded is not None:
+            added, removed = remote - loaded, loaded - remote
+        else:
+            added, removed = remote, set()
+
+        _LOGGER.info(
+            f"Store changed (+{len(added)}/-{len(removed)} collections), "
+            f"reloading from {self.store_url}"
+        )
+        resident = _resident_bytes()
+        projected = self._projected_bytes(len(remote), loaded, resident)
+        self.stats.update(resident_bytes=resident, projected_bytes=projected)
+        if self.memory_budget and resident is not None and projected is not None:
+            if resident + projected > self.memory_budget:
+                self.stats["over_budget"] = self.stats.get("over_budget", 0) + 1
+                raise RuntimeError(
+                    f"reload needs ~{projected} bytes on top of {resident} resident, "
+                    f"over the {self.memory_budget}-byte memory budget; will retry"
+                )
+
+        self._refresh_cache(metadata, index_name, index, removed)
         store = RefgetStore.open_remote(self.cache_dir, self.store_url)
+        pull_sidecars(store)
         # Load all collections and convert to a thread-safe readonly store so the
         # swapped-in backend serves concurrent reads with immutable borrows.
+        # Unchanged collections are read from the cache; only `added` are fetched.
         store.load_all_collections()
-        app.state.backend = RefgetStoreBackend(store.into_readonly())
+        backend = RefgetStoreBackend(store.into_readonly())
+
+        # Both stores are resident now: this is the peak of the swap.
+        peak = _resident_bytes()
+        if peak is not None and resident is not None and peak > resident and remote:
+            self._bytes_per_collection = (peak - resident) / len(remote)
+        self.last_delta = {
+            "added": len(added),
+            "removed": len(removed),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        self.stats.update(build_seconds=self.last_delta["seconds"], peak_bytes=peak)
+        return backend
+
+    def _projected_bytes(self, n_collections: int, loaded: set[str] | None, resident):
+        if self._bytes_per_collection is not None:
+            return int(self._bytes_per_collection * n_collections)
+        if loaded and resident is not None:
+            return int(resident * n_collections / len(loaded))
+        return None
+
+    def _refresh_cache(self, metadata: dict, index_name: str, index: bytes, removed: set[str]):
+        """Make the local cache describe the current remote store."""
+        _atomic_write(os.path.join(self.cache_dir, index_name), index)
+        sequence_index = metadata.get("sequence_index", "sequences.rgsi")
+        _atomic_write(
+            os.path.join(self.cache_dir, sequence_index), self._fetch_bytes(sequence_index)
+        )
+        template = metadata.get("collections_path_template", "collections/%s.rgsi")
+        for digest in removed:
+            stale = os.path.join(self.cache_dir, template.replace("%s", digest))
+            if os.path.exists(stale):
+                os.unlink(stale)
+        # Last, so a failure above leaves the old rgstore.json and a retry.
+        _atomic_write(os.path.join(self.cache_dir, "rgstore.json"), json.dumps(metadata).encode())
+
+    def _fetch_bytes(self, name: str) -> bytes:
+        with urllib.request.urlopen(self._url(name), timeout=60) as resp:
+            return resp.read()
+
+    def _url(self, name: str) -> str:
+        return self.store_url.rstrip("/") + "/" + name
+
+    async def _swap_backend(self, app, backend):
+        old = getattr(app.state, "backend", None)
+        app.state.backend = backend
+        # The new backend starts cold; warm it the way start-up did.
+        prewarmer = getattr(app.state, "prewarmer", None)
+        if prewarmer is not None:
+            prewarmer.start()
+
+        # Cached rankings reference the old backend; drop them now, not at close.
+        if hasattr(old, "discard_cached"):
+            old.discard_cached()
+
+        started = time.monotonic()
+        while self._leases.get(id(old)) and time.monotonic() - started < self.drain_timeout:
+            await asyncio.sleep(0.01)
+        drained = not self._leases.get(id(old))
+        if drained:
+            _close(old)
+        else:
+            _LOGGER.warning(
+                f"{self._leases[id(old)]} requests still hold the old backend after "
+                f"{self.drain_timeout}s; it is released when the last one finishes"
+            )
+            self._retired[id(old)] = old
+        del old
+        self.stats.update(
+            swaps=self.stats["swaps"] + 1,
+            drain_seconds=round(time.monotonic() - started, 3),
+            drained=drained,
+            resident_after_bytes=_resident_bytes(),
+            last_delta=self.last_delta,
+        )
+
+
+def pull_sidecars(store) -> None:
+    """Fetch the remote's current alias and FHR sidecars into a freshly opened store."""
+    for pull in (store.pull_aliases, store.pull_fhr):
+        try:
+            pull(strategy="keep-theirs")
+        except Exception as e:
+            _LOGGER.warning(f"Could not pull store sidecars ({pull.__name__}): {e}")
+
+
+def _close(backend) -> None:
+    if hasattr(backend, "close"):
+        backend.close()
+
+
+def _loaded_digests(backend) -> set[str] | None:
+    """Collection digests the current backend serves, or None if unknown."""
+    if backend is None or not hasattr(backend, "collection_count"):
+        return None
+    try:
+        result = backend.list_collections(page=0, page_size=max(backend.collection_count(), 1))
+    except Exception:
+        return None
+    return set(result["results"])
+
+
+def _index_digests(index: bytes) -> set[str]:
+    """Collection digests listed in a collections.rgci index."""
+    digests = set()
+    for line in index.decode().splitlines():
+        if line and not line.startswith("#"):
+            digests.add(line.split("\t", 1)[0])
+    return digests
+
+
+def _resident_bytes() -> int | None:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -26,6 +26,7 @@ from ._deps import require
 require("refget.models (the SQLModel database tables)", "db", "sqlmodel", "sqlalchemy")
 
 from pydantic import field_serializer, field_validator  # noqa: E402
+from sqlalchemy import Index  # noqa: E402
 from sqlalchemy.types import TypeDecorator  # noqa: E402
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel  # noqa: E402
 
@@ -73,6 +74,7 @@ from .exceptions import InvalidSeqColError  # noqa: E402
 from .utils import (  # noqa: E402
     build_name_length_pairs,
     canonical_str,
+    digest_fasta_file,
     fasta_to_seqcol_dict,
     level1_dict_to_seqcol_digest,
     seqcol_dict_to_level1_dict,
@@ -81,86 +83,56 @@ from .utils import (  # noqa: E402
 _LOGGER = logging.getLogger(__name__)
 
 
-def create_fasta_drs_object(fasta_file: str, digest: str = None) -> "FastaDrsObject":
+def create_fasta_drs_object(
+    fasta_file: str, digest: str = None, fasta_digests: Optional[dict] = None
+) -> "FastaDrsObject":
     """
     Create a FastaDrsObject from a FASTA file.
 
+    The file checksums (SHA-256, MD5), the seqcol digest and the FAI data all
+    come from a single read of the file; see :func:`refget.utils.digest_fasta_file`.
+
     Args:
         fasta_file: Path to a FASTA file
         digest: The refget digest of the sequence collection (optional).
                 If not included, it will be computed.
+        fasta_digests: The result of ``digest_fasta_file(fasta_file)``, if the
+                caller already has it (optional).
 
     Returns:
         FastaDrsObject: The FastaDrsObject object
-
-    Raises:
-        ImportError: If gtars is not installed (required for FASTA processing)
     """
-    import hashlib
     import os
-    from datetime import datetime
-
-    if not GTARS_INSTALLED:
-        raise ImportError(
-            "create_fasta_drs_object requires gtars. Install with: pip install gtars"
-        )
-
-    from gtars.refget import digest_fasta
-
-    file_size = os.path.getsize(fasta_file)
 
-    # Compute file checksums (SHA-256, MD5)
-    sha256 = hashlib.sha256()
-    md5 = hashlib.md5()
-    with open(fasta_file, "rb") as f:
-        for block in iter(lambda: f.read(65536), b""):
-            sha256.update(block)
-            md5.update(block)
-    sha256_checksum_val = sha256.hexdigest()
-    md5_checksum_val = md5.hexdigest()
-
-    # Use digest_fasta to get both seqcol digest and FAI data in a single pass
-    seqcol = digest_fasta(fasta_file)
-
-    offsets = []
-    line_bases = None
-    extra_line_bytes = None
-
-    for seq_record in seqcol.sequences:
-        fai = seq_record.metadata.fai
-        if fai:  # None for gzipped files
-            offsets.append(fai.offset)
-            # Use values from first sequence (assumes consistent wrapping)
-            if line_bases is None:
-                line_bases = fai.line_bases
-                extra_line_bytes = fai.line_bytes - fai.line_bases
+    if fasta_digests is None:
+        fasta_digests = digest_fasta_file(fasta_file)
 
     now = datetime.now(timezone.utc)
 
-    # Use provided digest or the one computed by digest_fasta
     if digest is None:
-        digest = seqcol.digest
+        level1_dict = seqcol_dict_to_level1_dict(fasta_digests["seqcol_dict"])
+        digest = level1_dict_to_seqcol_digest(level1_dict)
 
     return FastaDrsObject(
         id=digest,
         name=os.path.basename(fasta_file),
         self_uri=None,  # Will be populated by to_response() when serving via API
-        size=file_size,
+        size=fasta_digests["size"],
         created_time=now,
         updated_time=now,
         version="1.0",
         mime_type="application/fasta",
         checksums=[
-            Checksum(type="sha-256", checksum=sha256_checksum_val),
+            Checksum(type="sha-256", checksum=fasta_digests["sha256"]),
             Checksum(type="refget.seqcol", checksum=digest),
-            Checksum(type="md5", checksum=md5_checksum_val),
+            Checksum(type="md5", checksum=fasta_digests["md5"]),
         ],
         access_methods=[],
         description=f"DRS object for {os.path.basename(fasta_file)}",
         aliases=[os.path.basename(fasta_file).split(".")[0]],
-        line_bases=line_bases,
-        extra_line_bytes=extra_line_bytes,
-        offsets=offsets if offsets else None,
+        line_bases=fasta_digests["line_bases"],
+        extra_line_bytes=fasta_digests["extra_line_bytes"],
+        offsets=fasta_digests["offsets"],
     )
 
 
@@ -363,7 +335,9 @@ class FastaDrsObject(DrsObject, table=True):
         return self.model_copy(update={"self_uri": f"{base_uri}/{self.id}"})
 
     @classmethod
-    def from_fasta_file(cls, fasta_file: str, digest: str = None) -> "FastaDrsObject":
+    def from_fasta_file(
+        cls, fasta_file: str, digest: str = None, fasta_digests: Optional[dict] = None
+    ) -> "FastaDrsObject":
         """
         Given a FASTA file, create a FastaDrsObject object,
         return a populated FastaDrsObject with computed size and checksum.
@@ -372,22 +346,35 @@ class FastaDrsObject(DrsObject, table=True):
             fasta_file (str): Path to a FASTA file
             digest (str): The refget digest of the sequence collection
                 (optional). If not included, it will be computed
+            fasta_digests (dict): ``refget.utils.digest_fasta_file(fasta_file)``,
+                if already computed (optional)
 
         Returns:
             (FastaDrsObject): The FastaDrsObject object
-
-        Raises:
-            ImportError: If gtars is not installed (required for FASTA processing)
         """
-        return create_fasta_drs_object(fasta_file, digest)
+        return create_fasta_drs_object(fasta_file, digest, fasta_digests)
 
 
 class Sequence(SQLModel, table=True):
     digest: str = Field(primary_key=True)
+    # Empty when the sequence is stored in SequenceChunk blocks instead.
     sequence: str
     length: int
 
 
+class SequenceChunk(SQLModel, table=True):
+    """A fixed-size block of a sequence, so range reads touch only the blocks they need.
+
+    Block ``block`` of a sequence holds characters
+    ``[block * SEQUENCE_CHUNK_SIZE, (block + 1) * SEQUENCE_CHUNK_SIZE)``. The
+    size is part of the schema: range reads locate blocks by it.
+    """
+
+    digest: str = Field(foreign_key="sequence.digest", primary_key=True)
+    block: int = Field(primary_key=True)
+    data: str
+
+
 class PangenomeCollectionLink(SQLModel, table=True):
     pangenome_digest: str = Field(foreign_key="pangenome.digest", primary_key=True)
     collection_digest: str = Field(foreign_key="sequencecollection.digest", primary_key=True)
@@ -456,10 +443,33 @@ class HumanReadableNames(SQLModel, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     human_readable_name: str = Field(unique=True)
-    digest: str = Field(foreign_key="sequencecollection.digest", nullable=False)
+    digest: str = Field(foreign_key="sequencecollection.digest", nullable=False, index=True)
     collection: "SequenceCollection" = Relationship(back_populates="human_readable_names")
 
 
+class CollectionMember(SQLModel, table=True):
+    """
+    One sequence of a collection, at its position in the collection.
+
+    The level 2 arrays of a collection are stored whole, as JSON values of the
+    attribute tables. This table holds the same arrays transposed, one row per
+    sequence, so that membership, containment and overlap between collections
+    are indexed joins and aggregations in the database.
+    """
+
+    __table_args__ = (
+        Index("ix_collectionmember_sequence", "sequence_digest", "collection_digest"),
+        Index("ix_collectionmember_name_length", "name", "length", "collection_digest"),
+        Index("ix_collectionmember_length", "length", "collection_digest"),
+    )
+
+    collection_digest: str = Field(foreign_key="sequencecollection.digest", primary_key=True)
+    position: int = Field(primary_key=True)
+    sequence_digest: str
+    name: str
+    length: int
+
+
 # For a transient attribute, like sorted_name_length_pairs, you just need the attr_digest value.
 # For attributes where you want to store the values in a table, you would also have the
 # Relationship attribute.
@@ -468,6 +478,28 @@ class SequenceCollection(SQLModel, table=True):
     A SQLModel/pydantic model that represents a refget sequence collection.
     """
 
+    # Searches filter on attribute digests and page by collection digest, so
+    # every attribute digest is indexed together with `digest`: the filter and
+    # the keyset order are served by one index. The pairs the list endpoint is
+    # most often filtered on get composite indexes of their own. Indexes added
+    # here reach existing databases through `refget admin migrate`.
+    __table_args__ = (
+        *(
+            Index(f"ix_sequencecollection_{attr}", f"{attr}_digest", "digest")
+            for attr in (
+                "sequences",
+                "sorted_sequences",
+                "names",
+                "lengths",
+                "name_length_pairs",
+            )
+        ),
+        Index("ix_sequencecollection_names_lengths", "names_digest", "lengths_digest", "digest"),
+        Index(
+            "ix_sequencecollection_sequences_names", "sequences_digest", "names_digest", "digest"
+        ),
+    )
+
     digest: str = Field(primary_key=True)
     """ Top-level digest of the SequenceCollection. """
 
@@ -0,0 +1,213 @@
+"""SQL query timing for the database agents.
+
+:data:`QUERY_METRICS` listens on the engines of every RefgetDBAgent (and
+AsyncRefgetDBAgent) in the process and records the latency of each statement.
+Agent classes decorated with :func:`instrumented` name the method a statement
+ran in, so the counters break down per agent method -- ``calls`` next to
+``queries`` is how an N+1 pattern shows up. Statements slower than
+``slow_query_seconds`` (``REFGET_SLOW_QUERY_SECONDS``, default 0.5) are logged
+with their parameters, the agent method and the endpoint being served; the
+endpoint is set per request by :class:`QueryEndpointMiddleware`.
+
+:func:`capture_queries` collects the statements an engine runs inside a
+``with`` block, for tests that pin the number of queries an endpoint makes.
+
+Like :mod:`refget.agents`, this is a database module and requires
+``pip install 'refget[db]'``.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from ._deps import require
+
+require("refget.query_metrics (SQL query timing)", "db", "sqlalchemy")
+
+from sqlalchemy import event  # noqa: E402
+
+from .const import _LOGGER  # noqa: E402
+
+# Statements at least this slow, in seconds, are logged
+SLOW_QUERY_SECONDS = 0.5
+
+# Upper bounds, in seconds, of the statement latency histogram
+LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+
+# The agent method, and the endpoint, a statement runs on behalf of
+_METHOD: ContextVar[Optional[str]] = ContextVar("refget_query_method", default=None)
+_ENDPOINT: ContextVar[Optional[str]] = ContextVar("refget_query_endpoint", default=None)
+
+
+class QueryMetrics:
+    """
+    Statement counts and latencies, overall and per agent method
+
+    Args:
+        slow_query_seconds: Log statements at least this slow (None: never)
+    """
+
+    def __init__(self, slow_query_seconds: Optional[float] = SLOW_QUERY_SECONDS) -> None:
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.queries = 0
+            self.seconds = 0.0
+            self.slow_queries = 0
+            self.failed_queries = 0
+            self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+            self.methods: dict = {}
+
+    def attach(self, engine) -> None:
+        """Time every statement ``engine`` runs; an AsyncEngine's sync engine is used"""
+        engine = getattr(engine, "sync_engine", engine)
+        if not event.contains(engine, "before_cursor_execute", self._before):
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+            event.listen(engine, "handle_error", self._error)
+
+    def detach(self, engine) -> None:
+        engine = getattr(engine, "sync_engine", engine)
+        if event.contains(engine, "before_cursor_execute", self._before):
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+            event.remove(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("refget_query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["refget_query_started"].pop()
+        method = _METHOD.get()
+        slow = self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds
+        with self._lock:
+            self.queries += 1
+            self.seconds += elapsed
+            self.slow_queries += slow
+            self.buckets[sum(elapsed > bound for bound in LATENCY_BUCKETS)] += 1
+            if method is not None:
+                counts = self._method(method)
+                counts["queries"] += 1
+                counts["seconds"] += elapsed
+                counts["max_seconds"] = max(counts["max_seconds"], elapsed)
+        if slow:
+            _LOGGER.warning(
+                f"Slow query ({elapsed:.3f}s) in {method or 'unknown method'} "
+                f"serving {_ENDPOINT.get() or 'no endpoint'}: {statement} "
+                f"parameters={parameters!r}"
+            )
+
+    def _error(self, context) -> None:
+        # after_cursor_execute does not fire for a failed statement.
+        conn = context.connection
+        started = conn.info.get("refget_query_started") if conn is not None else None
+        if not started:
+            return
+        started.pop()
+        with self._lock:
+            self.failed_queries += 1
+
+    def _method(self, method: str) -> dict:
+        # Caller holds the lock.
+        if method not in self.methods:
+            self.methods[method] = {"calls": 0, "queries": 0, "seconds": 0.0, "max_seconds": 0.0}
+        return self.methods[method]
+
+    def record_call(self, method: str) -> None:
+        with self._lock:
+            self._method(method)["calls"] += 1
+
+    def snapshot(self) -> dict:
+        """The counters, as a JSON-ready dict"""
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "seconds": self.seconds,
+                "slow_queries": self.slow_queries,
+                "failed_queries": self.failed_queries,
+                "slow_query_seconds": self.slow_query_seconds,
+                "latency_buckets": dict(zip(bounds, self.buckets)),
+                "methods": {name: dict(counts) for name, counts in self.methods.items()},
+            }
+
+
+_slow = os.environ.get("REFGET_SLOW_QUERY_SECONDS")
+QUERY_METRICS = QueryMetrics(float(_slow) if _slow else SLOW_QUERY_SECONDS)
+
+
+def _attributed(method, name: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        QUERY_METRICS.record_call(name)
+        token = _METHOD.set(name)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _METHOD.reset(token)
+
+    return wrapper
+
+
+def instrumented(cls):
+    """
+    Class decorator: count calls to each public method and attribute its queries
+
+    Queries are attributed to the innermost instrumented method running. A
+    generator's queries run after the method has returned, so they only count
+    towards the totals.
+    """
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(attr):
+            setattr(cls, name, _attributed(attr, f"{cls.__name__}.{name}"))
+    return cls
+
+
+class QueryEndpointMiddleware:
+    """ASGI middleware naming the endpoint (method and path) in the slow-query log"""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _ENDPOINT.set(f"{scope['method']} {scope['path']}")
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            _ENDPOINT.reset(token)
+
+
+@contextmanager
+def capture_queries(engine) -> Iterator[List[str]]:
+    """
+    Collect the SQL of every statement ``engine`` runs inside the block
+
+    Example::
+
+        with capture_queries(dbagent.engine) as queries:
+            client.get(f"/collection/{digest}")
+        assert len(queries) == 1, queries
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
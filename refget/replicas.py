@@ -0,0 +1,248 @@
+"""Read-replica routing for the PostgreSQL-backed agents.
+
+A :class:`ReplicaSet` holds the primary engine and any number of read
+replicas. Agent methods that only read are marked :func:`read_only`; while
+one runs, the agent's ``engine`` resolves to a replica chosen by the set --
+round-robin, or the replica with the lowest measured latency -- and every
+other method keeps writing to the primary.
+
+Replicas are health-checked lazily, at most every ``check_interval``
+seconds, when a read asks for one: a replica that cannot be reached, or
+whose replay lag exceeds ``max_lag`` seconds, is skipped until a later check
+passes. If no replica is usable, reads go to the primary. A read that loses
+its replica -- an operational or interface error, or an invalidated
+connection -- marks it down and is retried on the primary, so a replica that
+dies between checks costs one failed attempt. Other database errors, such as
+bad input, are the query's and are raised as they are.
+
+Like :mod:`refget.agents`, this is a database module and requires
+``pip install 'refget[db]'``.
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from ._deps import require
+
+require("refget.replicas (read-replica routing)", "db", "sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError  # noqa: E402
+
+from .const import _LOGGER  # noqa: E402
+
+ROUND_ROBIN = "round_robin"
+LEAST_LATENCY = "least_latency"
+
+# Seconds between health checks of one replica
+REPLICA_CHECK_INTERVAL = 30
+
+# Weight of the newest sample in a replica's moving-average latency
+LATENCY_SMOOTHING = 0.3
+
+# Replay lag of a PostgreSQL standby, in seconds; 0 on a primary, and on a
+# standby that has replayed everything it received (an idle primary sends
+# nothing, so the last replay timestamp alone would read as growing lag).
+_PG_REPLICA_LAG = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# The engine reads resolve to inside a read_only method, if not the primary
+_READ_ENGINE: ContextVar[Optional[Engine]] = ContextVar("refget_read_engine", default=None)
+
+
+class Replica:
+    """One read replica and what its last health check found"""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.lag: Optional[float] = None
+
+    def record_latency(self, seconds: float) -> None:
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+
+    def __repr__(self) -> str:
+        return (
+            f"Replica({self.engine.url!r}, healthy={self.healthy}, "
+            f"latency={self.latency}, lag={self.lag})"
+        )
+
+
+class ReplicaSet:
+    """
+    A primary engine and the read replicas that reads are routed to
+
+    Args:
+        primary: Engine of the primary; all writes, and reads with no usable replica
+        replicas: Replica engines, or URLs to create them from
+        strategy: ``"round_robin"`` or ``"least_latency"``
+        max_lag: Skip replicas more than this many seconds behind (None: no limit)
+        check_interval: Seconds between health checks of one replica
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine | str],
+        strategy: str = ROUND_ROBIN,
+        max_lag: Optional[float] = None,
+        check_interval: float = REPLICA_CHECK_INTERVAL,
+    ) -> None:
+        if strategy not in (ROUND_ROBIN, LEAST_LATENCY):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.primary = primary
+        self.replicas = [
+            Replica(r if isinstance(r, Engine) else create_engine(r, pool_pre_ping=True))
+            for r in replicas
+        ]
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def read_engine(self) -> Engine:
+        """The engine for the next read: a usable replica, else the primary"""
+        usable = [r for r in self._checked() if r.healthy]
+        if not usable:
+            return self.primary
+        if self.strategy == LEAST_LATENCY:
+            return min(usable, key=lambda r: r.latency or 0.0).engine
+        return usable[next(self._turn) % len(usable)].engine
+
+    def _checked(self) -> List[Replica]:
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                r
+                for r in self.replicas
+                if r.checked_at is None or now - r.checked_at >= self.check_interval
+            ]
+            # Claimed under the lock, so concurrent reads do not all probe.
+            for replica in due:
+                replica.checked_at = now
+        for replica in due:
+            self.check(replica)
+        return self.replicas
+
+    def check(self, replica: Replica) -> bool:
+        """Probe a replica's latency and lag, and record whether it is usable"""
+        started = time.perf_counter()
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag = self.lag(conn)
+            replica.record_latency(time.perf_counter() - started)
+        except DBAPIError as e:
+            _LOGGER.warning(f"Read replica {replica.engine.url!r} is unreachable: {e}")
+            replica.healthy = False
+            return False
+        replica.checked_at = time.monotonic()
+        replica.healthy = self.max_lag is None or replica.lag <= self.max_lag
+        if not replica.healthy:
+            _LOGGER.warning(
+                f"Read replica {replica.engine.url!r} is {replica.lag:.1f}s behind "
+                f"(tolerance {self.max_lag}s); reading elsewhere"
+            )
+        return replica.healthy
+
+    @staticmethod
+    def lag(conn) -> float:
+        """Seconds the database behind ``conn`` lags its primary"""
+        if conn.dialect.name != "postgresql":
+            conn.exec_driver_sql("SELECT 1")
+            return 0.0
+        return float(conn.execute(_PG_REPLICA_LAG).scalar() or 0)
+
+    def mark_down(self, engine: Engine) -> None:
+        """Take a replica out of rotation until its next health check"""
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+
+    def record_latency(self, engine: Engine, seconds: float) -> None:
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.record_latency(seconds)
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+class ReplicaRouted:
+    """
+    Mixin for agents: ``engine`` is a replica inside :func:`read_only` methods
+
+    Assigning ``engine`` sets the primary. ``replicas`` is the agent's
+    :class:`ReplicaSet`, or None to use the primary for everything.
+    """
+
+    replicas: Optional[ReplicaSet] = None
+
+    @property
+    def engine(self) -> Engine:
+        return _READ_ENGINE.get() or self._engine
+
+    @engine.setter
+    def engine(self, engine: Engine) -> None:
+        self._engine = engine
+
+
+def read_only(method):
+    """
+    Route a ReplicaRouted method to a read replica, falling back to the primary
+
+    Nested read-only calls share the replica the outermost one chose; a
+    database error there is retried once, on the primary, by that outermost
+    call.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.replicas is None or _READ_ENGINE.get() is not None:
+            return method(self, *args, **kwargs)
+        engine = self.replicas.read_engine()
+        if engine is self.replicas.primary:
+            return method(self, *args, **kwargs)
+        token = _READ_ENGINE.set(engine)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except DBAPIError as e:
+            if not _replica_failed(e):
+                raise
+            _LOGGER.warning(f"Read on replica {engine.url!r} failed, retrying on primary: {e}")
+            self.replicas.mark_down(engine)
+            _READ_ENGINE.reset(token)
+            token = None
+            return method(self, *args, **kwargs)
+        finally:
+            if token is not None:
+                _READ_ENGINE.reset(token)
+        self.replicas.record_latency(engine, time.perf_counter() - started)
+        return result
+
+    return wrapper
+
+
+def _replica_failed(error: DBAPIError) -> bool:
+    """Whether an error is the replica's (connection lost, server down), not the query's"""
+    return isinstance(error, (OperationalError, InterfaceError)) or error.connection_invalidated
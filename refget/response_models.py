@@ -35,6 +35,7 @@ class PaginationResult(BaseModel):
     page: int = 0
     page_size: int = 10
     total: int
+    next_after: Optional[str] = None
 
 
 class ResultsSequenceCollections(BaseModel):
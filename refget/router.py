@@ -14,6 +14,7 @@ router = create_refget_router(sequences=False, collections=True, pangenomes=Fals
 app.include_router(router, prefix="/seqcol")
 setup_backend(app, store=readonly_store)  # store backend (no database)
 # OR: setup_backend(app, engine=engine)   # PostgreSQL via RefgetDBAgent
+# OR: setup_backend(app, store=readonly_store, engine=engine)  # hybrid
 
 For concurrent serving, ``store`` should be a fully loaded ReadonlyRefgetStore
 (see refget.store), obtained via ``RefgetStore.into_readonly()``.
@@ -32,6 +33,8 @@ touches the database, and it imports :class:`refget.agents.RefgetDBAgent`
 inside that branch.
 """
 
+import inspect
+import json
 import logging
 
 from ._deps import require
@@ -44,20 +47,26 @@ require("refget.router (the sequence collections router)", "seqcolapi", "fastapi
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response  # noqa: E402
 from fastapi.responses import StreamingResponse  # noqa: E402
 
-from .backend import SeqColBackend  # noqa: E402
+from .backend import SeqColBackend, maybe_await  # noqa: E402
 from .examples import *  # noqa: E402
 from .response_models import PaginatedDigestList, Similarities  # noqa: E402
 
 _LOGGER = logging.getLogger(__name__)
 
-# Import the global variable from the router
+# Legacy process-wide SCOM targets and router configuration. Both are shared by
+# every app in the process, so a host serving several stores cannot use them:
+# SCOM targets now live on ``app.state.scom_targets`` (see setup_scom_targets)
+# and router configuration on the router itself (``router.refget_config``).
+# They are still read as a fallback / still written, for callers that predate that.
 _SAMPLE_DIGESTS: dict[str, list[str]] = {}
-
-# Router configuration exposed for service-info endpoints
 _ROUTER_CONFIG: dict = {}
 
+# Items serialized per chunk when streaming itemwise collections
+ITEMWISE_CHUNK_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
-def setup_backend(app, store=None, engine=None):
+def setup_backend(app, store=None, engine=None, async_engine=None):
     """Configure the seqcol backend on a FastAPI app.
 
     Pass a store to serve from the store (no database needed). For concurrent
@@ -66,24 +75,68 @@ def setup_backend(app, store=None, engine=None):
     caller's responsibility. ``setup_backend`` simply wraps whatever store it
     is given in a RefgetStoreBackend.
     Pass a SQLAlchemy engine to serve from PostgreSQL via RefgetDBAgent.
+    Pass ``async_engine`` -- a SQLAlchemy AsyncEngine, or a database URL with an
+    asyncio driver -- to serve the seqcol endpoints from AsyncRefgetDBAgent,
+    which the router awaits; an ``engine`` given alongside it still serves the
+    database-only endpoints (sequences, pangenomes, DRS).
+    Pass both ``store`` and ``engine`` to serve a HybridBackend: metadata from
+    the database, sequences and regions from the store.
     """
-    if store is not None:
+    if store is not None and engine is not None:
+        from .agents import RefgetDBAgent
+        from .backend import HybridBackend
+
+        hybrid = HybridBackend(RefgetDBAgent(engine=engine), store)
+        app.state.dbagent = hybrid
+        app.state.backend = hybrid
+    elif store is not None:
         from .backend import RefgetStoreBackend
 
         app.state.backend = RefgetStoreBackend(store)
-    elif engine is not None:
-        from .agents import RefgetDBAgent
-
-        dbagent = RefgetDBAgent(engine=engine)
-        app.state.dbagent = dbagent
-        app.state.backend = dbagent
+    elif engine is not None or async_engine is not None:
+        if engine is not None:
+            from .agents import RefgetDBAgent
+
+            dbagent = RefgetDBAgent(engine=engine)
+            app.state.dbagent = dbagent
+            app.state.backend = dbagent
+        if async_engine is not None:
+            from sqlalchemy.ext.asyncio import AsyncEngine
+
+            from .async_agents import AsyncRefgetDBAgent
+
+            if isinstance(async_engine, AsyncEngine):
+                app.state.backend = AsyncRefgetDBAgent(engine=async_engine)
+            else:
+                app.state.backend = AsyncRefgetDBAgent(url=async_engine)
     else:
         raise ValueError("setup_backend requires either store or engine")
 
 
 async def get_backend(request: Request) -> SeqColBackend:
-    """Get the SeqColBackend from the app state."""
-    return request.app.state.backend
+    """Get the SeqColBackend from the app state.
+
+    A freshness middleware pins the backend for the whole request (see
+    :mod:`refget.middleware`), so a reload cannot swap it out mid-request.
+    """
+    pinned = getattr(request.state, "backend", None)
+    return request.app.state.backend if pinned is None else pinned
+
+
+def setup_scom_targets(app, targets: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Bind SCOM similarity targets (``{species: [digest, ...]}``) to one app.
+
+    The dict is stored by reference, so a caller may keep filling it in (e.g.
+    from a lifespan) after the app is built. Returns the bound dict.
+    """
+    app.state.scom_targets = targets
+    return targets
+
+
+async def get_scom_targets(request: Request) -> dict[str, list[str]]:
+    """SCOM targets bound to the serving app, else the legacy process global."""
+    targets = getattr(request.app.state, "scom_targets", None)
+    return _SAMPLE_DIGESTS if targets is None else targets
 
 
 async def get_dbagent(request: Request):
@@ -211,11 +264,13 @@ def create_refget_router(
         app.include_router(create_refget_router(fasta_drs=True), prefix="/seqcol")
         ```
     """
-    # Store config for service-info discovery
-    _ROUTER_CONFIG["fasta_drs"] = fasta_drs
-    _ROUTER_CONFIG["refget_store_url"] = refget_store_url
+    # Store config for service-info discovery. The router carries its own copy;
+    # the module-level one only ever describes the last router created.
+    config = {"fasta_drs": fasta_drs, "refget_store_url": refget_store_url}
+    _ROUTER_CONFIG.update(config)
 
     refget_router = APIRouter()
+    refget_router.refget_config = config
     if sequences:
         _LOGGER.info("Adding sequence endpoints...")
         refget_router.include_router(seq_router)
@@ -249,6 +304,9 @@ async def sequence(
     end: int | None = Query(None, description="End position (0-based, exclusive)"),
     dbagent=Depends(get_dbagent),
 ):
+    if start is None and end is None:
+        # Stream block by block rather than building a whole chromosome in memory.
+        return StreamingResponse(dbagent.seq.stream(sequence_digest), media_type="text/plain")
     return Response(content=dbagent.seq.get(sequence_digest, start, end), media_type="text/plain")
 
 
@@ -270,12 +328,15 @@ seqcol_router = APIRouter()
     tags=["Retrieving data"],
 )
 async def collection(
+    request: Request,
     collection_digest: str = example_collection_digest,
     level: int | None = Query(None, description="Recursion depth (1 or 2)", ge=1, le=2),
     collated: bool = Query(True, description="Return collated format (arrays) vs itemwise"),
     attribute: str | None = Query(
         None, description="Return only this attribute (e.g., 'names', 'lengths')"
     ),
+    offset: int = Query(0, ge=0, description="Itemwise only: index of the first item"),
+    limit: int | None = Query(None, ge=0, description="Itemwise only: maximum items to return"),
     backend=Depends(get_backend),
 ):
     if level is None:
@@ -287,10 +348,17 @@ async def collection(
         )
     try:
         if not collated:
-            return backend.get_collection_itemwise(collection_digest, limit=10000)
+            items = await maybe_await(
+                backend.iter_collection_itemwise(collection_digest, offset=offset, limit=limit)
+            )
+            if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+                return StreamingResponse(_stream_ndjson(items), media_type=NDJSON_MEDIA_TYPE)
+            return StreamingResponse(_stream_json_array(items), media_type="application/json")
         if attribute:
-            return backend.get_collection_attribute(collection_digest, attribute)
-        return backend.get_collection(collection_digest, level=level)
+            return await maybe_await(
+                backend.get_collection_attribute(collection_digest, attribute)
+            )
+        return await maybe_await(backend.get_collection(collection_digest, level=level))
     except ValueError as e:
         raise HTTPException(
             status_code=404,
@@ -298,6 +366,41 @@ async def collection(
         )
 
 
+def _stream_json_array(items, chunk_size: int = ITEMWISE_CHUNK_SIZE):
+    """Serialize an item iterator as one JSON array, ``chunk_size`` items per chunk."""
+    yield "["
+    first = True
+    for chunk in _chunked(items, chunk_size):
+        body = ",".join(json.dumps(item, separators=(",", ":")) for item in chunk)
+        yield body if first else "," + body
+        first = False
+    yield "]"
+
+
+def _stream_pangenome_level4(names: list, collections):
+    """Serialize a level 4 pangenome, one chunk of collections at a time."""
+    yield '{"names":' + json.dumps(names, separators=(",", ":")) + ',"collections":'
+    yield from _stream_json_array(collections, chunk_size=1)
+    yield "}"
+
+
+def _stream_ndjson(items, chunk_size: int = ITEMWISE_CHUNK_SIZE):
+    """Serialize an item iterator as newline-delimited JSON."""
+    for chunk in _chunked(items, chunk_size):
+        yield "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in chunk)
+
+
+def _chunked(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 @seqcol_router.get(
     "/attribute/collection/{attribute_name}/{attribute_digest}",
     summary="Retrieve a single attribute of a sequence collection",
@@ -309,7 +412,7 @@ async def attribute(
     backend=Depends(get_backend),
 ):
     try:
-        return backend.get_attribute(attribute_name, attribute_digest)
+        return await maybe_await(backend.get_attribute(attribute_name, attribute_digest))
     except KeyError:
         raise HTTPException(
             status_code=404,
@@ -336,7 +439,9 @@ async def compare_2_digests(
     result = {}
     result["digests"] = {"a": collection_digest1, "b": collection_digest2}
     try:
-        result.update(backend.compare_digests(collection_digest1, collection_digest2))
+        result.update(
+            await maybe_await(backend.compare_digests(collection_digest1, collection_digest2))
+        )
     except ValueError as e:
         _LOGGER.debug(e)
         raise HTTPException(
@@ -358,14 +463,23 @@ async def calc_similarities(
     page_size: int = Query(50, description="Number of results per page"),
     page: int = Query(0, description="Page number (0-indexed)"),
     backend=Depends(get_backend),
+    scom_targets=Depends(get_scom_targets),
 ) -> Similarities:
     _LOGGER.info("Calculating Jaccard similarities...")
     try:
-        seqcolA = backend.get_collection(collection_digest, level=2)
+        seqcolA = await maybe_await(backend.get_collection(collection_digest, level=2))
     except (ValueError, KeyError):
         raise HTTPException(status_code=404, detail="Collection not found")
 
-    return await _compute_similarities(seqcolA, species, page_size, page, backend)
+    return await _compute_similarities(
+        seqcolA,
+        species,
+        page_size,
+        page,
+        backend,
+        scom_targets,
+        query_digest=collection_digest,
+    )
 
 
 @seqcol_router.post(
@@ -380,8 +494,9 @@ async def calc_similarities_from_json(
     page_size: int = Query(50, description="Number of results per page"),
     page: int = Query(0, description="Page number (0-indexed)"),
     backend=Depends(get_backend),
+    scom_targets=Depends(get_scom_targets),
 ) -> Similarities:
-    return await _compute_similarities(seqcolA, species, page_size, page, backend)
+    return await _compute_similarities(seqcolA, species, page_size, page, backend, scom_targets)
 
 
 async def _compute_similarities(
@@ -390,13 +505,19 @@ async def _compute_similarities(
     page_size: int,
     page: int,
     backend: SeqColBackend,
+    scom_targets: dict[str, list[str]],
+    query_digest: str | None = None,
 ) -> Similarities:
-    """Shared implementation for both similarity endpoints."""
+    """Shared implementation for both similarity endpoints.
+
+    ``query_digest`` identifies the query collection when it is a stored one,
+    letting the backend reuse a ranking across pages without re-digesting it.
+    """
     try:
         # Get target digests for species if configured
-        target_digests = _SAMPLE_DIGESTS.get(species.lower()) if _SAMPLE_DIGESTS else None
+        target_digests = scom_targets.get(species.lower()) if scom_targets else None
 
-        if not _SAMPLE_DIGESTS:
+        if not scom_targets:
             raise HTTPException(
                 status_code=501,
                 detail="Similarities not configured. No scom_config.json found.",
@@ -404,11 +525,17 @@ async def _compute_similarities(
         if not target_digests:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid species '{species}'. Choose from: {list(_SAMPLE_DIGESTS.keys())}",
+                detail=f"Invalid species '{species}'. Choose from: {list(scom_targets.keys())}",
             )
 
-        result = backend.compute_similarities(
-            seqcolA, page=page, page_size=page_size, target_digests=target_digests
+        result = await maybe_await(
+            backend.compute_similarities(
+                seqcolA,
+                page=page,
+                page_size=page_size,
+                target_digests=target_digests,
+                query_digest=query_digest,
+            )
         )
         return Similarities(**result)
     except HTTPException:
@@ -434,7 +561,9 @@ async def compare_1_digest(
     result = {}
     result["digests"] = {"a": collection_digest1, "b": "POSTed seqcol"}
     try:
-        result.update(backend.compare_digest_with_level2(collection_digest1, seqcolB))
+        result.update(
+            await maybe_await(backend.compare_digest_with_level2(collection_digest1, seqcolB))
+        )
     except ValueError as e:
         _LOGGER.debug(e)
         raise HTTPException(
@@ -449,10 +578,16 @@ async def compare_1_digest(
     summary="List sequence collections on the server",
     tags=["Discovering data"],
     response_model=PaginatedDigestList,
+    response_model_exclude_none=True,
 )
 async def list_collections_by_offset(
     page_size: int = Query(100, description="Number of results per page"),
     page: int = Query(0, description="Page number (0-indexed)"),
+    after: str | None = Query(
+        None,
+        description="Return the page after this digest (the previous page's `next_after`); "
+        "overrides `page`",
+    ),
     names: str | None = Query(None, description="Filter by names attribute digest"),
     lengths: str | None = Query(None, description="Filter by lengths attribute digest"),
     sequences: str | None = Query(None, description="Filter by sequences attribute digest"),
@@ -473,8 +608,19 @@ async def list_collections_by_offset(
         if v is not None
     }
 
+    kwargs = {}
+    if after is not None:
+        if "after" not in inspect.signature(backend.list_collections).parameters:
+            raise HTTPException(
+                status_code=400, detail="This server does not support `after` pagination"
+            )
+        kwargs["after"] = after
     try:
-        res = backend.list_collections(page=page, page_size=page_size, filters=filters or None)
+        res = await maybe_await(
+            backend.list_collections(
+                page=page, page_size=page_size, filters=filters or None, **kwargs
+            )
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -496,7 +642,9 @@ async def list_attributes(
     page: int = Query(0, description="Page number (0-indexed)"),
 ):
     try:
-        return backend.list_attributes(attribute, page=page, page_size=page_size)
+        return await maybe_await(
+            backend.list_attributes(attribute, page=page, page_size=page_size)
+        )
     except KeyError:
         raise HTTPException(
             status_code=404,
@@ -534,7 +682,7 @@ async def resolve_alias(
 ):
     _validate_alias_kind(kind)
     resolve = _require_backend_method(backend, "resolve_alias")
-    digest = resolve(kind, namespace, alias)
+    digest = await maybe_await(resolve(kind, namespace, alias))
     if digest is None:
         raise HTTPException(status_code=404, detail="Alias not found")
     return {"namespace": namespace, "alias": alias, "digest": digest}
@@ -548,7 +696,7 @@ async def resolve_alias(
 async def list_alias_namespaces(kind: str, backend=Depends(get_backend)):
     _validate_alias_kind(kind)
     method = _require_backend_method(backend, "list_alias_namespaces")
-    return {"namespaces": method(kind)}
+    return {"namespaces": await maybe_await(method(kind))}
 
 
 @seqcol_router.get(
@@ -559,7 +707,7 @@ async def list_alias_namespaces(kind: str, backend=Depends(get_backend)):
 async def list_aliases(kind: str, namespace: str, backend=Depends(get_backend)):
     _validate_alias_kind(kind)
     method = _require_backend_method(backend, "list_aliases")
-    return {"namespace": namespace, "aliases": method(kind, namespace)}
+    return {"namespace": namespace, "aliases": await maybe_await(method(kind, namespace))}
 
 
 @seqcol_router.get(
@@ -570,7 +718,7 @@ async def list_aliases(kind: str, namespace: str, backend=Depends(get_backend)):
 async def aliases_for(kind: str, digest: str, backend=Depends(get_backend)):
     _validate_alias_kind(kind)
     method = _require_backend_method(backend, "aliases_for")
-    return {"digest": digest, "aliases": method(kind, digest)}
+    return {"digest": digest, "aliases": await maybe_await(method(kind, digest))}
 
 
 @seqcol_router.get(
@@ -580,7 +728,7 @@ async def aliases_for(kind: str, digest: str, backend=Depends(get_backend)):
 )
 async def collection_fhr(collection_digest: str, backend=Depends(get_backend)):
     method = _require_backend_method(backend, "get_fhr")
-    fhr = method(collection_digest)
+    fhr = await maybe_await(method(collection_digest))
     if fhr is None:
         raise HTTPException(status_code=404, detail="FHR metadata not found")
     return fhr
@@ -593,7 +741,7 @@ async def collection_fhr(collection_digest: str, backend=Depends(get_backend)):
 )
 async def list_fhr(backend=Depends(get_backend)):
     method = _require_backend_method(backend, "list_fhr")
-    return {"collections": method()}
+    return {"collections": await maybe_await(method())}
 
 
 @seqcol_router.post(
@@ -610,12 +758,12 @@ async def collection_regions(
 
     Body is a JSON list of {"chrom", "start", "end"} objects. Returns a list of
     {"chrom_name", "start", "end", "sequence"} records. Requires a backend that
-    can extract sequence bytes (RefgetStoreBackend); the database backend
-    returns HTTP 501.
+    can extract sequence bytes (RefgetStoreBackend, HybridBackend); the
+    database backend returns HTTP 501.
     """
     method = _require_backend_method(backend, "substrings_from_regions")
     try:
-        return method(collection_digest, regions)
+        return await maybe_await(method(collection_digest, regions))
     except NotImplementedError as e:
         raise HTTPException(status_code=501, detail=str(e))
     except (ValueError, KeyError, OSError, IOError):
@@ -666,7 +814,10 @@ async def pangenome(
         if level == 3:
             return dbagent.pangenome.get(pangenome_digest, return_format="level3")
         if level == 4:
-            return dbagent.pangenome.get(pangenome_digest, return_format="level4")
+            names, collections = dbagent.pangenome.iter_level4(pangenome_digest)
+            return StreamingResponse(
+                _stream_pangenome_level4(names, collections), media_type="application/json"
+            )
         if level > 4:
             raise HTTPException(
                 status_code=400,
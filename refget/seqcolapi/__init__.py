@@ -50,6 +50,7 @@ from refget.const import ALL_VERSIONS  # noqa: E402
 from .app import (
     DEFAULT_CACHE_DIR,
     create_seqcol_app,
+    create_seqcol_host,
     load_seqcol_schema,
     prepare_store,
     store_service_info,
@@ -62,6 +63,7 @@ __all__ = [
     "STATIC_DIRNAME",
     "STATIC_PATH",
     "create_seqcol_app",
+    "create_seqcol_host",
     "load_seqcol_schema",
     "prepare_store",
     "store_service_info",
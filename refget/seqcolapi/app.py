@@ -21,22 +21,19 @@ do::
     host.mount("/jungle", create_seqcol_app(store_path=url_a, remote=True))
     host.mount("/other", create_seqcol_app(store_path=url_b, remote=True))
 
-Serving several stores from one process is not a requirement today, and
-nothing here implements it. The point is only that the shape does not preclude
-it -- and the shape is not the whole story. Two process-global dicts in
-:mod:`refget.router` are shared by every router and every app in the process:
-
-* ``_ROUTER_CONFIG``, which :func:`refget.router.create_refget_router`
-  overwrites on each call, so it ends up describing whichever router was
-  created last. This app's ``/service-info`` never reads it (it closes over its
-  own arguments instead), but :mod:`refget.seqcolapi.dbapp` and refgenie's
-  server both do, so a process that builds several routers cannot trust it.
-* ``_SAMPLE_DIGESTS``, the SCOM target digests, which are likewise per-process
-  and not per-app.
-
-So: per-mount backend, service-info and freshness, yes. Per-mount *router
-configuration*, no. Genuinely serving several distinct stores from one process
-would have to deal with those two globals first.
+Everything a request needs is resolved per app: the backend from
+``app.state.backend``, the SCOM similarity targets from
+``app.state.scom_targets`` (bound by :func:`refget.router.setup_scom_targets`),
+and service-info from this factory's own arguments. :func:`create_seqcol_host`
+builds such a host from a mapping of prefixes to app settings, so one process
+can serve several stores instead of paying one process per store.
+
+Two things remain shared by design. The legacy process-global
+``_ROUTER_CONFIG`` and ``_SAMPLE_DIGESTS`` in :mod:`refget.router` are kept for
+callers that predate per-app state (``_SAMPLE_DIGESTS`` is only a fallback for
+apps with no ``scom_targets`` of their own). And the similarity-ranking cache,
+:data:`refget.backend.SIMILARITY_CACHE`, has one memory budget for the whole
+process, so mounting six stores does not mean six cache budgets.
 
 Typical use::
 
@@ -56,11 +53,14 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from refget.backend import maybe_await
 from refget.const import ALL_VERSIONS, SEQCOL_SCHEMA_PATH, SEQCOL_SPEC_VERSION
-from refget.middleware import StoreFreshnessMiddleware
-from refget.router import create_refget_router, setup_backend
+from refget.middleware import StoreFreshnessMiddleware, pull_sidecars
+from refget.router import create_refget_router, setup_backend, setup_scom_targets
 from refget.store import RefgetStore
 
+from .prewarm import Prewarmer
+
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_CACHE_DIR = "/tmp/seqcol_cache"
@@ -95,6 +95,8 @@ def prepare_store(
     """
     if remote:
         store = RefgetStore.open_remote(cache_dir, store_path)
+        # A remote store's aliases and FHR metadata are separate sidecar files.
+        pull_sidecars(store)
     else:
         store = RefgetStore.on_disk(store_path)
 
@@ -194,6 +196,10 @@ def create_seqcol_app(
     contact_url: str | None = None,
     documentation_url: str | None = None,
     service_info_extra=None,
+    scom_targets: dict[str, list[str]] | None = None,
+    prewarm: bool = False,
+    hot_manifest: str | None = None,
+    prewarm_top_n: int = 100,
     sequences: bool = False,
     collections: bool = True,
     pangenomes: bool = False,
@@ -201,6 +207,7 @@ def create_seqcol_app(
     compliance: bool = True,
     freshness: bool | None = None,
     freshness_interval: int = 300,
+    memory_budget: int | None = None,
     cors: bool = True,
     defer_backend: bool = False,
     title: str = "Sequence Collections API (Store-backed)",
@@ -224,8 +231,23 @@ def create_seqcol_app(
         service_info_extra: Extra ``seqcol`` keys for service-info. Either a
             dict or a zero-argument callable evaluated per request (seqcolapi
             uses the callable form because its SCOM digests load lazily).
+        scom_targets: SCOM similarity targets for this app only,
+            ``{species: [digest, ...]}``. Bound by reference, so it may be
+            filled in after the app is built.
+        prewarm: Warm the caches for the SCOM targets and the hot-key
+            manifest's top ``prewarm_top_n`` digests on a background thread,
+            at start-up and after every freshness reload. Progress is reported
+            in ``/service-info`` under ``seqcol.prewarm``.
+        hot_manifest: Path of the hot-key manifest (see
+            :mod:`refget.seqcolapi.prewarm`). It is read when prewarming and
+            rewritten periodically with this app's most requested digests.
         freshness: Attach ``StoreFreshnessMiddleware`` so the app picks up a
             republished store without a restart. Defaults to ``remote``.
+        memory_budget: Resident-memory budget in bytes for freshness reloads;
+            a reload that would exceed it is postponed (see
+            :class:`~refget.middleware.StoreFreshnessMiddleware`). Swap timings
+            and memory estimates appear in ``/service-info`` under
+            ``seqcol.freshness``.
         cors: Add a permissive CORS middleware. Set False when the host app
             already installs one.
         defer_backend: Build the routes now but do not open or bind a store.
@@ -233,7 +255,8 @@ def create_seqcol_app(
             store=...)`` before the first request. Mounted sub-applications do
             not receive their own lifespan events, so a host app that wants to
             open the store on startup rather than at import time has to mount
-            the routes early and bind the backend from *its* lifespan.
+            the routes early and bind the backend from *its* lifespan. With
+            ``prewarm``, it should then also call ``app.state.prewarmer.start()``.
 
     Returns:
         A FastAPI application ready to serve standalone or to ``app.mount()``.
@@ -261,6 +284,20 @@ def create_seqcol_app(
 
     if store is not None:
         setup_backend(app, store=store)
+    if scom_targets is not None:
+        setup_scom_targets(app, scom_targets)
+    prewarmer = None
+    if prewarm or hot_manifest:
+        prewarmer = Prewarmer(
+            lambda: getattr(app.state, "backend", None),
+            scom_targets=scom_targets,
+            hot_manifest=hot_manifest,
+            top_n=prewarm_top_n,
+            warm=prewarm,
+        )
+        app.state.prewarmer = prewarmer
+        if store is not None:
+            prewarmer.start()
     app.include_router(
         create_refget_router(
             sequences=sequences,
@@ -282,13 +319,23 @@ def create_seqcol_app(
             store_url=store_path,
             cache_dir=cache_dir,
             check_interval=freshness_interval,
+            memory_budget=memory_budget,
         )
 
     @app.get("/service-info", summary="GA4GH service info", tags=["General endpoints"])
     async def service_info():
         backend = getattr(app.state, "backend", None)
-        caps = backend.capabilities() if backend and hasattr(backend, "capabilities") else {}
+        caps = (
+            await maybe_await(backend.capabilities())
+            if backend and hasattr(backend, "capabilities")
+            else {}
+        )
         extra = service_info_extra() if callable(service_info_extra) else service_info_extra
+        if prewarmer is not None:
+            extra = {**(extra or {}), "prewarm": prewarmer.status()}
+        freshness_stats = getattr(app.state, "freshness", None)
+        if freshness_stats is not None:
+            extra = {**(extra or {}), "freshness": dict(freshness_stats)}
         return store_service_info(
             service_info_id=service_info_id,
             service_info_name=service_info_name,
@@ -302,3 +349,48 @@ def create_seqcol_app(
         )
 
     return app
+
+
+def create_seqcol_host(
+    mounts: dict,
+    *,
+    title: str = "Sequence Collections API (multi-store)",
+    cors: bool = True,
+):
+    """Serve several stores from one process by mounting one seqcol app per prefix.
+
+    Args:
+        mounts: ``{prefix: app_or_kwargs}``. Each value is either an app built
+            by :func:`create_seqcol_app` or a dict of keyword arguments for it.
+            CORS is installed once on the host, so apps built here from kwargs
+            default to ``cors=False``.
+        title: Title of the host app.
+        cors: Add a permissive CORS middleware to the host.
+
+    Returns:
+        A FastAPI host app. ``GET /`` lists the mounted prefixes.
+    """
+    host = FastAPI(title=title, version=ALL_VERSIONS["refget_version"])
+
+    if cors:
+        host.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    prefixes = []
+    for prefix, spec in mounts.items():
+        prefix = "/" + prefix.strip("/")
+        sub_app = create_seqcol_app(**{"cors": False, **spec}) if isinstance(spec, dict) else spec
+        host.mount(prefix, sub_app)
+        prefixes.append(prefix)
+        _LOGGER.info(f"Mounted seqcol app at {prefix}")
+
+    @host.get("/", summary="List mounted seqcol services", tags=["General endpoints"])
+    async def list_mounts():
+        return {"mounts": prefixes}
+
+    return host
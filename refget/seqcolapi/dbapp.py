@@ -13,8 +13,9 @@ while ``uvicorn seqcolapi.main:app`` still needs
 ``pip install 'refget[seqcolapi,db]'``.
 
 Importing this module connects to PostgreSQL (via
-``setup_backend(app, engine=RefgetDBAgent().engine)``) unless ``REFGET_STORE_URL``
-or ``REFGET_STORE_PATH`` is set. Ask for the app by name; do not import this
+``setup_backend(app, engine=RefgetDBAgent().engine)``; with ``REFGET_ASYNC_DB=1``
+the seqcol endpoints are served by the asyncio agent) unless ``REFGET_STORE_URL``,
+``REFGET_STORE_PATH`` or ``REFGET_STORES`` is set. Ask for the app by name; do not import this
 module for its side effects.
 """
 
@@ -41,14 +42,15 @@ from sqlmodel import Session, select  # noqa: E402
 from starlette.requests import Request  # noqa: E402
 from starlette.staticfiles import StaticFiles  # noqa: E402
 
-from refget.agents import RefgetDBAgent  # noqa: E402
+from refget.agents import RefgetDBAgent, postgres_url_from_env  # noqa: E402
+from refget.backend import maybe_await  # noqa: E402
 from refget.const import HUMANS_SAMPLE_LIST, MOUSE_SAMPLES_LIST  # noqa: E402
 from refget.models import HumanReadableNames  # noqa: E402
+from refget.query_metrics import QUERY_METRICS, QueryEndpointMiddleware  # noqa: E402
 from refget.router import (  # noqa: E402
-    _ROUTER_CONFIG,
-    _SAMPLE_DIGESTS,
     create_refget_router,
     setup_backend,
+    setup_scom_targets,
 )
 
 from .const import ALL_VERSIONS, STATIC_DIRNAME, STATIC_PATH  # noqa: E402
@@ -57,6 +59,25 @@ from .examples import *  # noqa: E402,F401,F403
 _LOGGER = logging.getLogger(__name__)
 
 
+def _bind_database(app):
+    """Bind the database backend: RefgetDBAgent, plus AsyncRefgetDBAgent for the
+    seqcol endpoints when ``REFGET_ASYNC_DB`` is set (needs the `db-async` extra).
+
+    With ``REFGET_SEQUENCE_STORE`` (a store path, or URL) set instead, sequences
+    and regions are served from that RefgetStore by a HybridBackend."""
+    sequence_store = os.environ.get("REFGET_SEQUENCE_STORE")
+    if sequence_store:
+        from .app import prepare_store
+
+        store = prepare_store(sequence_store, remote="://" in sequence_store)
+        setup_backend(app, store=store, engine=RefgetDBAgent().engine)
+        return
+    async_engine = None
+    if os.environ.get("REFGET_ASYNC_DB", "").lower() in ("1", "true", "yes"):
+        async_engine = postgres_url_from_env("postgresql+asyncpg")
+    setup_backend(app, engine=RefgetDBAgent().engine, async_engine=async_engine)
+
+
 @asynccontextmanager
 async def lifespan_loader(app):
     """
@@ -65,7 +86,8 @@ async def lifespan_loader(app):
     _LOGGER.info("Starting lifespan: Loading sample data...")
 
     # Initialize backend via setup_backend
-    setup_backend(app, engine=RefgetDBAgent().engine)
+    _bind_database(app)
+    scom_targets = setup_scom_targets(app, {})
 
     species_samples = {"human": HUMANS_SAMPLE_LIST, "mouse": MOUSE_SAMPLES_LIST}
 
@@ -81,12 +103,12 @@ async def lifespan_loader(app):
 
                 target_digests = [result.digest for result in results]
 
-            _SAMPLE_DIGESTS[species] = target_digests
+            scom_targets[species] = target_digests
             _LOGGER.info(f"Pre-loaded {len(target_digests)} digests for {species}")
 
         except Exception as e:
             _LOGGER.error(f"Error loading sample data for {species}: {e}")
-            _SAMPLE_DIGESTS[species] = []
+            scom_targets[species] = []
 
     _LOGGER.info("Lifespan startup complete: Sample data loaded")
 
@@ -94,7 +116,7 @@ async def lifespan_loader(app):
 
     # Cleanup
     _LOGGER.info("Lifespan shutdown: Cleaning up sample data...")
-    _SAMPLE_DIGESTS.clear()
+    scom_targets.clear()
 
 
 app = FastAPI(
@@ -113,6 +135,8 @@ app.add_middleware(  # This is a public API, so we allow all origins
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Names the endpoint being served in the slow-query log
+app.add_middleware(QueryEndpointMiddleware)
 
 # Configuration
 # RefgetStore URL (set to None if not using a backing store)
@@ -179,15 +203,19 @@ async def service_info():
         if hasattr(app.state, "dbagent")
         else None,
         "sorted_name_length_pairs": True,
-        "fasta_drs": {"enabled": _ROUTER_CONFIG.get("fasta_drs", False)},
+        "fasta_drs": {"enabled": refget_router.refget_config.get("fasta_drs", False)},
     }
 
     # Get backend capabilities
     backend = getattr(app.state, "backend", None)
-    caps = backend.capabilities() if backend and hasattr(backend, "capabilities") else {}
+    caps = (
+        await maybe_await(backend.capabilities())
+        if backend and hasattr(backend, "capabilities")
+        else {}
+    )
 
     # Add refget_store info
-    store_url = _ROUTER_CONFIG.get("refget_store_url")
+    store_url = refget_router.refget_config.get("refget_store_url")
     if store_url:
         seqcol_info["refget_store"] = {"enabled": True, "url": store_url, **caps}
     else:
@@ -200,6 +228,7 @@ async def service_info():
         )
     }
     seqcol_info["fhr_metadata"] = {"enabled": bool(caps.get("fhr_metadata_collections"))}
+    seqcol_info["queries"] = QUERY_METRICS.snapshot()
 
     return {
         "id": "org.databio.seqcolapi",
@@ -227,5 +256,5 @@ app.mount("/", StaticFiles(directory=STATIC_PATH), name=STATIC_DIRNAME)
 # Bind the database backend at import time, exactly as before the split -- but
 # not when the environment names a store, because then the caller wants
 # `store_app` and this module was only reached by an incidental attribute look-up.
-if not os.environ.get("REFGET_STORE_URL") and not os.environ.get("REFGET_STORE_PATH"):
-    setup_backend(app, engine=RefgetDBAgent().engine)
+if not any(os.environ.get(v) for v in ("REFGET_STORE_URL", "REFGET_STORE_PATH", "REFGET_STORES")):
+    _bind_database(app)
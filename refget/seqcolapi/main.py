@@ -5,8 +5,10 @@ things to install:
 
 ``store_app`` -- RefgetStore-backed, no database
     Built here, eagerly, when ``REFGET_STORE_URL`` or ``REFGET_STORE_PATH`` is
-    set. Needs ``pip install 'refget[seqcolapi]'`` and nothing else: no
-    sqlmodel, no sqlalchemy, no psycopg2 anywhere in the environment::
+    set -- or, to serve several stores from one process, ``REFGET_STORES`` (a
+    JSON object of mount prefix to store path/URL). Needs
+    ``pip install 'refget[seqcolapi]'`` and nothing else: no sqlmodel, no
+    sqlalchemy, no psycopg2 anywhere in the environment::
 
         REFGET_STORE_PATH=/path/to/store uvicorn seqcolapi.main:store_app
 
@@ -27,9 +29,7 @@ gate; ``uvicorn seqcolapi.main:app`` does exactly that and nothing else does.
 import logging
 import os
 
-from refget.router import _SAMPLE_DIGESTS
-
-from .app import create_seqcol_app
+from .app import create_seqcol_app, create_seqcol_host
 from .const import ALL_VERSIONS
 
 global _LOGGER
@@ -37,10 +37,15 @@ _LOGGER = logging.getLogger(__name__)
 
 # `app` is resolved by __getattr__ below, and `store_app` only exists when the
 # environment names a store -- neither is a module-level binding here.
-__all__ = ["app", "store_app", "create_seqcolapi_store_app"]  # noqa: F822
+__all__ = [  # noqa: F822
+    "app",
+    "store_app",
+    "create_seqcolapi_store_app",
+    "create_seqcolapi_host_app",
+]
 
 
-def _load_scom_config(store_path: str, remote: bool):
+def _load_scom_config(store_path: str, remote: bool) -> dict[str, list[str]]:
     """Load SCOM target digests from a JSON config.
 
     Checks (in order):
@@ -48,11 +53,15 @@ def _load_scom_config(store_path: str, remote: bool):
     2. scom_config.json next to the store (convention)
 
     Format: {"human": ["digest1", "digest2", ...], "mouse": [...]}
+
+    Returns the targets for this store; empty when SCOM is disabled.
     """
     import json
     import os
     import urllib.request
 
+    targets: dict[str, list[str]] = {}
+
     # Try env var first
     config_url = os.environ.get("SCOM_CONFIG_URL")
 
@@ -66,23 +75,24 @@ def _load_scom_config(store_path: str, remote: bool):
                 with open(config_path) as f:
                     config = json.load(f)
                 for species, digests in config.items():
-                    _SAMPLE_DIGESTS[species] = digests
+                    targets[species] = digests
                     _LOGGER.info(f"SCOM: loaded {len(digests)} target digests for '{species}'")
-                return
+                return targets
             else:
                 _LOGGER.info(
                     "No SCOM_CONFIG_URL set and no scom_config.json found. SCOM disabled."
                 )
-                return
+                return targets
 
     try:
         with urllib.request.urlopen(config_url, timeout=10) as resp:
             config = json.loads(resp.read())
         for species, digests in config.items():
-            _SAMPLE_DIGESTS[species] = digests
+            targets[species] = digests
             _LOGGER.info(f"SCOM: loaded {len(digests)} target digests for '{species}'")
     except Exception as e:
         _LOGGER.info(f"Could not load SCOM config from {config_url} ({e}). SCOM disabled.")
+    return targets
 
 
 for key, value in ALL_VERSIONS.items():
@@ -90,7 +100,10 @@ for key, value in ALL_VERSIONS.items():
 
 
 def create_seqcolapi_store_app(
-    store_path: str, remote: bool = False, cache_dir: str = "/tmp/seqcol_cache"
+    store_path: str,
+    remote: bool = False,
+    cache_dir: str = "/tmp/seqcol_cache",
+    cors: bool = True,
 ):
     """Create *the seqcolapi deployment's* store-backed app (no database).
 
@@ -110,19 +123,23 @@ def create_seqcolapi_store_app(
         store_path: Path to store on disk, or S3 URL for remote stores.
         remote: If True, open as a remote (S3) store.
         cache_dir: Local cache directory for remote stores.
+        cors: Add a permissive CORS middleware. False when mounted in a host
+            app that installs its own.
 
     Returns:
         FastAPI app with store-backed seqcol endpoints.
     """
     # Load SCOM config: check SCOM_CONFIG_URL env var, then fall back to store convention
-    _load_scom_config(store_path, remote)
+    scom_targets = _load_scom_config(store_path, remote)
+    # Resident-memory budget (bytes) for freshness reloads
+    memory_budget = os.environ.get("REFGET_MEMORY_BUDGET")
 
     def _scom_block():
-        # Evaluated per request, because _SAMPLE_DIGESTS can be repopulated.
+        # Evaluated per request, because the bound targets can be repopulated.
         return {
             "scom": {
-                "enabled": bool(_SAMPLE_DIGESTS),
-                "species": list(_SAMPLE_DIGESTS.keys()),
+                "enabled": bool(scom_targets),
+                "species": list(scom_targets.keys()),
             }
         }
 
@@ -136,13 +153,56 @@ def create_seqcolapi_store_app(
         service_info_id="org.databio.seqcolapi.store",
         service_info_name="Sequence collections (store-backed)",
         service_info_extra=_scom_block,
+        scom_targets=scom_targets,
+        # Warm the SCOM targets (and the recorded hot keys, if a manifest path
+        # is configured) in the background so the first requests are not cold.
+        prewarm=True,
+        hot_manifest=os.environ.get("REFGET_HOT_MANIFEST"),
+        memory_budget=int(memory_budget) if memory_budget else None,
+        cors=cors,
     )
 
 
+def create_seqcolapi_host_app(stores: dict[str, str], cache_dir: str = "/tmp/seqcol_cache"):
+    """Serve several stores from one process, one seqcolapi store app per prefix.
+
+    CORS is installed once, on the host. Each store reads its SCOM targets
+    from its own ``scom_config.json``; ``SCOM_CONFIG_URL``, if set, is one
+    config for the process and so gives every mounted store the same targets.
+
+    Args:
+        stores: ``{prefix: store_path_or_url}``. Values with a URL scheme are
+            opened as remote stores, anything else as a local path.
+        cache_dir: Local cache directory for remote stores; each store gets
+            its own subdirectory.
+
+    Returns:
+        A host app from :func:`refget.seqcolapi.create_seqcol_host`.
+    """
+    mounts = {}
+    for prefix, store_path in stores.items():
+        remote = "://" in store_path
+        mounts[prefix] = create_seqcolapi_store_app(
+            store_path,
+            remote=remote,
+            cache_dir=os.path.join(cache_dir, prefix.strip("/").replace("/", "_")),
+            cors=False,
+        )
+    return create_seqcol_host(mounts)
+
+
 _STORE_URL_ENV = os.environ.get("REFGET_STORE_URL")
 _STORE_PATH_ENV = os.environ.get("REFGET_STORE_PATH")
+# JSON object mapping mount prefixes to store paths/URLs, e.g.
+# {"/human": "s3://bucket/human/", "/mouse": "/data/mouse_store"}
+# Leave SCOM_CONFIG_URL unset with it: that one config would apply to every store.
+_STORES_ENV = os.environ.get("REFGET_STORES")
+
+if _STORES_ENV:
+    import json
 
-if _STORE_URL_ENV:
+    store_app = create_seqcolapi_host_app(json.loads(_STORES_ENV))
+elif _STORE_URL_ENV:
     store_app = create_seqcolapi_store_app(_STORE_URL_ENV, remote=True)
 elif _STORE_PATH_ENV:
     store_app = create_seqcolapi_store_app(_STORE_PATH_ENV, remote=False)
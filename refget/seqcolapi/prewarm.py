@@ -0,0 +1,164 @@
+"""Background cache prewarming for store-backed seqcol apps.
+
+A freshly built backend starts with empty caches, so the first requests for
+popular collections pay for building their level 2 and comparison inputs.
+:class:`Prewarmer` pays that up front, on a daemon thread, for:
+
+* the SCOM target digests, which every similarity request scores, and
+* the top-N digests of a *hot-key manifest*: a small JSON file listing the
+  most requested collections, which the prewarmer rewrites periodically from
+  the backend's own request counts so the next deploy knows what was hot.
+
+Progress is exposed through :meth:`Prewarmer.status`, which
+:func:`refget.seqcolapi.create_seqcol_app` reports in ``/service-info``.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def load_hot_manifest(path: str) -> list[str]:
+    """Read the digests from a hot-key manifest, most requested first.
+
+    A missing or unreadable manifest yields an empty list.
+    """
+    try:
+        with open(path) as f:
+            return list(json.load(f).get("digests", []))
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        _LOGGER.warning(f"Could not read hot-key manifest {path}: {e}")
+        return []
+
+
+def write_hot_manifest(path: str, digests: list[str]) -> None:
+    """Atomically write a hot-key manifest, so a crash never leaves half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"updated_at": time.time(), "digests": digests}, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class Prewarmer:
+    """Warm a backend's caches in the background and keep the hot-key manifest current.
+
+    Args:
+        get_backend: Zero-argument callable returning the backend to warm. A
+            callable rather than the backend itself, so a backend swapped in by
+            a freshness reload is the one that gets warmed.
+        scom_targets: ``{species: [digest, ...]}``; every digest is warmed.
+        hot_manifest: Path of the hot-key manifest to read at start-up and
+            rewrite every ``manifest_interval`` seconds. None disables it.
+        top_n: How many manifest digests to warm, and to record.
+        manifest_interval: Seconds between manifest writes.
+        warm: If False, only maintain the manifest; :meth:`start` warms nothing.
+    """
+
+    def __init__(
+        self,
+        get_backend,
+        scom_targets: dict[str, list[str]] | None = None,
+        hot_manifest: str | None = None,
+        top_n: int = 100,
+        manifest_interval: int = 600,
+        warm: bool = True,
+    ):
+        self._get_backend = get_backend
+        self.scom_targets = scom_targets if scom_targets is not None else {}
+        self.hot_manifest = hot_manifest
+        self.top_n = top_n
+        self.manifest_interval = manifest_interval
+        self.warm = warm
+        self._status = {"state": "pending", "total": 0, "warmed": 0, "missing": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer: threading.Thread | None = None
+
+    def digests(self) -> list[str]:
+        """Digests to warm: SCOM targets first, then the manifest's top N."""
+        digests = [d for targets in self.scom_targets.values() for d in targets]
+        if self.hot_manifest:
+            digests += load_hot_manifest(self.hot_manifest)[: self.top_n]
+        return list(dict.fromkeys(digests))
+
+    def start(self) -> None:
+        """Start warming, and the manifest writer if a manifest is configured.
+
+        Safe to call again after the backend is swapped: it warms the new
+        backend, and the manifest writer is only ever started once.
+        """
+        if self.warm:
+            self._spawn(self.run, "refget-prewarm")
+        if self.hot_manifest and self._writer is None:
+            self._writer = self._spawn(self._write_manifest_periodically, "refget-hot-manifest")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        """Warm every digest, updating :meth:`status` as it goes."""
+        backend = self._get_backend()
+        if backend is None or not hasattr(backend, "prewarm"):
+            self._update(state="skipped")
+            return
+        digests = self.digests()
+        started = time.monotonic()
+        self._update(state="running", total=len(digests), warmed=0, missing=0)
+        for digest in digests:
+            if self._stop.is_set():
+                break
+            try:
+                warmed = backend.prewarm(digest)
+            except Exception as e:
+                _LOGGER.debug(f"Prewarm failed for {digest}: {e}")
+                warmed = False
+            with self._lock:
+                self._status["warmed" if warmed else "missing"] += 1
+        elapsed = round(time.monotonic() - started, 3)
+        self._update(state="done", seconds=elapsed)
+        _LOGGER.info(
+            f"Prewarmed {self._status['warmed']}/{len(digests)} collections in {elapsed}s"
+        )
+
+    def write_manifest(self) -> None:
+        """Record the backend's most requested digests to the manifest now."""
+        backend = self._get_backend()
+        if not self.hot_manifest or backend is None or not hasattr(backend, "hot_digests"):
+            return
+        hot = backend.hot_digests(self.top_n)
+        if hot:
+            write_hot_manifest(self.hot_manifest, hot)
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _write_manifest_periodically(self) -> None:
+        while not self._stop.wait(self.manifest_interval):
+            try:
+                self.write_manifest()
+            except Exception as e:
+                _LOGGER.warning(f"Could not write hot-key manifest {self.hot_manifest}: {e}")
+
+    def _update(self, **fields) -> None:
+        with self._lock:
+            self._status.update(fields)
+
+    def _spawn(self, target, name: str) -> threading.Thread:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
@@ -1,5 +1,12 @@
+import base64
+import codecs
+import hashlib
 import json
 import logging
+import queue
+import re
+import threading
+import zlib
 from pathlib import Path
 from typing import Optional, Union
 
@@ -320,6 +327,295 @@ def fasta_to_seqcol_dict(fasta_file_path: Union[str, Path]) -> dict:
     return seqcol_dict
 
 
+# Bytes read per block by digest_fasta_file
+FASTA_READ_BLOCK_SIZE = 1 << 20
+# Blocks each hashing thread may lag behind the reader
+_FASTA_QUEUE_BLOCKS = 8
+_UPPERCASE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+# Unicode White_Space in UTF-8: what Rust's trim_end and split_whitespace remove
+_SPACE = (
+    rb"[\t\n\x0b\x0c\r ]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]"
+    rb"|\xe2\x81\x9f|\xe3\x80\x80"
+)
+_TRAILING_SPACE = re.compile(rb"(?:" + _SPACE + rb")*\Z")
+# ...and, at the end of a block, the start of a multi-byte space cut by the block
+_TRAILING_SPACE_OR_CUT = re.compile(
+    rb"(?:" + _SPACE + rb")*(?:\xc2|\xe1|\xe1\x9a|\xe2|\xe2[\x80\x81]|\xe3|\xe3\x80)?\Z"
+)
+_ASCII_SPACE = b"\t\n\x0b\x0c\r "
+_SPACE_OR_NON_ASCII = _ASCII_SPACE + bytes(range(0x80, 0x100))
+
+
+def _plain_lines(data: bytes) -> bool:
+    """Whether ``data`` is ASCII with no whitespace but its line endings (LF or CRLF)"""
+    if not data.isascii() or any(space in data for space in (b" ", b"\t", b"\x0b", b"\x0c")):
+        return False
+    return b"\r" not in data or data.count(b"\r") == data.count(b"\r\n")
+
+
+def _space_start(data: bytes, cut: bool = False) -> int:
+    """
+    Where the trailing whitespace of ``data`` starts; with ``cut``, also the
+    start of a multi-byte whitespace character cut off at its end
+    """
+    # Only the bytes after the last non-space ASCII byte can be whitespace.
+    start = len(data.rstrip(_SPACE_OR_NON_ASCII))
+    tail = data[start:]
+    if tail.isascii():
+        return start
+    return start + (_TRAILING_SPACE_OR_CUT if cut else _TRAILING_SPACE).search(tail).start()
+
+
+class _FastaDigester:
+    """
+    Incremental refget digests of a FASTA byte stream, fed block by block.
+
+    Matches gtars ``digest_fasta``: a header is a line starting with ``>``,
+    and names the sequence by its first word; the bases are the following
+    lines with trailing whitespace trimmed, ASCII-uppercased. The file must
+    be UTF-8, as gtars requires. FAI fields are recorded for uncompressed
+    input.
+    """
+
+    def __init__(self):
+        self.names, self.lengths, self.sequences = [], [], []
+        self.offsets = []
+        self.line_bases = self.line_bytes = None
+        self._gzip = None  # decided by the first bytes
+        self._sniffed = b""
+        self._inflater = None
+        self._pos = 0  # offset in the (uncompressed) stream
+        self._header = None  # bytes of an unfinished header line
+        self._hasher = None
+        self._length = 0
+        self._offset = None  # where the current sequence's bases start
+        self._first_line = None  # bytes of its first line so far; None once measured
+        self._first_space = b""  # trailing whitespace of that line so far
+        self._line_start = True  # the next byte starts a line
+        self._space = b""  # trailing whitespace of the current line, held back
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def update(self, data: bytes) -> None:
+        if self._gzip is None:
+            # Sniff the gzip magic number, which may straddle two blocks.
+            self._sniffed += data
+            if len(self._sniffed) < 2:
+                return
+            self._gzip = self._sniffed[:2] == b"\x1f\x8b"
+            data, self._sniffed = self._sniffed, b""
+        if not self._gzip:
+            self._parse(data)
+            return
+        # Multi-member (e.g. bgzip) files are consecutive gzip streams.
+        while data:
+            if self._inflater is None:
+                self._inflater = zlib.decompressobj(wbits=47)
+            self._parse(self._inflater.decompress(data))
+            if not self._inflater.eof:
+                break
+            data = self._inflater.unused_data
+            self._inflater = None
+
+    def finish(self) -> None:
+        if self._sniffed:
+            self._parse(self._sniffed)
+        self._check_utf8(b"", final=True)
+        if self._header is not None:
+            self._start_sequence(self._header)
+        self._end_sequence()
+
+    def _check_utf8(self, buf: bytes, final: bool = False) -> None:
+        # ASCII blocks need no decoding, unless a character straddles into one.
+        if final or not buf.isascii() or self._utf8.getstate()[0]:
+            try:
+                self._utf8.decode(buf, final)
+            except UnicodeDecodeError as e:
+                raise OSError(f"FASTA stream did not contain valid UTF-8: {e}") from e
+
+    def _parse(self, buf: bytes) -> None:
+        self._check_utf8(buf)
+        pos = 0
+        while pos < len(buf):
+            if self._header is not None:
+                newline = buf.find(b"\n", pos)
+                if newline < 0:
+                    self._header += buf[pos:]
+                    break
+                self._header += buf[pos:newline]
+                pos = newline + 1
+                self._start_sequence(self._header, self._pos + pos)
+                continue
+            line_start = buf[pos - 1 : pos] == b"\n" if pos else self._line_start
+            if line_start and buf.startswith(b">", pos):
+                start = pos
+            else:
+                # A ">" inside a line is a base.
+                start = buf.find(b"\n>", pos)
+                start = start if start < 0 else start + 1
+            end = len(buf) if start < 0 else start
+            if self._hasher is not None:
+                self._add_bases(buf[pos:end])
+            if start < 0:
+                break
+            self._end_sequence()
+            self._header = b""
+            pos = start + 1
+        if buf:
+            self._line_start = buf.endswith(b"\n")
+        self._pos += len(buf)
+
+    def _start_sequence(self, header: bytes, offset: int | None = None) -> None:
+        words = [w for w in re.split(_SPACE, header) if w]
+        self.names.append(words[0].decode() if words else "")
+        self._header = None
+        self._hasher = hashlib.sha512()
+        self._length = 0
+        self._offset = offset
+        self._first_line = 0
+        self._first_space = b""
+        self._space = b""
+
+    def _add_bases(self, data: bytes) -> None:
+        if self._first_line is not None and data:
+            self._measure_first_line(data)
+        data = self._space + data
+        if _plain_lines(data):
+            bases, self._space = data.translate(_UPPERCASE, b"\r\n"), b""
+        else:
+            *lines, tail = data.split(b"\n")
+            # The last line may continue in the next block: hold back its
+            # trailing whitespace until that is known.
+            keep = _space_start(tail, cut=True)
+            lines.append(tail[:keep])
+            bases = b"".join(line[: _space_start(line)] for line in lines)
+            bases = bases.translate(_UPPERCASE)
+            self._space = tail[keep:]
+        self._hasher.update(bases)
+        self._length += len(bases)
+
+    def _measure_first_line(self, data: bytes) -> None:
+        # As gtars, the FAI line length is that of the first line that is not blank.
+        pos = 0
+        while self._first_line is not None:
+            newline = data.find(b"\n", pos)
+            line = self._first_space + data[pos : len(data) if newline < 0 else newline]
+            if newline < 0:
+                self._first_line += len(data) - pos
+                self._first_space = line[_space_start(line, cut=True) :]
+                return
+            line_bytes = self._first_line + newline - pos + 1
+            line_bases = line_bytes - 1 - (len(line) - _space_start(line))
+            if line_bases:
+                self._record_fai(line_bases, line_bytes)
+            else:
+                self._first_line, self._first_space = 0, b""
+                pos = newline + 1
+
+    def _record_fai(self, line_bases: int, line_bytes: int) -> None:
+        self._first_line = None
+        if self._gzip or not line_bases or self._offset is None:
+            return
+        self.offsets.append(self._offset)
+        if self.line_bases is None:
+            self.line_bases, self.line_bytes = line_bases, line_bytes
+
+    def _end_sequence(self) -> None:
+        if self._hasher is None:
+            return
+        if self._first_line:  # the sequence is one line with no newline
+            trimmed = len(self._first_space) - _space_start(self._first_space)
+            self._record_fai(self._first_line - trimmed, self._first_line)
+        digest = base64.urlsafe_b64encode(self._hasher.digest()[:24]).decode("ascii")
+        self.sequences.append("SQ." + digest)
+        self.lengths.append(self._length)
+        self._hasher = None
+
+    def seqcol_dict(self) -> dict:
+        snlp = [
+            sha512t24u_digest(canonical_str({"length": length, "name": name}))
+            for name, length in zip(self.names, self.lengths)
+        ]
+        return {
+            "lengths": self.lengths,
+            "names": self.names,
+            "sequences": self.sequences,
+            "sorted_name_length_pairs": sorted(snlp),
+            "sorted_sequences": list(self.sequences),
+        }
+
+
+def digest_fasta_file(
+    fasta_file_path: Union[str, Path], block_size: int = FASTA_READ_BLOCK_SIZE
+) -> dict:
+    """
+    Compute everything a FASTA ingest needs in one read of the file.
+
+    The file is read once, block by block, and every block is handed to three
+    worker threads: one computes the file's SHA-256, one its MD5, and one the
+    refget digests of its sequences. ``hashlib`` (and ``zlib``, for gzipped
+    FASTA) release the GIL, so the three run in parallel with each other and
+    with the read. Does not require gtars.
+
+    Args:
+        fasta_file_path: Path to the FASTA file, optionally gzipped
+        block_size: Bytes read per block
+
+    Returns:
+        dict: ``seqcol_dict`` (as from :func:`fasta_to_seqcol_dict`), ``sha256``
+            and ``md5`` of the file bytes, ``size``, and the FAI fields
+            ``offsets``, ``line_bases`` and ``extra_line_bytes`` (None when
+            the file is gzipped)
+    """
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    digester = _FastaDigester()
+    consumers = [sha256.update, md5.update, digester.update]
+    queues = [queue.Queue(maxsize=_FASTA_QUEUE_BLOCKS) for _ in consumers]
+    errors = []
+
+    def consume(blocks: queue.Queue, update) -> None:
+        while (block := blocks.get()) is not None:
+            if errors:
+                continue  # keep draining so the reader never blocks
+            try:
+                update(block)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [
+        threading.Thread(target=consume, args=(q, update), name="refget-fasta-hash", daemon=True)
+        for q, update in zip(queues, consumers)
+    ]
+    for thread in threads:
+        thread.start()
+    size = 0
+    try:
+        with open(fasta_file_path, "rb") as f:
+            while not errors and (block := f.read(block_size)):
+                size += len(block)
+                for q in queues:
+                    q.put(block)
+    finally:
+        for q in queues:
+            q.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    digester.finish()
+
+    return {
+        "seqcol_dict": digester.seqcol_dict(),
+        "sha256": sha256.hexdigest(),
+        "md5": md5.hexdigest(),
+        "size": size,
+        "offsets": digester.offsets or None,
+        "line_bases": digester.line_bases,
+        "extra_line_bytes": (
+            None if digester.line_bases is None else digester.line_bytes - digester.line_bases
+        ),
+    }
+
+
 # def build_pangenome_model(pangenome_obj: dict) -> Pangenome:
 #     # First add in the FASTA files individually, and build a dictionary of the results
 #     # pangenome_obj = {}
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Compare client requests through a pooled Session against bare requests.get.
+
+Starts a local keep-alive HTTP server that answers every path with a small
+JSON body, then fetches the same number of collections twice: once with
+``requests.get`` per call (a new connection each time, as the clients did
+before they held a Session), once through ``SequenceCollectionClient``, whose
+session keeps the connection open. Prints the wall time and requests per
+second of each.
+
+Usage:
+    python scripts/benchmark_client_session.py
+    python scripts/benchmark_client_session.py --requests 5000
+    python scripts/benchmark_client_session.py --url https://seqcolapi.databio.org --requests 50
+
+Against a remote HTTPS server the gap is larger than locally, because each
+new connection there also pays for a TLS handshake.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from refget.clients import SequenceCollectionClient
+
+DIGEST = "XZlrcEGi6mlopZ2uD8ObHkQB1d0oDwKk"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm holds the body back for the client's delayed ACK.
+    disable_nagle_algorithm = True
+    body = json.dumps({"names": ["chrX", "chr1", "chr2"], "lengths": [8, 4, 4]}).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label: str, n: int, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.2f}s  {n / elapsed:10.1f} requests/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="Seqcol API URL (default: a local test server)")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    n = args.requests
+    endpoint = f"{url}/collection/{DIGEST}?level=2"
+    try:
+        bare = timed(
+            "requests.get per call",
+            n,
+            lambda: [requests.get(endpoint, timeout=10).json() for _ in range(n)],
+        )
+        client = SequenceCollectionClient(urls=[url])
+        pooled = timed(
+            "pooled client session", n, lambda: [client.get_collection(DIGEST) for _ in range(n)]
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+    print(f"speed-up: {bare / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""SQL statements shared by the local and PostgreSQL query tests"""
+
+
+def hot_statements():
+    """The statements behind collection lookups, searches and list pages"""
+    from sqlmodel import select
+
+    from refget.agents import ATTR_TYPE_MAP, collection_search_statements
+    from refget.models import CollectionMember, HumanReadableNames, SequenceCollection
+
+    statements = {
+        "collection": select(SequenceCollection).where(SequenceCollection.digest == "d"),
+        "human_readable_names": select(HumanReadableNames).where(
+            HumanReadableNames.digest.in_(["d", "e"])
+        ),
+    }
+    for attr, Attribute in ATTR_TYPE_MAP.items():
+        statements[f"{attr} value"] = select(Attribute).where(Attribute.digest == "d")
+    searches = [{attr: "d"} for attr in ATTR_TYPE_MAP]
+    searches += [{"names": "d", "lengths": "e"}, {"sequences": "d", "names": "e"}]
+    for filters in searches:
+        list_stmt, cnt_stmt, _ = collection_search_statements(filters, after="c")
+        statements[f"search {sorted(filters)}"] = list_stmt.limit(50)
+        statements[f"count {sorted(filters)}"] = cnt_stmt
+    statements["list page"] = collection_search_statements(after="c")[0].limit(50)
+    statements["collections with sequence"] = select(CollectionMember.collection_digest).where(
+        CollectionMember.sequence_digest == "d"
+    )
+    statements["collection members"] = select(CollectionMember).where(
+        CollectionMember.collection_digest == "d"
+    )
+    return statements
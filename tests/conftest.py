@@ -36,6 +36,14 @@ for fa_name, fa_digest_bundle in TEST_FASTA_DIGESTS.items():
 # ============================================================
 
 
+@pytest.fixture(autouse=True)
+def client_cache_dir(tmp_path, monkeypatch):
+    """Keep the CLI's API response cache out of the real ~/.cache/refget."""
+    cache_dir = tmp_path / "refget-cache"
+    monkeypatch.setenv("REFGET_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
 @pytest.fixture
 def runner():
     """Typer CLI test runner."""
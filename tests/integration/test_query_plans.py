@@ -0,0 +1,26 @@
+# tests/integration/test_query_plans.py
+
+"""
+The hot queries must be answerable from an index on PostgreSQL.
+
+The test tables are tiny, so the planner would rightly prefer a sequential
+scan; with ``enable_seqscan`` off it picks one only when no index applies.
+
+Run with: ./scripts/test-integration.sh
+"""
+
+import pytest
+
+from tests._queries import hot_statements
+
+HOT_STATEMENTS = hot_statements()
+
+
+@pytest.mark.parametrize("name", sorted(HOT_STATEMENTS))
+def test_no_seq_scan(test_dbagent, name):
+    statement = HOT_STATEMENTS[name]
+    compiled = statement.compile(test_dbagent.engine, compile_kwargs={"literal_binds": True})
+    with test_dbagent.engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {compiled}")]
+    assert not [line for line in plan if "Seq Scan" in line], "\n".join(plan)
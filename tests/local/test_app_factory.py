@@ -10,6 +10,7 @@ Covers the three properties the factory exists to guarantee:
 """
 
 import json
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -25,7 +26,8 @@ except ImportError:
     _RUST_BINDINGS_AVAILABLE = False
 
 from refget.router import create_refget_router, setup_backend
-from refget.seqcolapi import create_seqcol_app, store_service_info
+from refget.seqcolapi import create_seqcol_app, create_seqcol_host, store_service_info
+from refget.seqcolapi.prewarm import load_hot_manifest, write_hot_manifest
 
 TEST_FASTA_DIR = Path("test_fasta")
 BASE_FASTA = TEST_FASTA_DIR / "base.fa"
@@ -144,6 +146,48 @@ class TestMountable:
         assert client.get("/service-info").json() == {"id": "org.test.host"}
         assert client.get("/seqcol/service-info").json()["seqcol"]["refget_store"]["url"]
 
+    def test_scom_targets_are_per_mount(self):
+        host = create_seqcol_host(
+            {
+                "/a": _app(scom_targets={"human": [BASE_DIGEST]}),
+                "/b": _app(scom_targets={"mouse": [BASE_DIGEST]}),
+            }
+        )
+        client = TestClient(host)
+        assert client.get("/").json() == {"mounts": ["/a", "/b"]}
+
+        a = client.post(f"/a/similarities/{BASE_DIGEST}", params={"species": "human"})
+        assert a.status_code == 200
+        assert a.json()["similarities"][0]["digest"] == BASE_DIGEST
+        # /b knows only "mouse"; /a's targets must not leak into it.
+        b = client.post(f"/b/similarities/{BASE_DIGEST}", params={"species": "human"})
+        assert b.status_code == 400
+
+    def test_seqcolapi_host_installs_cors_once(self, tmp_path):
+        from fastapi.middleware.cors import CORSMiddleware
+
+        from refget.seqcolapi.main import create_seqcolapi_host_app
+
+        store = RefgetStore.on_disk(str(tmp_path / "store"))
+        store.add_sequence_collection_from_fasta(str(BASE_FASTA))
+        host = create_seqcolapi_host_app({"/a": str(tmp_path / "store")})
+        (mount,) = [route for route in host.routes if getattr(route, "path", None) == "/a"]
+
+        def cors_layers(app):
+            return [m for m in app.user_middleware if m.cls is CORSMiddleware]
+
+        assert len(cors_layers(host)) == 1
+        assert cors_layers(mount.app) == []
+        assert TestClient(host).get(f"/a/collection/{BASE_DIGEST}").status_code == 200
+
+    def test_host_builds_apps_from_kwargs(self):
+        host = create_seqcol_host(
+            {"human": {"store": _readonly_store(), "store_url": "https://h/"}}
+        )
+        client = TestClient(host)
+        info = client.get("/human/service-info").json()
+        assert info["seqcol"]["refget_store"]["url"] == "https://h/"
+
     def test_factory_does_not_touch_the_host_app_state(self):
         host = FastAPI()
         host.mount("/seqcol", _app(store_url="https://a/store/"))
@@ -185,6 +229,44 @@ class TestDeferredBackend:
             create_seqcol_app()
 
 
+class TestPrewarm:
+    def _wait_until_done(self, client):
+        for _ in range(100):
+            status = client.get("/service-info").json()["seqcol"]["prewarm"]
+            if status["state"] == "done":
+                return status
+            time.sleep(0.05)
+        raise AssertionError(f"prewarm did not finish: {status}")
+
+    def test_warms_scom_targets_and_manifest_digests(self, tmp_path):
+        manifest = tmp_path / "hot.json"
+        write_hot_manifest(str(manifest), [BASE_DIGEST, "not_in_this_store"])
+        app = _app(
+            prewarm=True,
+            scom_targets={"human": [BASE_DIGEST]},
+            hot_manifest=str(manifest),
+        )
+        status = self._wait_until_done(TestClient(app))
+        assert status["total"] == 2
+        assert status["warmed"] == 1
+        assert status["missing"] == 1
+
+    def test_empty_scom_targets_are_bound_by_reference(self):
+        scom_targets = {}
+        app = _app(prewarm=True, scom_targets=scom_targets)
+        assert app.state.prewarmer.scom_targets is scom_targets
+
+    def test_manifest_records_most_requested_digests(self, tmp_path):
+        manifest = tmp_path / "hot.json"
+        app = _app(hot_manifest=str(manifest))
+        client = TestClient(app)
+        client.get(f"/collection/{BASE_DIGEST}")
+        app.state.prewarmer.write_manifest()
+        assert load_hot_manifest(str(manifest)) == [BASE_DIGEST]
+        # Manifest-only apps record hot keys but do not warm.
+        assert client.get("/service-info").json()["seqcol"]["prewarm"]["state"] == "pending"
+
+
 class TestComplianceSelfTarget:
     def test_mounted_app_targets_the_mount_path(self):
         host = FastAPI()
@@ -100,6 +100,37 @@ class TestRefgetStoreBackend:
         items = backend.get_collection_itemwise(BASE_DIGEST, limit=1)
         assert len(items) == 1
 
+    def test_iter_collection_itemwise_window(self, backend):
+        """iter_collection_itemwise yields the offset/limit window lazily."""
+        items = backend.get_collection_itemwise(BASE_DIGEST)
+        window = backend.iter_collection_itemwise(BASE_DIGEST, offset=1, limit=1)
+        assert not isinstance(window, list)
+        assert list(window) == items[1:2]
+        assert list(backend.iter_collection_itemwise(BASE_DIGEST, offset=len(items))) == []
+
+    def test_iter_collection_itemwise_not_found_is_eager(self, backend):
+        """A missing digest raises before iteration, so the router can still 404."""
+        with pytest.raises(ValueError, match="not found"):
+            backend.iter_collection_itemwise("nonexistent_digest")
+
+    def test_prewarm_caches_enriched_level2(self, backend):
+        """prewarm fills the level 2 cache; a missing digest reports False."""
+        from refget.backend import LEVEL2_CACHE
+
+        assert backend.prewarm(BASE_DIGEST) is True
+        assert LEVEL2_CACHE.get((backend._cache_token, BASE_DIGEST)) is not None
+        assert backend.prewarm("nonexistent_digest") is False
+        # Cached reads still hand out copies.
+        backend.get_collection(BASE_DIGEST)["names"] = None
+        assert backend.get_collection(BASE_DIGEST)["names"] is not None
+
+    def test_hot_digests(self, backend):
+        backend.get_collection(DIFFERENT_NAMES_DIGEST)
+        backend.get_collection(BASE_DIGEST, level=1)
+        backend.get_collection(BASE_DIGEST)
+        backend.compare_digests(BASE_DIGEST, DIFFERENT_NAMES_DIGEST)
+        assert backend.hot_digests(1) == [BASE_DIGEST]
+
     def test_get_attribute(self, backend):
         """get_attribute returns attribute by its own digest."""
         names_digest = BASE_LEVEL1["names"]
@@ -178,6 +209,137 @@ class TestRefgetStoreBackend:
         assert other["human_readable_names"] == []
 
 
+@pytest.mark.skipif(not _RUST_BINDINGS_AVAILABLE, reason="gtars is not installed")
+class TestTopKSimilarities:
+    """compute_similarities ranks only the top K, prunes by size bound, and
+    resumes a cached ranking for later pages."""
+
+    @pytest.fixture
+    def all_fasta_backend(self):
+        store = RefgetStore.in_memory()
+        for fa in sorted(TEST_FASTA_DIR.glob("*.fa")):
+            store.add_sequence_collection_from_fasta(str(fa))
+        return RefgetStoreBackend(store)
+
+    @staticmethod
+    def _full_ranking(backend, seqcol, digests):
+        from refget.utils import calc_jaccard_similarities
+
+        scored = []
+        for digest in digests:
+            sims = calc_jaccard_similarities(
+                dict(seqcol), backend._store.get_collection_level2(digest)
+            )
+            scored.append((digest, max(sims.values()) if sims else 0))
+        scored.sort(key=lambda s: s[1], reverse=True)
+        return [digest for digest, _ in scored]
+
+    def test_pages_match_a_full_sort(self, all_fasta_backend):
+        backend = all_fasta_backend
+        digests = backend.list_collections()["results"]
+        seqcol = backend.get_collection(BASE_DIGEST)
+        expected = self._full_ranking(backend, seqcol, digests)
+
+        paged = []
+        for page in range(3):
+            result = backend.compute_similarities(
+                seqcol, page=page, page_size=2, target_digests=digests, query_digest=BASE_DIGEST
+            )
+            assert result["pagination"]["total"] == len(digests)
+            paged.extend(s["digest"] for s in result["similarities"])
+        assert paged == expected
+
+    def test_total_does_not_depend_on_the_page(self, all_fasta_backend):
+        backend = all_fasta_backend
+        digests = backend.list_collections()["results"]
+        targets = digests + ["not_in_this_store"]
+        seqcol = backend.get_collection(BASE_DIGEST)
+        totals = [
+            backend.compute_similarities(
+                seqcol, page=page, page_size=1, target_digests=targets, query_digest=BASE_DIGEST
+            )["pagination"]["total"]
+            for page in (len(targets) - 1, 0)
+        ]
+        # Unscorable targets are counted but never ranked.
+        assert totals == [len(targets), len(targets)]
+        last = backend.compute_similarities(
+            seqcol, page=len(digests), page_size=1, target_digests=targets
+        )
+        assert last["similarities"] == []
+
+    def test_small_targets_are_pruned(self, all_fasta_backend, monkeypatch):
+        backend = all_fasta_backend
+        digests = backend.list_collections()["results"]
+        seqcol = backend.get_collection(BASE_DIGEST)
+        scored = []
+        original = backend._similarity_entry
+
+        def counting(query, digest):
+            scored.append(digest)
+            return original(query, digest)
+
+        monkeypatch.setattr(backend, "_similarity_entry", counting)
+        result = backend.compute_similarities(seqcol, page_size=1, target_digests=digests)
+        assert max(result["similarities"][0]["similarities"].values()) == 1.0
+        # subset.fa has fewer sequences than base.fa, so its bound is below 1.0
+        # and it is never scored once a perfect match fills the top 1.
+        assert TEST_DIGESTS["subset.fa"]["top_level_digest"] not in scored
+        assert len(scored) < len(digests)
+
+    def test_next_page_reuses_the_cached_ranking(self, all_fasta_backend, monkeypatch):
+        backend = all_fasta_backend
+        digests = backend.list_collections()["results"]
+        seqcol = backend.get_collection(BASE_DIGEST)
+        scored = []
+        original = backend._similarity_entry
+
+        def counting(query, digest):
+            scored.append(digest)
+            return original(query, digest)
+
+        monkeypatch.setattr(backend, "_similarity_entry", counting)
+        for page in range(len(digests)):
+            backend.compute_similarities(
+                seqcol, page=page, page_size=1, target_digests=digests, query_digest=BASE_DIGEST
+            )
+        # Every target scored exactly once across all pages.
+        assert sorted(scored) == sorted(digests)
+
+
+class TestSharedCache:
+    """SharedCache evicts by total cost across every caller."""
+
+    def test_evicts_least_recently_used_to_fit_budget(self):
+        from refget.backend import SharedCache
+
+        cache = SharedCache(max_cost=10)
+        cache.put("a", 1, cost=4)
+        cache.put("b", 2, cost=4)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.put("c", 3, cost=4)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats() == {"entries": 2, "cost": 8, "max_cost": 10}
+
+    def test_oversized_entries_are_not_cached(self):
+        from refget.backend import SharedCache
+
+        cache = SharedCache(max_cost=10)
+        cache.put("big", 1, cost=11)
+        assert cache.get("big") is None
+
+    def test_expired_entries_are_dropped(self, monkeypatch):
+        from refget import backend as backend_mod
+
+        cache = backend_mod.SharedCache(max_cost=10, ttl=5)
+        now = [100.0]
+        monkeypatch.setattr(backend_mod.time, "monotonic", lambda: now[0])
+        cache.put("a", 1)
+        now[0] += 6
+        assert cache.get("a") is None
+        assert cache.stats()["cost"] == 0
+
+
 @pytest.mark.skipif(not _RUST_BINDINGS_AVAILABLE, reason="gtars is not installed")
 class TestReadonlyStoreBackend:
     """RefgetStoreBackend served from a ReadonlyRefgetStore (the concurrent path).
@@ -310,6 +472,35 @@ class TestStoreBackend501:
         assert "names" in data
         assert "lengths" in data
 
+    def test_itemwise_streams_json_array(self, store_client):
+        """GET /collection/{digest}?collated=false streams the full item list."""
+        response = store_client.get(f"/seqcol/collection/{BASE_DIGEST}?collated=false")
+        assert response.status_code == 200
+        items = response.json()
+        assert len(items) == len(BASE_LEVEL2["names"])
+        assert [item["names"] for item in items] == BASE_LEVEL2["names"]
+
+        window = store_client.get(
+            f"/seqcol/collection/{BASE_DIGEST}",
+            params={"collated": "false", "offset": 1, "limit": 1},
+        ).json()
+        assert window == items[1:2]
+
+    def test_itemwise_streams_ndjson(self, store_client):
+        """Accept: application/x-ndjson yields one JSON item per line."""
+        response = store_client.get(
+            f"/seqcol/collection/{BASE_DIGEST}?collated=false",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert [json.loads(line)["names"] for line in lines] == BASE_LEVEL2["names"]
+
+    def test_itemwise_not_found(self, store_client):
+        response = store_client.get("/seqcol/collection/nonexistent_digest?collated=false")
+        assert response.status_code == 404
+
     def test_list_collections_still_works(self, store_client):
         """GET /list/collection uses get_backend, should work."""
         response = store_client.get("/seqcol/list/collection")
@@ -420,20 +611,95 @@ class TestAliasFhrEndpoints:
 
         client = SequenceCollectionClient(urls=["http://testserver/seqcol"], raise_errors=False)
 
-        # Patch the client's HTTP layer to use the TestClient.
-        import refget.clients as clients_mod
+        # Route the client's session through the TestClient.
+        def fake_request(method, url, params=None, **kwargs):
+            path = url.replace("http://testserver", "")
+            return app_client.request(method, path, params=params)
 
-        orig_get = clients_mod.requests.get
+        client.session.request = fake_request
+        resolved = client.resolve_alias("ucsc", "hg38_base")
+        assert resolved["digest"] == BASE_DIGEST
+        fhr = client.get_fhr(BASE_DIGEST)
+        assert fhr["genome"] == "Test organism"
 
-        def fake_get(url, params=None, **kwargs):
-            path = url.replace("http://testserver", "")
-            return app_client.get(path, params=params)
-
-        clients_mod.requests.get = fake_get
-        try:
-            resolved = client.resolve_alias("ucsc", "hg38_base")
-            assert resolved["digest"] == BASE_DIGEST
-            fhr = client.get_fhr(BASE_DIGEST)
-            assert fhr["genome"] == "Test organism"
-        finally:
-            clients_mod.requests.get = orig_get
+
+@pytest.mark.skipif(not _RUST_BINDINGS_AVAILABLE, reason="gtars is not installed")
+class TestHybridBackend:
+    """Metadata from a database with no sequence rows, sequences from the store."""
+
+    @pytest.fixture
+    def hybrid(self, tmp_path):
+        pytest.importorskip("sqlmodel")
+        from sqlmodel import create_engine
+
+        from refget.agents import RefgetDBAgent
+        from refget.backend import HybridBackend
+
+        dbagent = RefgetDBAgent(engine=create_engine(f"sqlite:///{tmp_path / 'refget.db'}"))
+        dbagent.seqcol.add_from_fasta_file(str(BASE_FASTA))
+        store = RefgetStore.in_memory()
+        store.add_sequence_collection_from_fasta(str(BASE_FASTA))
+        store.load_all_collections()
+        return HybridBackend(dbagent, store.into_readonly())
+
+    @pytest.fixture
+    def client(self, hybrid):
+        app = FastAPI()
+        app.include_router(create_refget_router(sequences=True, pangenomes=True))
+        app.state.dbagent = app.state.backend = hybrid
+        return TestClient(app)
+
+    def test_satisfies_protocol(self, hybrid):
+        assert isinstance(hybrid, SeqColBackend)
+        assert hybrid.get_collection(BASE_DIGEST) == BASE_LEVEL2
+        assert hybrid.capabilities()["backend_type"] == "hybrid"
+        assert hybrid.capabilities()["has_sequence_data"]
+
+    def test_sequences_come_from_the_store(self, hybrid):
+        digest = BASE_LEVEL2["sequences"][0]
+        assert hybrid.seq.get(digest) == "TTGGGGAA"
+        assert hybrid.seq.get(digest, 2, 5) == "GGG"
+        assert hybrid.seq.get(digest, 6, 40) == "AA"
+        assert hybrid.seq.get(digest, 9, 12) == ""
+        with pytest.raises(ValueError):
+            hybrid.seq.stream("SQ.missing")
+        with pytest.raises(ValueError):
+            hybrid.seq.get(digest, 2, None)
+        with pytest.raises(ValueError):
+            hybrid.dbagent.seq.get(digest)
+
+    def test_endpoints(self, client):
+        digest = BASE_LEVEL2["sequences"][0].removeprefix("SQ.")
+        assert client.get(f"/sequence/{digest}").text == "TTGGGGAA"
+        assert client.get(f"/sequence/{digest}?start=1&end=3").text == "TG"
+        r = client.post(
+            f"/collection/{BASE_DIGEST}/regions", json=[{"chrom": "chrX", "start": 0, "end": 4}]
+        )
+        assert r.status_code == 200
+        assert r.json()[0]["sequence"] == "TTGG"
+        r = client.post(
+            f"/collection/{BASE_DIGEST}/regions", json=[{"chrom": "chrY", "start": 0, "end": 4}]
+        )
+        assert r.status_code == 404
+        assert client.get(f"/collection/{BASE_DIGEST}?level=1").json() == BASE_LEVEL1
+        r = client.get("/list/collection", params={"after": "", "page_size": 1})
+        assert r.json()["results"] == [BASE_DIGEST]
+        assert client.get("/list/pangenome").status_code == 200
+
+    def test_setup_backend_with_store_and_engine(self, tmp_path):
+        pytest.importorskip("sqlmodel")
+        from sqlmodel import create_engine
+
+        from refget.backend import HybridBackend
+        from refget.router import setup_backend
+
+        app = FastAPI()
+        store = RefgetStore.in_memory()
+        store.add_sequence_collection_from_fasta(str(BASE_FASTA))
+        setup_backend(
+            app,
+            store=store.into_readonly(),
+            engine=create_engine(f"sqlite:///{tmp_path / 'refget.db'}"),
+        )
+        assert isinstance(app.state.backend, HybridBackend)
+        assert app.state.dbagent is app.state.backend
@@ -0,0 +1,867 @@
+"""Tests for the database agents (refget.agents) against a local SQLite database.
+
+The agents target PostgreSQL in production; SQLite exercises the same ORM code
+paths without a server.
+"""
+
+import asyncio
+import os
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("sqlmodel")
+
+from sqlmodel import Session, create_engine, select  # noqa: E402
+
+from refget.agents import RefgetDBAgent  # noqa: E402
+from refget.models import (  # noqa: E402
+    CollectionMember,
+    HumanReadableNames,
+    LengthsAttr,
+    Sequence,
+    SequenceChunk,
+    SequenceCollection,
+)
+from refget.query_metrics import capture_queries  # noqa: E402
+from tests._queries import hot_statements  # noqa: E402
+
+SEQ = "ACGTACGTACGTTTGCA"
+PANGENOME = "test_pangenome_digest"
+
+
+@pytest.fixture
+def dbagent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'refget.db'}")
+    return RefgetDBAgent(engine=engine)
+
+
+@contextmanager
+def assert_queries(engine, expected: int):
+    """Fail unless the block runs exactly ``expected`` SQL statements on ``engine``"""
+    with capture_queries(engine) as seen:
+        yield seen
+    assert len(seen) == expected, "\n\n".join(seen)
+
+
+def assert_endpoint_queries(
+    client, engine, path: str, expected: int, method: str = "get", **kwargs
+):
+    """Request ``path`` with a TestClient, asserting it runs ``expected`` statements"""
+    with assert_queries(engine, expected):
+        response = getattr(client, method)(path, **kwargs)
+    assert response.status_code == 200, response.text
+    return response
+
+
+class TestChunkedSequences:
+    @pytest.fixture
+    def seq_agent(self, dbagent, monkeypatch):
+        import refget.agents
+
+        monkeypatch.setattr(refget.agents, "SEQUENCE_CHUNK_SIZE", 4)
+        agent = dbagent.seq
+        agent.add(Sequence(digest="d1", sequence=SEQ, length=len(SEQ)))
+        return agent
+
+    def test_stored_as_blocks(self, seq_agent):
+        with Session(seq_agent.engine) as session:
+            blocks = session.exec(
+                select(SequenceChunk).where(SequenceChunk.digest == "d1").order_by("block")
+            ).all()
+            assert [b.data for b in blocks] == ["ACGT", "ACGT", "ACGT", "TTGC", "A"]
+            assert session.get(Sequence, "d1").sequence == ""
+
+    @pytest.mark.parametrize("start,end", [(0, 4), (0, 17), (3, 9), (5, 6), (15, 40), (8, 8)])
+    def test_range_reads(self, seq_agent, start, end):
+        assert seq_agent.get("d1", start, end) == SEQ[start:end]
+
+    def test_full_sequence_streams_block_by_block(self, seq_agent):
+        seq_agent.STREAM_BATCH_BLOCKS = 2
+        assert list(seq_agent.stream("d1")) == ["ACGT", "ACGT", "ACGT", "TTGC", "A"]
+        assert seq_agent.get("d1") == SEQ
+
+    def test_missing_sequence(self, seq_agent):
+        with pytest.raises(ValueError):
+            seq_agent.stream("missing")
+        with pytest.raises(ValueError):
+            seq_agent.get("missing", 0, 4)
+
+    def test_legacy_rows_are_served_and_can_be_chunked(self, seq_agent):
+        with Session(seq_agent.engine) as session:
+            session.add(Sequence(digest="legacy", sequence=SEQ, length=len(SEQ)))
+            session.commit()
+        assert seq_agent.get("legacy", 3, 9) == SEQ[3:9]
+        assert seq_agent.get("legacy") == SEQ
+
+        assert seq_agent.chunk_legacy() == 1
+        assert seq_agent.get("legacy", 3, 9) == SEQ[3:9]
+        assert list(seq_agent.stream("legacy"))[0] == "ACGT"
+        assert seq_agent.chunk_legacy() == 0
+
+
+def _seqcol(names, lengths, sequences, human_readable_name=None):
+    seqcol_dict = {"names": names, "lengths": lengths, "sequences": sequences}
+    if human_readable_name:
+        seqcol_dict["human_readable_names"] = human_readable_name
+    return SequenceCollection.from_dict(seqcol_dict)
+
+
+class TestAddMany:
+    @pytest.fixture
+    def seqcols(self):
+        base = (["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"])
+        return [
+            _seqcol(*base, human_readable_name="base"),
+            # Shares sequences and lengths with base
+            _seqcol(["1", "2"], [4, 8], ["SQ.a", "SQ.b"]),
+            _seqcol(["chr2", "chr1"], [8, 4], ["SQ.b", "SQ.a"], human_readable_name="swapped"),
+            _seqcol(*base),
+        ]
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 500])
+    def test_matches_add(self, dbagent, tmp_path, seqcols, batch_size):
+        digests = dbagent.seqcol.add_many(seqcols, batch_size=batch_size)
+        assert digests == [s.digest for s in seqcols]
+        assert digests[0] == digests[3]
+
+        reference = RefgetDBAgent(engine=create_engine(f"sqlite:///{tmp_path / 'ref.db'}"))
+        for seqcol in seqcols:
+            reference.seqcol.add(seqcol)
+        for digest in digests:
+            assert dbagent.seqcol.get(digest) == reference.seqcol.get(digest)
+        page = dbagent.seqcol.get_many_level2_offset(limit=10)
+        assert page.pagination.total == 3
+        assert sorted(n for r in page.results.values() for n in r["human_readable_names"]) == [
+            "base",
+            "swapped",
+        ]
+
+    def test_existing_rows_are_left_alone(self, dbagent, seqcols):
+        dbagent.seqcol.add(seqcols[0])
+        dbagent.seqcol.add_many(seqcols)
+        dbagent.seqcol.add_many(seqcols)
+        with Session(dbagent.engine) as session:
+            assert len(session.exec(select(SequenceCollection)).all()) == 3
+            assert len(session.exec(select(HumanReadableNames)).all()) == 2
+            assert len(session.exec(select(LengthsAttr)).all()) == 2
+
+
+class TestFastaPipeline:
+    FILES = ["base.fa", "different_names.fa", "base.fa", "subset.fa", "pair_swap.fa"]
+
+    @pytest.fixture
+    def paths(self, fa_root):
+        pytest.importorskip("gtars")
+        return [os.path.join(fa_root, f) for f in self.FILES]
+
+    @pytest.mark.parametrize("jobs,batch_size", [(1, 2), (2, 500)])
+    def test_matches_one_by_one(self, dbagent, tmp_path, paths, jobs, batch_size):
+        names = ["first", None, "again", None, "swapped"]
+        digests = dbagent.seqcol.add_from_fasta_files(
+            paths, names, jobs=jobs, batch_size=batch_size
+        )
+
+        reference = RefgetDBAgent(engine=create_engine(f"sqlite:///{tmp_path / 'ref.db'}"))
+        expected = [reference.seqcol.add_from_fasta_file(p).digest for p in paths]
+        assert digests == expected
+        for digest in set(digests):
+            assert dbagent.seqcol.get(digest) == reference.seqcol.get(digest)
+            drs_obj = dbagent.fasta_drs.get(digest)
+            assert drs_obj.checksums == reference.fasta_drs.get(digest).checksums
+        with Session(dbagent.engine) as session:
+            assert sorted(
+                n.human_readable_name for n in session.exec(select(HumanReadableNames))
+            ) == [
+                "again",
+                "first",
+                "swapped",
+            ]
+
+    def test_digest_failure_is_raised(self, dbagent, paths, tmp_path):
+        with pytest.raises(Exception):
+            dbagent.seqcol.add_from_fasta_files([paths[0], str(tmp_path / "missing.fa")])
+
+    def test_digests_a_bounded_window_ahead(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from refget.agents import _bounded_map
+
+        submitted = []
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, fn, item):
+                submitted.append(item)
+                return super().submit(fn, item)
+
+        with Executor(max_workers=2) as executor:
+            results = _bounded_map(executor, lambda item: item * 2, list(range(10)), window=3)
+            assert next(results) == 0
+            assert len(submitted) == 4
+            assert list(results) == [2 * i for i in range(1, 10)]
+
+    def test_pep_update_is_deprecated(self, dbagent, fa_root):
+        from types import SimpleNamespace
+
+        pep = SimpleNamespace(samples=[SimpleNamespace(fasta="base.fa", sample_name="base")])
+        with pytest.warns(DeprecationWarning):
+            digests = dbagent.seqcol.add_from_fasta_pep(pep, fa_root, update=True)
+        assert list(digests) == ["base.fa"]
+
+
+class TestBulkLoad:
+    SEQCOLS = [
+        _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"], human_readable_name="base"),
+        _seqcol(['chr,1 "x"', "chr2"], [4, 8], ["SQ.a", "SQ.b"]),
+    ]
+
+    def test_copy_rows_writes_csv_to_a_staging_table(self):
+        import csv
+        import io
+        import json
+
+        from refget.agents import _copy_rows
+
+        class Cursor:
+            def copy_expert(self, sql, buffer):
+                statements.append(sql)
+                copied.extend(csv.reader(io.StringIO(buffer.read())))
+
+            def close(self):
+                pass
+
+        class Connection:
+            connection = type("Raw", (), {"cursor": lambda self: Cursor()})()
+
+            def exec_driver_sql(self, sql):
+                statements.append(sql)
+                return type("Result", (), {"rowcount": 2})()
+
+        statements, copied = [], []
+        seqcol = self.SEQCOLS[1]
+        rows = [{"digest": seqcol.names.digest, "value": seqcol.names.value}]
+        assert _copy_rows(Connection(), LengthsAttr.__table__, rows) == 2
+        assert copied == [[seqcol.names.digest, json.dumps(seqcol.names.value)]]
+        create, copy, merge = statements
+        assert create.startswith("CREATE TEMPORARY TABLE staging_lengthsattr ON COMMIT DROP")
+        assert copy == "COPY staging_lengthsattr (digest, value) FROM STDIN WITH (FORMAT csv)"
+        assert merge.endswith("FROM staging_lengthsattr ON CONFLICT DO NOTHING")
+
+    def test_falls_back_to_add_many(self, dbagent, tmp_path):
+        digests = dbagent.seqcol.bulk_load(self.SEQCOLS + self.SEQCOLS[:1], batch_size=1)
+        assert digests == [s.digest for s in self.SEQCOLS + self.SEQCOLS[:1]]
+        reference = RefgetDBAgent(engine=create_engine(f"sqlite:///{tmp_path / 'ref.db'}"))
+        for seqcol in self.SEQCOLS:
+            reference.seqcol.add(seqcol)
+        for digest in digests:
+            assert dbagent.seqcol.get(digest) == reference.seqcol.get(digest)
+
+    @pytest.mark.parametrize("source", ["store", "json"])
+    def test_cli(self, dbagent, tmp_path, fa_root, monkeypatch, source):
+        import json
+
+        from typer.testing import CliRunner
+
+        from refget.cli import admin, app
+
+        paths = [os.path.join(fa_root, f) for f in ["base.fa", "different_names.fa"]]
+        if source == "store":
+            store_module = pytest.importorskip("refget.store")
+            store = store_module.RefgetStore.on_disk(str(tmp_path / "store"))
+            for path in paths:
+                store.add_sequence_collection_from_fasta(path)
+        else:
+            from refget.utils import fasta_to_seqcol_dict
+
+            pytest.importorskip("gtars")
+            (tmp_path / "store" / "nested").mkdir(parents=True)
+            for i, path in enumerate(paths):
+                target = tmp_path / "store" / ("nested" if i else "") / f"{i}.seqcol.json"
+                target.write_text(json.dumps(fasta_to_seqcol_dict(path)))
+
+        monkeypatch.setattr(admin, "_get_dbagent", lambda: dbagent)
+        result = CliRunner().invoke(app, ["admin", "bulk-load", str(tmp_path / "store")])
+        assert result.exit_code == 0, result.output
+        reference = RefgetDBAgent(engine=create_engine(f"sqlite:///{tmp_path / 'ref.db'}"))
+        for path in paths:
+            digest = reference.seqcol.add_from_fasta_file(path).digest
+            assert dbagent.seqcol.get(digest) == reference.seqcol.get(digest)
+        assert dbagent.list_collections()["pagination"]["total"] == 2
+
+
+class TestAsyncAgent:
+    @pytest.fixture
+    def agents(self, dbagent, tmp_path):
+        pytest.importorskip("aiosqlite")
+        pytest.importorskip("greenlet")
+        from refget.async_agents import AsyncRefgetDBAgent
+
+        dbagent.seqcol.add_many(
+            [
+                _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"]),
+                _seqcol(["chr2", "chr1"], [8, 4], ["SQ.b", "SQ.a"]),
+            ]
+        )
+        async_agent = AsyncRefgetDBAgent(url=f"sqlite+aiosqlite:///{tmp_path / 'refget.db'}")
+        return dbagent, async_agent
+
+    def test_protocol_parity(self, agents):
+        sync, async_agent = agents
+        a, b = sync.list_collections()["results"]
+        a, b = a.digest, b.digest
+        calls = [
+            ("get_collection", (a,), {"level": 1}),
+            ("get_collection", (a,), {"level": 2}),
+            ("get_collection_attribute", (a, "names"), {}),
+            ("get_collection_itemwise", (b,), {}),
+            ("get_attribute", ("lengths", sync.get_collection(a, level=1)["lengths"]), {}),
+            ("compare_digests", (a, b), {}),
+            ("compare_digest_with_level2", (a, sync.get_collection(b)), {}),
+            ("collection_count", (), {}),
+            ("list_attributes", ("names",), {"page_size": 1}),
+            ("capabilities", (), {}),
+        ]
+
+        async def run():
+            results = [
+                await getattr(async_agent, name)(*args, **kwargs) for name, args, kwargs in calls
+            ]
+            items = await async_agent.iter_collection_itemwise(a, offset=1)
+            listed = await async_agent.list_collections(page_size=1, page=1)
+            await async_agent.dispose()
+            return results, list(items), listed
+
+        results, items, listed = asyncio.run(run())
+        for (name, args, kwargs), result in zip(calls, results):
+            expected = getattr(sync, name)(*args, **kwargs)
+            if name == "list_attributes":
+                assert result["pagination"] == expected["pagination"]
+                assert len(result["results"]) == 1
+            else:
+                assert result == expected, name
+        assert items == list(sync.iter_collection_itemwise(a, offset=1))
+        assert listed["pagination"]["total"] == 2
+        assert listed["results"] == [
+            sync.list_collections(page_size=1, page=1)["results"][0].digest
+        ]
+
+    def test_missing_collection(self, agents):
+        _, async_agent = agents
+        with pytest.raises(ValueError):
+            asyncio.run(async_agent.get_collection("missing"))
+
+    def test_router_awaits_async_backend(self, agents, tmp_path):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from refget.router import create_refget_router, setup_backend
+
+        sync, _ = agents
+        digest = sync.list_collections()["results"][0].digest
+        app = FastAPI()
+        app.include_router(create_refget_router())
+        setup_backend(app, async_engine=f"sqlite+aiosqlite:///{tmp_path / 'refget.db'}")
+        client = TestClient(app)
+
+        assert client.get(f"/collection/{digest}").json() == sync.get_collection(digest)
+        assert client.get(f"/collection/{digest}?level=1").json() == sync.get_collection(
+            digest, level=1
+        )
+        itemwise = client.get(f"/collection/{digest}?collated=false").json()
+        assert itemwise == list(sync.iter_collection_itemwise(digest))
+        assert client.get("/list/collection").json()["pagination"]["total"] == 2
+        assert client.get("/collection/missing_collection_digest").status_code == 404
+
+    def test_compute_similarities(self, agents, tmp_path):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from refget.router import create_refget_router, setup_backend
+
+        sync, async_agent = agents
+        a, b = [c.digest for c in sync.list_collections()["results"]]
+        query = {"names": ["chr1", "chr3"], "lengths": [4, 2], "sequences": ["SQ.a", "SQ.c"]}
+
+        async def run():
+            by_digest = await async_agent.compute_similarities(
+                sync.get_collection(a), query_digest=a
+            )
+            inline = await async_agent.compute_similarities(query, page_size=1, page=1)
+            await async_agent.dispose()
+            return by_digest, inline
+
+        by_digest, inline = asyncio.run(run())
+        assert by_digest == sync.compute_similarities(sync.get_collection(a), query_digest=a)
+        assert inline == sync.compute_similarities(query, page_size=1, page=1)
+
+        app = FastAPI()
+        app.include_router(create_refget_router())
+        setup_backend(app, async_engine=f"sqlite+aiosqlite:///{tmp_path / 'refget.db'}")
+        app.state.scom_targets = {"human": [a, b]}
+        response = TestClient(app).post(f"/similarities/{a}")
+        assert response.status_code == 200
+        assert [s["digest"] for s in response.json()["similarities"]] == [
+            s["digest"] for s in by_digest["similarities"]
+        ]
+
+
+class TestGetQueryShapes:
+    @pytest.fixture
+    def digest(self, dbagent):
+        return dbagent.seqcol.add(_seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"])).digest
+
+    @staticmethod
+    def statements(dbagent, fn):
+        with capture_queries(dbagent.engine) as seen:
+            return fn(), seen
+
+    @pytest.mark.parametrize("return_format", ["level1", "level2", "itemwise"])
+    def test_one_query_per_format(self, dbagent, digest, return_format):
+        result, seen = self.statements(
+            dbagent, lambda: dbagent.seqcol.get(digest, return_format=return_format)
+        )
+        assert len(seen) == 1
+        seqcol = _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"])
+        assert result == getattr(seqcol, return_format)()
+        if return_format == "level1":
+            assert "JOIN" not in seen[0]
+
+    def test_attribute_reads_one_attribute_row(self, dbagent, digest):
+        result, seen = self.statements(
+            dbagent, lambda: dbagent.seqcol.get(digest, attribute="lengths")
+        )
+        assert result == [4, 8]
+        assert len(seen) == 1
+        assert "namesattr" not in seen[0] and "sequencesattr" not in seen[0]
+
+    def test_missing(self, dbagent, digest):
+        for kwargs in [{"return_format": "level1"}, {"attribute": "names"}, {}]:
+            with pytest.raises(ValueError, match="not found"):
+                dbagent.seqcol.get("missing", **kwargs)
+        with pytest.raises(ValueError, match="Unknown attribute"):
+            dbagent.seqcol.get(digest, attribute="sorted_name_length_pairs")
+
+
+class TestIndexedSearch:
+    @pytest.fixture
+    def digests(self, dbagent):
+        seqcols = [_seqcol([f"chr{i}", "chrM"], [4, 8], ["SQ.a", "SQ.b"]) for i in range(5)]
+        seqcols.append(_seqcol(["chr1"], [9], ["SQ.c"]))
+        dbagent.seqcol.add_many(seqcols)
+        return sorted(s.digest for s in seqcols[:5])
+
+    @pytest.mark.parametrize("sql", sorted(hot_statements()))
+    def test_hot_queries_use_an_index(self, dbagent, sql):
+        statement = hot_statements()[sql]
+        compiled = statement.compile(dbagent.engine, compile_kwargs={"literal_binds": True})
+        with dbagent.engine.connect() as conn:
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+        # SQLite reports a seek as SEARCH, and reading a whole table -- or a
+        # whole index, which is no better -- as SCAN
+        assert not [step for step in plan if step.startswith("SCAN")], plan
+
+    def test_keyset_pages(self, dbagent, digests):
+        lengths = dbagent.get_collection(digests[0], level=1)["lengths"]
+        pages, after = [], None
+        while True:
+            res = dbagent.list_collections(page_size=2, filters={"lengths": lengths}, after=after)
+            assert res["pagination"]["total"] == 5
+            pages.append([s.digest for s in res["results"]])
+            after = res["pagination"].get("next_after")
+            if after is None:
+                break
+        assert [len(p) for p in pages] == [2, 2, 1]
+        assert sum(pages, []) == digests
+
+    def test_totals_are_cached_until_a_write(self, dbagent, digests):
+        assert dbagent.collection_count() == 6
+        with Session(dbagent.engine) as session:
+            session.delete(session.get(SequenceCollection, digests[0]))
+            session.commit()
+        # Another writer: the cached total stands until it expires
+        assert dbagent.collection_count() == 6
+        dbagent.seqcol.totals.clear()
+        assert dbagent.collection_count() == 5
+        # Writes through the agent are counted at once
+        dbagent.seqcol.add(_seqcol(["chrX"], [1], ["SQ.x"]))
+        assert dbagent.collection_count() == 6
+
+    def test_totals_cache_is_bounded(self):
+        from refget.agents import TotalsCache
+
+        totals = TotalsCache(max_entries=2)
+        totals.set(("a",), 1)
+        totals.set(("b",), 2)
+        assert totals.get(("a",)) == 1
+        totals.set(("c",), 3)
+        assert len(totals) == 2
+        assert totals.get(("b",)) is None and totals.get(("a",)) == 1
+
+        totals.ttl = -1
+        totals.set(("d",), 4)
+        assert totals.get(("d",)) is None
+        assert len(totals) == 1
+
+    def test_migrate_creates_missing_indexes(self, dbagent):
+        with dbagent.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_sequencecollection_names_lengths")
+            conn.exec_driver_sql("DROP INDEX ix_humanreadablenames_digest")
+        missing = ["ix_humanreadablenames_digest", "ix_sequencecollection_names_lengths"]
+        assert sorted(dbagent.migrate(dry_run=True)) == missing
+        assert sorted(dbagent.migrate()) == missing
+        assert dbagent.migrate() == []
+
+    def test_router_pages_after_a_digest(self, dbagent, digests):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from refget.router import create_refget_router, setup_backend
+
+        app = FastAPI()
+        app.include_router(create_refget_router())
+        setup_backend(app, engine=dbagent.engine)
+        client = TestClient(app)
+
+        first = client.get("/list/collection?page_size=3").json()
+        assert first["pagination"]["next_after"] == first["results"][-1]
+        rest = client.get(f"/list/collection?after={first['results'][-1]}").json()
+        assert "next_after" not in rest["pagination"]
+        assert first["results"] + rest["results"] == sorted(first["results"] + rest["results"])
+        assert len(first["results"] + rest["results"]) == 6
+
+
+class TestCollectionMembers:
+    @pytest.fixture
+    def seqcols(self, dbagent):
+        seqcols = [
+            _seqcol(["chr1", "chr2", "chr3"], [4, 8, 8], ["SQ.a", "SQ.b", "SQ.c"], "base"),
+            _seqcol(["1", "2"], [4, 8], ["SQ.a", "SQ.b"]),
+            _seqcol(["chr1", "chr2"], [4, 9], ["SQ.a", "SQ.x"], "other"),
+            _seqcol(["z"], [100], ["SQ.z"]),
+        ]
+        dbagent.seqcol.add_many(seqcols[:2])
+        for seqcol in seqcols[2:]:
+            dbagent.seqcol.add(seqcol)
+        return seqcols
+
+    @staticmethod
+    def members(dbagent):
+        with Session(dbagent.engine) as session:
+            return [
+                (m.collection_digest, m.position, m.name, m.length, m.sequence_digest)
+                for m in session.exec(select(CollectionMember).order_by("collection_digest"))
+            ]
+
+    def test_written_on_ingest(self, dbagent, seqcols):
+        members = self.members(dbagent)
+        assert len(members) == 8
+        assert (seqcols[0].digest, 2, "chr3", 8, "SQ.c") in members
+
+    def test_backfill(self, dbagent, seqcols):
+        members = self.members(dbagent)
+        with Session(dbagent.engine) as session:
+            session.exec(
+                CollectionMember.__table__.delete().where(
+                    CollectionMember.collection_digest != seqcols[1].digest
+                )
+            )
+            session.commit()
+        assert dbagent.seqcol.backfill_members(batch_size=2) == 3
+        assert self.members(dbagent) == members
+        assert dbagent.seqcol.backfill_members() == 0
+
+    def test_containment(self, dbagent, seqcols):
+        first_two = sorted(s.digest for s in seqcols[:2])
+        assert dbagent.seqcol.collections_with_sequence("SQ.b") == first_two
+        assert dbagent.seqcol.collections_containing(["SQ.a", "SQ.b", "SQ.a"]) == first_two
+        assert dbagent.seqcol.collections_containing(["SQ.a", "SQ.z"]) == []
+
+    @pytest.mark.parametrize("stored", [True, False])
+    def test_similarities_match_python(self, dbagent, seqcols, stored):
+        from refget.utils import calc_jaccard_similarities
+
+        query = _seqcol(["chr1", "chr9", "chr3"], [4, 8, 8], ["SQ.a", "SQ.b", "SQ.q"])
+        if stored:
+            dbagent.seqcol.add(query)
+        level2 = query.level2()
+        result = dbagent.compute_similarities(
+            level2, page_size=10, query_digest=query.digest if stored else None
+        )
+        entries = result["similarities"]
+        assert result["pagination"]["total"] == len(seqcols) + stored
+        for entry in entries:
+            expected = calc_jaccard_similarities(dict(level2), dbagent.seqcol.get(entry["digest"]))
+            assert entry["similarities"] == pytest.approx(expected), entry["digest"]
+        scores = [max(e["similarities"].values()) for e in entries]
+        assert scores == sorted(scores, reverse=True)
+        names = {e["digest"]: e["human_readable_names"] for e in entries}
+        assert names[seqcols[0].digest] == ["base"]
+
+    def test_similarity_pages_follow_targets(self, dbagent, seqcols):
+        targets = [seqcols[3].digest, "missing", seqcols[2].digest, seqcols[0].digest]
+        query = {"names": ["chr1"], "lengths": [4], "sequences": ["SQ.a"]}
+        pages = [
+            dbagent.compute_similarities(query, page=page, page_size=2, target_digests=targets)
+            for page in range(2)
+        ]
+        assert [p["pagination"]["total"] for p in pages] == [3, 3]
+        digests = [e["digest"] for p in pages for e in p["similarities"]]
+        # Ranked (both share chr1/4/SQ.a), then those sharing nothing, in target order
+        assert digests == [seqcols[2].digest, seqcols[0].digest, seqcols[3].digest]
+        assert set(pages[1]["similarities"][0]["similarities"]) == {
+            "lengths",
+            "names",
+            "sequences",
+        }
+
+    def test_failed_similarity_query_surfaces_its_error(self, dbagent, seqcols, monkeypatch):
+        import refget.agents
+
+        query = {"names": ["chr1"], "lengths": [4], "sequences": ["SQ.a"]}
+
+        def fail(session, digests):
+            raise RuntimeError("statement failed")
+
+        with monkeypatch.context() as m:
+            m.setattr(refget.agents, "_human_readable_names", fail)
+            with pytest.raises(RuntimeError, match="statement failed"):
+                dbagent.compute_similarities(query)
+        result = dbagent.compute_similarities(query, page_size=10)
+        assert result["pagination"]["total"] == len(seqcols)
+
+
+class TestPangenomeLevels:
+    NAMES = ["hg38", "alt", "swapped"]
+
+    @pytest.fixture
+    def pangenome(self, dbagent):
+        from refget.models import CollectionNamesAttr, Pangenome, PangenomeCollectionLink
+
+        seqcols = [
+            _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"]),
+            _seqcol(["1", "2"], [4, 8], ["SQ.a", "SQ.b"]),
+            _seqcol(["chr2", "chr1"], [8, 4], ["SQ.b", "SQ.a"]),
+        ]
+        dbagent.seqcol.add_many(seqcols)
+        with Session(dbagent.engine) as session:
+            session.add(CollectionNamesAttr(digest="names", value=",".join(self.NAMES)))
+            session.add(Pangenome(digest=PANGENOME, names_digest="names", collections_digest="c"))
+            session.flush()
+            for seqcol in seqcols:
+                session.add(
+                    PangenomeCollectionLink(
+                        pangenome_digest=PANGENOME, collection_digest=seqcol.digest
+                    )
+                )
+            session.commit()
+        return seqcols
+
+    def test_levels(self, dbagent, pangenome):
+        agent = dbagent.pangenome
+        collections = agent.get(PANGENOME)["collections"]
+        by_digest = {s.digest: s for s in pangenome}
+        assert agent.get(PANGENOME, "level3") == {
+            "names": self.NAMES,
+            "collections": [by_digest[d].level1() for d in collections],
+        }
+        assert agent.get(PANGENOME, "level4") == {
+            "names": self.NAMES,
+            "collections": [by_digest[d].level2() for d in collections],
+        }
+
+    def test_level4_queries_do_not_grow_per_collection(self, dbagent, pangenome):
+        # The pangenome, its names and its collections; then one query per batch
+        with assert_queries(dbagent.engine, 3 + 2):
+            names, collections = dbagent.pangenome.iter_level4(PANGENOME, batch_size=2)
+            assert len(list(collections)) == 3
+
+    def test_router_streams_level4(self, dbagent, pangenome):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from refget.router import create_refget_router, setup_backend
+
+        app = FastAPI()
+        app.include_router(create_refget_router(pangenomes=True))
+        setup_backend(app, engine=dbagent.engine)
+        client = TestClient(app)
+
+        response = client.get(f"/pangenome/{PANGENOME}?level=4")
+        assert response.status_code == 200
+        assert response.json() == dbagent.pangenome.get(PANGENOME, "level4")
+        assert client.get("/pangenome/missing_pangenome_digest?level=4").status_code == 404
+
+
+class TestReplicas:
+    """SQLite files stand in for a primary and its read replicas: a replica is a
+    copy of the primary taken at some point, so later writes are missing on it."""
+
+    A = _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"])
+    B = _seqcol(["chr1"], [4], ["SQ.a"])
+
+    @pytest.fixture
+    def primary(self, tmp_path):
+        path = tmp_path / "primary.db"
+        RefgetDBAgent(engine=create_engine(f"sqlite:///{path}")).seqcol.add(self.A)
+        return path
+
+    def replica(self, primary, name):
+        import shutil
+
+        shutil.copy(primary, primary.parent / name)
+        return f"sqlite:///{primary.parent / name}"
+
+    def agent(self, primary, replica_urls, **kwargs):
+        engine = create_engine(f"sqlite:///{primary}")
+        return RefgetDBAgent(engine=engine, replica_urls=replica_urls, **kwargs)
+
+    def test_reads_go_to_replicas_and_writes_to_primary(self, primary):
+        agent = self.agent(primary, [self.replica(primary, "replica.db")])
+        agent.seqcol.add(self.B)
+        with Session(agent.engine) as session:
+            assert session.get(SequenceCollection, self.B.digest) is not None
+        # Not replicated yet: every read path goes to the stale copy.
+        assert agent.get_collection(self.A.digest) == self.A.level2()
+        with pytest.raises(ValueError):
+            agent.get_collection(self.B.digest)
+        with pytest.raises(ValueError):
+            agent.seqcol.get(self.B.digest)
+        assert agent.list_collections()["pagination"]["total"] == 1
+
+    def test_round_robin(self, primary):
+        urls = [self.replica(primary, "r1.db"), self.replica(primary, "r2.db")]
+        replicas = self.agent(primary, urls).replicas
+        engines = [replicas.read_engine() for _ in range(4)]
+        assert [str(e.url) for e in engines] == urls + urls
+
+    def test_least_latency(self, primary):
+        urls = [self.replica(primary, "r1.db"), self.replica(primary, "r2.db")]
+        replicas = self.agent(primary, urls, replica_strategy="least_latency").replicas
+        replicas.read_engine()
+        replicas.replicas[0].latency, replicas.replicas[1].latency = 0.5, 0.1
+        assert {str(replicas.read_engine().url) for _ in range(3)} == {urls[1]}
+
+    def test_unreachable_replica_falls_back_to_primary(self, primary):
+        agent = self.agent(primary, [f"sqlite:///{primary.parent}/missing/replica.db"])
+        assert agent.replicas.read_engine() is agent.engine
+        assert not agent.replicas.replicas[0].healthy
+        assert agent.get_collection(self.A.digest) == self.A.level2()
+
+    def test_failing_read_is_retried_on_primary(self, primary):
+        # Reachable, so it passes the health check, but has no tables.
+        agent = self.agent(primary, [f"sqlite:///{primary.parent}/empty.db"])
+        assert agent.get_collection(self.A.digest) == self.A.level2()
+        assert not agent.replicas.replicas[0].healthy
+        assert agent.replicas.read_engine() is agent.engine
+
+    def test_query_error_on_replica_is_raised(self, primary):
+        from sqlalchemy.exc import DataError
+
+        from refget.replicas import ReplicaRouted, read_only
+
+        agent = self.agent(primary, [self.replica(primary, "replica.db")])
+        engines = []
+
+        class Reader(ReplicaRouted):
+            replicas = agent.replicas
+
+            @read_only
+            def read(self):
+                engines.append(self.engine)
+                raise DataError("SELECT", {}, ValueError("bad input"))
+
+        with pytest.raises(DataError):
+            Reader().read()
+        assert engines == [agent.replicas.replicas[0].engine]
+        assert agent.replicas.replicas[0].healthy
+
+    def test_lagging_replica_is_skipped(self, primary, monkeypatch):
+        from refget.replicas import ReplicaSet
+
+        url = self.replica(primary, "replica.db")
+        monkeypatch.setattr(ReplicaSet, "lag", staticmethod(lambda conn: 10.0))
+        agent = self.agent(primary, [url], max_replica_lag=5)
+        assert agent.replicas.read_engine() is agent.engine
+        agent = self.agent(primary, [url], max_replica_lag=30)
+        assert str(agent.replicas.read_engine().url) == url
+
+    def test_unknown_strategy(self, primary):
+        with pytest.raises(ValueError):
+            self.agent(primary, [self.replica(primary, "r.db")], replica_strategy="random")
+
+
+class TestQueryMetrics:
+    A = _seqcol(["chr1", "chr2"], [4, 8], ["SQ.a", "SQ.b"])
+    B = _seqcol(["chr1"], [4], ["SQ.a"])
+
+    @pytest.fixture
+    def client(self, dbagent):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from refget.query_metrics import QueryEndpointMiddleware
+        from refget.router import create_refget_router
+
+        dbagent.seqcol.add(self.A)
+        dbagent.seqcol.add(self.B)
+        app = FastAPI()
+        app.include_router(create_refget_router())
+        app.add_middleware(QueryEndpointMiddleware)
+        app.state.dbagent = app.state.backend = dbagent
+        return TestClient(app)
+
+    @pytest.mark.parametrize(
+        "path,expected",
+        [
+            (f"/collection/{A.digest}?level=1", 1),
+            (f"/collection/{A.digest}?level=2", 1),
+            (f"/collection/{A.digest}?collated=false", 1),
+            (f"/attribute/collection/lengths/{A.lengths.digest}", 1),
+            (f"/comparison/{A.digest}/{B.digest}", 2),
+        ],
+    )
+    def test_endpoint_query_counts(self, dbagent, client, path, expected):
+        assert_endpoint_queries(client, dbagent.engine, path, expected)
+
+    def test_list_page_count_is_cached(self, dbagent, client):
+        assert_endpoint_queries(client, dbagent.engine, "/list/collection", 2)
+        assert_endpoint_queries(client, dbagent.engine, "/list/collection?page_size=1", 1)
+
+    def test_counts_per_agent_method(self, dbagent, client):
+        from refget.query_metrics import QUERY_METRICS
+
+        def counts(name):
+            return QUERY_METRICS.snapshot()["methods"].get(name, {"calls": 0, "queries": 0})
+
+        before = counts("SequenceCollectionAgent.get"), QUERY_METRICS.snapshot()["queries"]
+        dbagent.compare_digests(self.A.digest, self.B.digest)
+        after = counts("SequenceCollectionAgent.get"), QUERY_METRICS.snapshot()["queries"]
+        assert after[0]["calls"] - before[0]["calls"] == 2
+        assert after[0]["queries"] - before[0]["queries"] == 2
+        assert after[1] - before[1] == 2
+        assert after[0]["max_seconds"] > 0
+
+    def test_failed_query_is_counted_and_unwound(self, dbagent):
+        from sqlalchemy.exc import OperationalError
+
+        from refget.query_metrics import QUERY_METRICS
+
+        failed = QUERY_METRICS.snapshot()["failed_queries"]
+        with dbagent.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+            assert conn.info["refget_query_started"] == []
+        assert QUERY_METRICS.snapshot()["failed_queries"] == failed + 1
+
+    def test_slow_queries_are_logged(self, client, caplog, monkeypatch):
+        from refget.query_metrics import QUERY_METRICS
+
+        monkeypatch.setattr(QUERY_METRICS, "slow_query_seconds", 0)
+        slow = QUERY_METRICS.snapshot()["slow_queries"]
+        with caplog.at_level("WARNING"):
+            client.get(f"/collection/{self.A.digest}?level=1")
+        assert QUERY_METRICS.snapshot()["slow_queries"] == slow + 1
+        (message,) = [r.getMessage() for r in caplog.records if "Slow query" in r.getMessage()]
+        assert "SequenceCollectionAgent.get" in message
+        assert f"GET /collection/{self.A.digest}" in message
+        assert self.A.digest in message.split("parameters=")[1]
@@ -1,9 +1,11 @@
+import hashlib
 from pathlib import Path
 
 import pytest
 
 from refget import GTARS_INSTALLED
 from refget.digests import ga4gh_digest, py_md5_digest, py_sha512t24u_digest
+from refget.utils import digest_fasta_file, fasta_to_seqcol_dict
 
 if GTARS_INSTALLED:
     from gtars.refget import (
@@ -51,3 +53,74 @@ class TestRustDigest:
                 res_path.sequences[i].metadata.sha512t24u
                 == res_str.sequences[i].metadata.sha512t24u
             )
+
+
+@pytest.mark.skipif(not GTARS_INSTALLED, reason="gtars is not installed")
+class TestSinglePassFastaDigest:
+    FASTAS = [
+        "test_fasta/base.fa",
+        "test_fasta/pair_swap.fa",
+        "demo_fasta/demo0.fa",
+        "demo_fasta/demo1.fa.gz",
+    ]
+
+    @pytest.fixture
+    def edge_case_fasta(self, tmp_path):
+        # Lowercase, CRLF, a blank line, an empty sequence, no final newline
+        path = tmp_path / "edge.fa"
+        path.write_bytes(b">a desc\nACgt\nnn\n>b\r\nAC GT\r\nA\r\n\n>c\n>d x\nTT")
+        return path
+
+    @pytest.mark.parametrize("block_size", [1, 5, 1 << 20])
+    def test_matches_gtars(self, edge_case_fasta, block_size):
+        for path in self.FASTAS + [edge_case_fasta]:
+            result = digest_fasta_file(path, block_size=block_size)
+            assert result["seqcol_dict"] == fasta_to_seqcol_dict(path)
+            fai = [s.metadata.fai for s in digest_fasta(str(path)).sequences if s.metadata.fai]
+            assert (result["offsets"] or []) == [f.offset for f in fai]
+            if fai:
+                assert result["line_bases"] == fai[0].line_bases
+                assert result["extra_line_bytes"] == fai[0].line_bytes - fai[0].line_bases
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b">a desc\nAC GT\nacgt \n",  # inner space kept, trailing one trimmed
+            b">a\nACGT\t\nAC\n",
+            b">a\nAC \r\nGT\t\r\n",
+            b">a\nAC\rGT\n",  # a CR inside a line is kept
+            b">a\n  \nAC\xe3\x80\x80\nGT\xc2\xa0\n",  # blank first line, Unicode spaces
+            b">a\x1cb\nAC>GT\n",  # not whitespace; ">" inside a line is a base
+        ],
+    )
+    @pytest.mark.parametrize("block_size", [1, 3, 1 << 20])
+    def test_whitespace_matches_gtars(self, tmp_path, data, block_size):
+        path = tmp_path / "space.fa"
+        path.write_bytes(data)
+        result = digest_fasta_file(path, block_size=block_size)
+        assert result["seqcol_dict"] == fasta_to_seqcol_dict(path)
+        fai = [s.metadata.fai for s in digest_fasta(str(path)).sequences]
+        assert result["offsets"] == [f.offset for f in fai]
+        assert result["line_bases"] == fai[0].line_bases
+
+    @pytest.mark.parametrize("data", [b">\xff\nACGT\n", b">a\nAC\xffGT\n"])
+    def test_non_utf8_is_an_os_error(self, tmp_path, data):
+        path = tmp_path / "latin1.fa"
+        path.write_bytes(data)
+        with pytest.raises(OSError):
+            digest_fasta(str(path))
+        with pytest.raises(OSError):
+            digest_fasta_file(path, block_size=2)
+
+    def test_file_checksums(self):
+        path = Path(self.FASTAS[3])
+        data = path.read_bytes()
+        result = digest_fasta_file(path, block_size=7)
+        assert result["sha256"] == hashlib.sha256(data).hexdigest()
+        assert result["md5"] == hashlib.md5(data).hexdigest()
+        assert result["size"] == len(data)
+        assert result["offsets"] is None
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            digest_fasta_file(tmp_path / "missing.fa")
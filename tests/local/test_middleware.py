@@ -0,0 +1,351 @@
+"""Tests for StoreFreshnessMiddleware: background polling, conditional GET,
+and swapping the backend without touching the request path."""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from refget.middleware import StoreFreshnessMiddleware
+from refget.router import get_backend
+
+try:
+    from refget.backend import RefgetStoreBackend
+    from refget.seqcolapi import prepare_store
+    from refget.store import RefgetStore
+
+    _RUST_BINDINGS_AVAILABLE = True
+except ImportError:
+    _RUST_BINDINGS_AVAILABLE = False
+
+TEST_FASTA_DIR = Path("test_fasta")
+
+
+class _RgstoreHandler(BaseHTTPRequestHandler):
+    """Serves rgstore.json with an ETag and honours If-None-Match."""
+
+    metadata = {"collections_digest": "v1"}
+    requests: list = []
+
+    def do_GET(self):
+        body = json.dumps(self.metadata).encode()
+        etag = '"' + self.metadata["collections_digest"] + '"'
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rgstore_server():
+    _RgstoreHandler.metadata = {"collections_digest": "v1"}
+    _RgstoreHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RgstoreHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/store/"
+    server.shutdown()
+
+
+class TestConditionalFetch:
+    def test_unchanged_store_answers_304(self, rgstore_server):
+        mw = StoreFreshnessMiddleware(None, store_url=rgstore_server, cache_dir="/tmp")
+        metadata, validators = mw._fetch_metadata()
+        assert metadata == {"collections_digest": "v1"}
+        mw._etag, mw._last_modified = validators
+        assert mw._fetch_metadata() is None
+        assert _RgstoreHandler.requests == [None, '"v1"']
+
+    def test_failed_reload_is_retried(self, rgstore_server):
+        mw = StoreFreshnessMiddleware(None, store_url=rgstore_server, cache_dir="/tmp")
+
+        def fail(metadata, loaded):
+            raise RuntimeError("store unreachable")
+
+        mw._build_backend = fail
+        asyncio.run(mw._check_and_reload(FastAPI()))
+        # The validators were not committed, so the next poll refetches in full.
+        assert mw._etag is None and mw.last_metadata is None
+
+
+class TestBackgroundReload:
+    def test_swaps_backend_off_the_request_path(self, rgstore_server, monkeypatch):
+        app = FastAPI()
+        app.state.backend = "old"
+        built = threading.Event()
+
+        @app.get("/backend")
+        def which_backend():
+            return {"backend": app.state.backend}
+
+        app.add_middleware(
+            StoreFreshnessMiddleware,
+            store_url=rgstore_server,
+            cache_dir="/tmp",
+            check_interval=0.05,
+        )
+
+        def build_backend(self, metadata, loaded):
+            # Slow reload: requests must not wait for it.
+            time.sleep(0.2)
+            built.set()
+            return "new"
+
+        monkeypatch.setattr(StoreFreshnessMiddleware, "_build_backend", build_backend)
+        with TestClient(app) as client:
+            started = time.monotonic()
+            assert client.get("/backend").json() == {"backend": "old"}
+            assert time.monotonic() - started < 0.2
+            assert built.wait(5)
+            for _ in range(50):
+                if client.get("/backend").json()["backend"] == "new":
+                    break
+                time.sleep(0.02)
+            assert client.get("/backend").json() == {"backend": "new"}
+            # Once loaded, an unchanged store is only ever asked with its ETag.
+            time.sleep(0.2)
+            assert _RgstoreHandler.requests[-1] == '"v1"'
+
+
+@pytest.fixture
+def served_store(tmp_path):
+    """An on-disk store served over HTTP from a separate process.
+
+    A separate process, because gtars holds the GIL while it fetches, so an
+    in-process server thread could never answer it.
+    """
+    store_dir = tmp_path / "store"
+    store = RefgetStore.on_disk(str(store_dir))
+    store.add_sequence_collection_from_fasta(str(TEST_FASTA_DIR / "base.fa"))
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    log_path = tmp_path / "access.log"
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1"],
+            cwd=store_dir,
+            stderr=log,
+        )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield store_dir, url, log_path
+    server.terminate()
+    server.wait()
+
+
+@pytest.mark.skipif(not _RUST_BINDINGS_AVAILABLE, reason="gtars is not installed")
+class TestDeltaReload:
+    def test_fetches_only_new_collections(self, served_store, tmp_path):
+        store_dir, url, log_path = served_store
+        cache_dir = str(tmp_path / "cache")
+        app = FastAPI()
+        app.state.backend = RefgetStoreBackend(
+            prepare_store(url, remote=True, cache_dir=cache_dir)
+        )
+        mw = StoreFreshnessMiddleware(None, store_url=url, cache_dir=cache_dir)
+
+        # Nothing changed since start-up: the first check must not reload.
+        asyncio.run(mw._check_and_reload(app))
+        assert mw.last_delta is None
+
+        RefgetStore.open_local(str(store_dir)).add_sequence_collection_from_fasta(
+            str(TEST_FASTA_DIR / "different_names.fa")
+        )
+        # Last-Modified has one-second resolution; make the change visible to it.
+        rgstore = store_dir / "rgstore.json"
+        os.utime(rgstore, (time.time() + 2, time.time() + 2))
+        log_path.write_text("")
+        asyncio.run(mw._check_and_reload(app))
+
+        assert mw.last_delta["added"] == 1 and mw.last_delta["removed"] == 0
+        assert app.state.backend.collection_count() == 2
+        fetched = [line for line in log_path.read_text().splitlines() if "/collections/" in line]
+        assert len(fetched) == 1
+
+    def test_alias_change_is_reloaded_without_collection_fetches(self, served_store, tmp_path):
+        store_dir, url, log_path = served_store
+        cache_dir = str(tmp_path / "cache")
+        app = FastAPI()
+        app.state.backend = RefgetStoreBackend(
+            prepare_store(url, remote=True, cache_dir=cache_dir)
+        )
+        mw = StoreFreshnessMiddleware(None, store_url=url, cache_dir=cache_dir)
+        digest = app.state.backend.list_collections()["results"][0]
+
+        RefgetStore.open_local(str(store_dir)).add_collection_alias("ucsc", "hg", digest)
+        rgstore = store_dir / "rgstore.json"
+        os.utime(rgstore, (time.time() + 2, time.time() + 2))
+        log_path.write_text("")
+        asyncio.run(mw._check_and_reload(app))
+
+        assert mw.last_delta["added"] == 0 and mw.last_delta["removed"] == 0
+        assert app.state.backend.resolve_alias("collection", "ucsc", "hg") == digest
+        fetched = [
+            line for line in log_path.read_text().splitlines() if "GET /collections/" in line
+        ]
+        assert fetched == []
+        # The reload is served; the same rgstore.json does not reload again.
+        mw._etag = mw._last_modified = None
+        mw.last_delta = None
+        asyncio.run(mw._check_and_reload(app))
+        assert mw.last_delta is None
+
+
+def _freshness_middleware(app) -> StoreFreshnessMiddleware:
+    """The StoreFreshnessMiddleware instance inside a built app's stack."""
+    layer = app.build_middleware_stack()
+    app.middleware_stack = layer
+    while not isinstance(layer, StoreFreshnessMiddleware):
+        layer = layer.app
+    return layer
+
+
+class _Backend:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+        self.discarded = False
+
+    def discard_cached(self):
+        self.discarded = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestManagedSwap:
+    def test_old_backend_is_drained_then_closed(self):
+        app = FastAPI()
+        old, new = _Backend("old"), _Backend("new")
+        app.state.backend = old
+        release = asyncio.Event()
+
+        @app.get("/slow")
+        async def slow(request: Request):
+            await release.wait()
+            return {"backend": (await get_backend(request)).name}
+
+        app.add_middleware(StoreFreshnessMiddleware, store_url="http://unused", cache_dir="/tmp")
+        mw = _freshness_middleware(app)
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                in_flight = asyncio.create_task(client.get("/slow"))
+                await asyncio.sleep(0.05)
+                swap = asyncio.create_task(mw._swap_backend(app, new))
+                await asyncio.sleep(0.05)
+                assert app.state.backend is new
+                assert not old.closed  # still leased by the in-flight request
+                release.set()
+                response = await in_flight
+                await swap
+                return response
+
+        response = asyncio.run(scenario())
+        # The request finished on the backend it started with.
+        assert response.json() == {"backend": "old"}
+        assert old.closed and not new.closed
+        assert mw.stats["swaps"] == 1 and mw.stats["drained"] is True
+
+    def test_backend_outlasting_drain_timeout_is_closed_by_its_last_request(self):
+        app = FastAPI()
+        old, new = _Backend("old"), _Backend("new")
+        app.state.backend = old
+        release = asyncio.Event()
+
+        @app.get("/slow")
+        async def slow(request: Request):
+            await release.wait()
+            return {"backend": (await get_backend(request)).name}
+
+        app.add_middleware(
+            StoreFreshnessMiddleware,
+            store_url="http://unused",
+            cache_dir="/tmp",
+            drain_timeout=0.05,
+        )
+        mw = _freshness_middleware(app)
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                in_flight = asyncio.create_task(client.get("/slow"))
+                await asyncio.sleep(0.05)
+                await mw._swap_backend(app, new)
+                # Out of the shared caches at once, but not closed while leased
+                assert old.discarded and not old.closed
+                release.set()
+                return await in_flight
+
+        response = asyncio.run(scenario())
+        assert response.json() == {"backend": "old"}
+        assert mw.stats["drained"] is False
+        assert old.closed and not new.closed
+        assert mw._retired == {}
+
+    def test_swap_drops_shared_cache_entries(self):
+        from refget.backend import SIMILARITY_CACHE, RefgetStoreBackend
+
+        old = RefgetStoreBackend.__new__(RefgetStoreBackend)
+        old._cache_token = object()
+        old._store = object()
+        SIMILARITY_CACHE.put((old._cache_token, "query"), lambda: old)
+        app = FastAPI()
+        app.state.backend = old
+        mw = StoreFreshnessMiddleware(None, store_url="http://unused", cache_dir="/tmp")
+        asyncio.run(mw._swap_backend(app, _Backend("new")))
+        assert SIMILARITY_CACHE.get((old._cache_token, "query")) is None
+        assert old._store is None
+
+
+@pytest.mark.skipif(not _RUST_BINDINGS_AVAILABLE, reason="gtars is not installed")
+class TestMemoryBudget:
+    def test_reload_over_budget_is_postponed(self, served_store, tmp_path):
+        store_dir, url, _log_path = served_store
+        cache_dir = str(tmp_path / "cache")
+        app = FastAPI()
+        original = RefgetStoreBackend(prepare_store(url, remote=True, cache_dir=cache_dir))
+        app.state.backend = original
+        mw = StoreFreshnessMiddleware(None, store_url=url, cache_dir=cache_dir, memory_budget=1)
+
+        RefgetStore.open_local(str(store_dir)).add_sequence_collection_from_fasta(
+            str(TEST_FASTA_DIR / "different_names.fa")
+        )
+        asyncio.run(mw._check_and_reload(app))
+        assert app.state.backend is original
+        assert mw.stats["over_budget"] == 1
+        assert mw._etag is None and mw._last_modified is None  # retried next poll
+
+        mw.memory_budget = None
+        asyncio.run(mw._check_and_reload(app))
+        assert app.state.backend.collection_count() == 2
+        assert mw.stats["swaps"] == 1
+        assert mw.stats["peak_bytes"] >= mw.stats["resident_bytes"]
+        assert original._store is None  # released once drained
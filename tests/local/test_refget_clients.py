@@ -8,7 +8,22 @@ For integration tests that test against a real API,
 see tests/integration/test_seqcolapi_client.py
 """
 
-from refget.clients import FastaDrsClient, SequenceCollectionClient
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from refget.clients import (
+    BACKOFF_FACTOR,
+    BACKOFF_JITTER,
+    FastaDrsClient,
+    SequenceCollectionClient,
+)
 
 
 class TestClientConstruction:
@@ -42,3 +57,461 @@ class TestClientConstruction:
         client = FastaDrsClient(urls=["https://example.com/fasta"])
         assert isinstance(client, FastaDrsClient)
         assert client.urls == ["https://example.com/fasta"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the responses queued per path on the server, then 200 {}"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        self.server.requests.append((self.command, self.path))
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        queued = self.server.responses.get(self.path.split("?")[0], [])
+        status, headers, delay = queued.pop(0) if queued else (200, {}, 0)
+        if delay:
+            time.sleep(delay)
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.connections, httpd.requests, httpd.responses = 0, [], {}
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Retry delays, recorded instead of slept"""
+    import urllib3.util.retry
+
+    slept = []
+    monkeypatch.setattr(urllib3.util.retry.time, "sleep", slept.append)
+    return slept
+
+
+class TestClientSession:
+    def test_connections_are_reused(self, server):
+        client = SequenceCollectionClient(urls=[server.url])
+        for i in range(5):
+            assert client.get_collection(f"digest{i}")["path"] == f"/collection/digest{i}?level=2"
+        assert server.connections == 1
+
+    def test_session_on_urllib3_1(self, monkeypatch):
+        import refget.clients
+
+        class Retry126:
+            # urllib3 1.26's Retry: no backoff_max, no backoff_jitter
+            def __init__(
+                self,
+                total=10,
+                backoff_factor=0,
+                status_forcelist=None,
+                respect_retry_after_header=True,
+                raise_on_status=True,
+            ):
+                self.total = total
+
+        monkeypatch.setattr(refget.clients, "Retry", Retry126)
+        monkeypatch.setattr(refget.clients, "HTTPAdapter", lambda **kwargs: kwargs["max_retries"])
+        monkeypatch.setattr(refget.clients.requests.Session, "mount", lambda *args: None)
+        assert refget.clients.make_session(retries=2) is not None
+
+    def test_fasta_helper_shares_the_session(self):
+        client = SequenceCollectionClient(urls=["http://example.com"])
+        assert client._get_fasta_helper().session is client.session
+
+    def test_retries_honour_retry_after(self, server, sleeps):
+        server.responses["/collection/d"] = [(503, {"Retry-After": "7"}, 0), (502, {}, 0)]
+        client = SequenceCollectionClient(urls=[server.url])
+        assert client.get_collection("d")["path"] == "/collection/d?level=2"
+        assert len(server.requests) == 3
+        assert sleeps[0] == 7
+        # Backoff with jitter for the 502: factor * 2**1, plus at most the jitter
+        assert BACKOFF_FACTOR * 2 <= sleeps[1] <= BACKOFF_FACTOR * 2 + BACKOFF_JITTER
+
+    def test_exhausted_retries_fail_over_to_next_url(self, server, sleeps):
+        server.responses["/collection/d"] = [(503, {}, 0)] * 3
+        client = SequenceCollectionClient(urls=[server.url, server.url + "/mirror"], retries=2)
+        assert client.get_collection("d")["path"] == "/mirror/collection/d?level=2"
+        assert len(server.requests) == 4
+
+    def test_post_is_not_retried(self, server, sleeps):
+        server.responses["/comparison/d"] = [(503, {}, 0)]
+        client = SequenceCollectionClient(urls=[server.url])
+        with pytest.raises(ConnectionError):
+            client.compare_local("d", {"names": []})
+        assert server.requests == [("POST", "/comparison/d")]
+
+    def test_read_timeout(self, server):
+        server.responses["/collection/d"] = [(200, {}, 1)]
+        client = SequenceCollectionClient(
+            urls=[server.url, server.url + "/mirror"], timeout=(1, 0.1), retries=0
+        )
+        assert client.get_collection("d")["path"] == "/mirror/collection/d?level=2"
+
+
+class TestAsyncSequenceCollectionClient:
+    @pytest.fixture
+    def run(self, server):
+        from refget.async_clients import AsyncSequenceCollectionClient
+
+        def run(method, *args, urls=None, **kwargs):
+            async def call():
+                async with AsyncSequenceCollectionClient(urls=urls or [server.url]) as client:
+                    return await getattr(client, method)(*args, **kwargs)
+
+            return asyncio.run(call())
+
+        return run
+
+    @pytest.fixture
+    def async_sleeps(self, monkeypatch):
+        import refget.async_clients
+
+        slept = []
+
+        async def sleep(delay):
+            slept.append(delay)
+
+        monkeypatch.setattr(refget.async_clients.asyncio, "sleep", sleep)
+        return slept
+
+    def test_mirrors_sync_endpoints(self, run):
+        assert run("get_collection", "d", level=1)["path"] == "/collection/d?level=1"
+        assert run("get_attribute", "names", "a")["path"] == "/attribute/collection/names/a"
+        assert run("compare", "a", "b")["path"] == "/comparison/a/b"
+        assert run("list_collections", page=2, names="n")["path"] == (
+            "/list/collection?page=2&names=n"
+        )
+        assert run("resolve_alias", "ucsc", "hg38")["path"] == "/alias/collection/ucsc/hg38"
+        assert run("get_fhr", "d")["path"] == "/collection/d/fhr"
+
+    def test_bulk_preserves_order_and_reports_errors_per_item(self, run, server):
+        server.responses["/collection/missing"] = [(404, {}, 0)]
+        # The first digest is answered last, so completion order differs from input order.
+        server.responses["/collection/slow"] = [(200, {}, 0.2)]
+        results = run("get_collections", ["slow", "missing", "fast"])
+        assert results[0]["path"] == "/collection/slow?level=2"
+        assert isinstance(results[1], ConnectionError)
+        assert results[2]["path"] == "/collection/fast?level=2"
+
+    def test_concurrency_is_bounded(self, server):
+        from refget.async_clients import AsyncSequenceCollectionClient
+
+        for i in range(6):
+            server.responses[f"/collection/d{i}"] = [(200, {}, 0.1)]
+
+        async def call():
+            async with AsyncSequenceCollectionClient(urls=[server.url], concurrency=2) as client:
+                return await client.get_collections(f"d{i}" for i in range(6))
+
+        started = time.perf_counter()
+        results = asyncio.run(call())
+        # Six 0.1 s requests, two at a time
+        assert time.perf_counter() - started >= 0.3
+        assert [r["path"] for r in results] == [f"/collection/d{i}?level=2" for i in range(6)]
+        assert server.connections <= 2
+
+    def test_retries_honour_retry_after(self, run, server, async_sleeps):
+        server.responses["/collection/d"] = [(503, {"Retry-After": "7"}, 0), (502, {}, 0)]
+        assert run("get_collection", "d")["path"] == "/collection/d?level=2"
+        assert len(server.requests) == 3
+        assert async_sleeps[0] == 7
+        assert BACKOFF_FACTOR * 2 <= async_sleeps[1] <= BACKOFF_FACTOR * 2 + BACKOFF_JITTER
+
+    def test_post_is_not_retried_and_fails_over(self, run, server, async_sleeps):
+        server.responses["/comparison/d"] = [(503, {}, 0)]
+        urls = [server.url, server.url + "/mirror"]
+        result = run("compare_local", "d", {"names": []}, urls=urls)
+        assert result["path"] == "/mirror/comparison/d"
+        assert server.requests == [("POST", "/comparison/d"), ("POST", "/mirror/comparison/d")]
+        assert async_sleeps == []
+
+
+class TestClientCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from refget.client_cache import ClientCache
+
+        return ClientCache(tmp_path / "cache")
+
+    def test_immutable_responses_are_served_from_disk(self, server, cache):
+        client = SequenceCollectionClient(urls=[server.url], cache=cache)
+        first = client.get_collection("d")
+        assert client.get_collection("d") == first
+        assert client.get_attribute("names", "a") == client.get_attribute("names", "a")
+        assert len(server.requests) == 2
+        # Another client, another process: same directory, no request
+        other = SequenceCollectionClient(urls=[server.url + "/mirror"], cache=cache)
+        assert other.get_collection("d") == first
+        assert len(server.requests) == 2
+
+    def test_mutable_responses_expire(self, server, cache, monkeypatch):
+        import refget.client_cache
+
+        client = SequenceCollectionClient(urls=[server.url], cache=cache)
+        client.service_info()
+        client.list_collections(page=1)
+        client.service_info()
+        client.list_collections(page=1)
+        client.list_collections(page=2)
+        assert len(server.requests) == 3
+        now = time.time()
+        monkeypatch.setattr(refget.client_cache.time, "time", lambda: now + cache.ttl + 1)
+        client.service_info()
+        assert len(server.requests) == 4
+
+    def test_posts_are_not_cached(self, server, cache):
+        client = SequenceCollectionClient(urls=[server.url], cache=cache)
+        client.compare_local("d", {"names": []})
+        client.compare_local("d", {"names": []})
+        assert len(server.requests) == 2
+
+    def test_offline(self, server, tmp_path, cache, monkeypatch):
+        import refget.client_cache
+        from refget.client_cache import ClientCache
+
+        SequenceCollectionClient(urls=[server.url], cache=cache).service_info()
+        offline = ClientCache(cache.path, offline=True)
+        client = SequenceCollectionClient(urls=[server.url], cache=offline)
+        now = time.time()
+        monkeypatch.setattr(refget.client_cache.time, "time", lambda: now + cache.ttl + 1)
+        # Expired, but offline takes what there is
+        assert client.service_info() == {"path": "/service-info"}
+        with pytest.raises(ConnectionError, match="Offline"):
+            client.get_collection("d")
+        assert client.resolve_alias("ns", "a") is None
+        assert len(server.requests) == 1
+
+    def test_lru_eviction(self, server, cache):
+        client = SequenceCollectionClient(urls=[server.url], cache=cache)
+        client.get_collection("d0")
+        entry_size = cache.size()
+        cache.max_bytes = entry_size * 3
+        for i in range(1, 3):
+            time.sleep(0.01)
+            client.get_collection(f"d{i}")
+        time.sleep(0.01)
+        client.get_collection("d0")  # Used again: now the most recent
+        client.get_collection("d3")  # Over the cap: evicts down to 80%
+        assert cache.size() <= cache.max_bytes * 0.8
+        requests_before = len(server.requests)
+        client.get_collection("d0")
+        client.get_collection("d3")
+        assert len(server.requests) == requests_before
+        client.get_collection("d1")
+        assert len(server.requests) == requests_before + 1
+
+
+class TestMirrorSelection:
+    def test_attempts_are_ordered_by_latency(self, server):
+        slow, fast = server.url + "/slow", server.url
+        server.responses["/slow/collection/d"] = [(200, {}, 0.1)] * 3
+        client = SequenceCollectionClient(urls=[slow, fast])
+        # Each mirror is probed once, in the configured order...
+        assert client.get_collection("d")["path"] == "/slow/collection/d?level=2"
+        assert client.get_collection("d")["path"] == "/collection/d?level=2"
+        # ...then the faster one goes first.
+        assert client.get_collection("d")["path"] == "/collection/d?level=2"
+        assert [m.url for m in client.mirrors.ordered()] == [fast, slow]
+
+    def test_failed_mirror_is_tried_last_until_reprobed(self, server):
+        server.responses["/bad/collection/d"] = [(500, {}, 0)]
+        client = SequenceCollectionClient(urls=[server.url + "/bad", server.url], retries=0)
+        client.get_collection("d")
+        client.get_collection("d")
+        assert [path for _, path in server.requests] == [
+            "/bad/collection/d?level=2",
+            "/collection/d?level=2",
+            "/collection/d?level=2",
+        ]
+        client.mirrors.reprobe_interval = 0
+        assert client.get_collection("d")["path"] == "/bad/collection/d?level=2"
+        assert client.mirrors.mirrors[server.url + "/bad"].healthy
+
+    def test_client_error_is_not_a_mirror_failure(self, server):
+        server.responses["/other/collection/d"] = [(404, {}, 0)]
+        other = server.url + "/other"
+        client = SequenceCollectionClient(urls=[other, server.url], retries=0)
+        assert client.get_collection("d")["path"] == "/collection/d?level=2"
+        mirror = client.mirrors.mirrors[other]
+        assert mirror.healthy
+        assert len(mirror.latencies) == 1
+
+    def test_hedged_request_takes_first_success(self, server):
+        slow, fast = server.url + "/slow", server.url
+        server.responses["/slow/collection/d"] = [(200, {}, 1)]
+        client = SequenceCollectionClient(urls=[slow, fast], hedge=True)
+        for url, latency in ((slow, 0.02), (fast, 0.05)):
+            for _ in range(5):
+                client.mirrors.record_success(url, latency)
+        assert client.mirrors.mirrors[slow].hedge_delay() == 0.02
+        started = time.perf_counter()
+        assert client.get_collection("d")["path"] == "/collection/d?level=2"
+        assert time.perf_counter() - started < 0.5
+        assert [path for _, path in server.requests] == [
+            "/slow/collection/d?level=2",
+            "/collection/d?level=2",
+        ]
+
+    def test_unhedged_without_latency_history(self, server):
+        server.responses["/slow/collection/d"] = [(200, {}, 0.2)]
+        client = SequenceCollectionClient(urls=[server.url + "/slow", server.url], hedge=True)
+        assert client.get_collection("d")["path"] == "/slow/collection/d?level=2"
+        assert len(server.requests) == 1
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serves a DRS object at /objects/d and its bytes, honouring Range, at /file.fa"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        data = self.server.data
+        if self.path == "/objects/d":
+            drs_obj = {
+                "id": "d",
+                "size": len(data),
+                "checksums": self.server.checksums,
+                "access_methods": [
+                    {"type": "https", "access_url": {"url": f"{self.server.url}/file.fa"}}
+                ],
+            }
+            return self._send(
+                200, json.dumps(drs_obj).encode(), [("Content-Type", "application/json")]
+            )
+        range_header = self.headers.get("Range")
+        self.server.ranges.append(range_header)
+        if range_header is None or not self.server.honour_ranges:
+            return self._send(200, data)
+        start, end = (int(x) for x in range_header.split("=")[1].split("-"))
+        if start in self.server.fail_at:
+            self.server.fail_at.remove(start)
+            return self._send(500, b"")
+        end = min(end, len(data) - 1)
+        self._send(
+            206, data[start : end + 1], [("Content-Range", f"bytes {start}-{end}/{len(data)}")]
+        )
+
+
+class TestRangedDownload:
+    @pytest.fixture
+    def fasta_server(self):
+        import hashlib
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        httpd.daemon_threads = True
+        httpd.connections, httpd.ranges, httpd.fail_at = 0, [], set()
+        httpd.honour_ranges = True
+        httpd.data = b">chr1\n" + bytes(random.Random(0).choices(b"ACGT", k=10_000)) + b"\n"
+        httpd.checksums = [
+            {"type": "sha-256", "checksum": hashlib.sha256(httpd.data).hexdigest()},
+            {"type": "md5", "checksum": hashlib.md5(httpd.data).hexdigest()},
+        ]
+        httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        yield httpd
+        httpd.shutdown()
+        httpd.server_close()
+
+    def test_parallel_parts(self, fasta_server, tmp_path):
+        dest = tmp_path / "out.fa"
+        client = FastaDrsClient(urls=[fasta_server.url])
+        client.download("d", dest_path=str(dest), part_size=1000, connections=4)
+        assert dest.read_bytes() == fasta_server.data
+        assert len(fasta_server.ranges) == 11  # 10,007 bytes
+        assert fasta_server.connections > 2  # 1 for the DRS object, the rest for parts
+        assert not (tmp_path / "out.fa.partial").exists()
+        assert not (tmp_path / "out.fa.partial.json").exists()
+
+    def test_resumes_partial_download(self, fasta_server, tmp_path):
+        dest = tmp_path / "out.fa"
+        fasta_server.fail_at.add(5000)
+        client = FastaDrsClient(urls=[fasta_server.url], retries=0)
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.download("d", dest_path=str(dest), part_size=1000, connections=1)
+        assert json.loads((tmp_path / "out.fa.partial.json").read_text())["done"] == [
+            0,
+            1,
+            2,
+            3,
+            4,
+        ]
+        fasta_server.ranges.clear()
+        client.download("d", dest_path=str(dest), part_size=1000, connections=2)
+        assert dest.read_bytes() == fasta_server.data
+        size = len(fasta_server.data)
+        assert sorted(fasta_server.ranges) == sorted(
+            f"bytes={start}-{min(start + 999, size - 1)}" for start in range(5000, size, 1000)
+        )
+
+    def test_checksum_mismatch(self, fasta_server, tmp_path):
+        fasta_server.checksums[1]["checksum"] = "0" * 32
+        dest = tmp_path / "out.fa"
+        with pytest.raises(ValueError, match="md5"):
+            FastaDrsClient(urls=[fasta_server.url]).download("d", dest_path=str(dest))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_server_without_range_support(self, fasta_server, tmp_path):
+        fasta_server.honour_ranges = False
+        dest = tmp_path / "out.fa"
+        FastaDrsClient(urls=[fasta_server.url]).download("d", dest_path=str(dest), part_size=1000)
+        assert dest.read_bytes() == fasta_server.data
+        assert len(fasta_server.ranges) == 1
+
+    def test_empty_file_needs_no_range_request(self, fasta_server, tmp_path):
+        import hashlib
+
+        fasta_server.data = b""
+        fasta_server.checksums[0]["checksum"] = hashlib.sha256(b"").hexdigest()
+        fasta_server.checksums[1]["checksum"] = hashlib.md5(b"").hexdigest()
+        dest = tmp_path / "out.fa"
+        FastaDrsClient(urls=[fasta_server.url]).download("d", dest_path=str(dest))
+        assert dest.read_bytes() == b""
+        assert fasta_server.ranges == []
+        assert list(tmp_path.iterdir()) == [dest]
+
+        fasta_server.checksums[1]["checksum"] = "0" * 32
+        with pytest.raises(ValueError, match="md5"):
+            FastaDrsClient(urls=[fasta_server.url]).download("d", dest_path=str(tmp_path / "b.fa"))
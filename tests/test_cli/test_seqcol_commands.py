@@ -335,3 +335,40 @@ class TestSeqcolLocalStoreLookup:
 
         # Should fail (not in local store, not on remote servers)
         assert result.exit_code != 0
+
+
+class TestSeqcolClientCache:
+    """Tests for the seqcol commands' on-disk response cache"""
+
+    def test_offline_show_answers_from_cache(self, cli, temp_store, monkeypatch):
+        from refget.client_cache import ClientCache
+
+        monkeypatch.setenv("REFGET_STORE", str(temp_store))
+        monkeypatch.setenv("REFGET_OFFLINE", "1")
+        digest = "CACHED12345678901234567890123456"
+
+        result = cli("seqcol", "show", digest)
+        assert result.exit_code == 3  # EXIT_NETWORK_ERROR: not cached, and offline
+
+        collection = {"names": ["chr1"], "lengths": [4], "sequences": ["SQ.x"]}
+        ClientCache().put(f"/collection/{digest}?level=2", collection)
+        result = cli("seqcol", "show", digest)
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == collection
+
+    def test_cache_can_be_disabled(self, monkeypatch):
+        from refget.cli.config_manager import get_client_cache, load_config
+
+        assert get_client_cache(load_config()) is not None
+        config = load_config()
+        config["cache"]["enabled"] = False
+        assert get_client_cache(config) is None
+        monkeypatch.setenv("REFGET_OFFLINE", "true")
+        assert get_client_cache(load_config()).offline is True
+
+    def test_cache_follows_xdg_cache_home(self, tmp_path, monkeypatch):
+        from refget.cli.config_manager import get_client_cache, load_config
+
+        monkeypatch.delenv("REFGET_CACHE_DIR")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+        assert get_client_cache(load_config()).path == tmp_path / "xdg" / "refget"